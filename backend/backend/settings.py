@@ -113,6 +113,18 @@ DATABASES = {
     }
 }
 
+# Whether to maintain an index of all ancestors of each person (see
+# geneaprove/sql/ancestry.py). This speeds up the display of large trees,
+# but the index can be large. After enabling it on an existing database,
+# run "./manage.py ancestry" to fill it.
+GENEAPROVE_ANCESTRY_INDEX = False
+
+# Whether to keep the parent/child graph in memory (see
+# geneaprove/sql/graph.py), which avoids database queries when walking the
+# tree of a person. This takes precedence over the ancestry index. It is
+# best suited to a single long-running server process.
+GENEAPROVE_GRAPH_CACHE = False
+
 # make sure the database directory exists
 try:
     os.makedirs(os.path.dirname(DATABASES['default']['NAME']), exist_ok=True)
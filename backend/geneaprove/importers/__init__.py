@@ -13,9 +13,15 @@ need to convert from a Gedcom model to our own model.
 
 from django.utils.translation import ugettext as _
 import logging
+from typing import Callable, Dict
 
 logger = logging.getLogger('geneaprove.importers')
 
+# Called regularly during an import, with the current phase ("parsing",
+# "importing" or "saving"), the work done so far and the total for this
+# phase, and the number of records imported so far for each kind of record.
+Progress = Callable[[str, int, int, Dict[str, int]], None]
+
 
 class ImporterMetaClass(type):
 
@@ -56,7 +62,7 @@ class Importer(object):
 
     __metaclass__ = ImporterMetaClass
 
-    def parse(self, filename):
+    def parse(self, filename, progress: Progress = None):
         """Import data from _filename_ into our data model"""
         pass
 
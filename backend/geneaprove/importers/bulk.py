@@ -0,0 +1,163 @@
+"""
+Bulk insertion of new objects in the database.
+
+Creating objects one at a time with `Model.objects.create()` costs one
+INSERT (and one round trip to the database) per row, which dominates the
+time spent importing large files. Instead, the importer queues its objects
+in a Bulk_Writer, which inserts them in batches with executemany.
+
+Django's bulk_create() cannot be used for models with multi-table
+inheritance (P2C, P2E,... all derive from Assertion), and does not return
+the ids on all backends. So ids are allocated here, before the objects are
+inserted, starting after the largest id currently in the table. This
+assumes that nothing else inserts rows in the same tables while the import
+is running, which is true since it runs in a transaction.
+"""
+
+from typing import Any, Dict, List, Set, Tuple, Type, TypeVar
+from django.core.management.color import no_style
+from django.db import connection, models
+from django.db.models import Max
+from geneaprove.utils.date import parse_dates
+
+# Number of rows inserted by each call to executemany
+BATCH_SIZE = 2000
+
+M = TypeVar('M', bound=models.Model)
+
+
+def _root(model: Type[models.Model]) -> Type[models.Model]:
+    """
+    The model that owns the id column. For multi-table inheritance, the
+    children use the same ids as their parent.
+    """
+    parents = model._meta.get_parent_list()
+    return parents[-1] if parents else model
+
+
+class Bulk_Writer:
+    """
+    Queue new objects, and insert them all at once in flush().
+
+    Objects get their id as soon as they are added, so that they can be
+    used right away as foreign keys (for instance by other objects created
+    with `objects.create()`). Foreign key constraints are deferred until the
+    end of the transaction, so the order of insertions does not matter.
+    """
+
+    def __init__(self):
+        self._next_id: Dict[Type[models.Model], int] = {}
+        self._pending: Dict[Type[models.Model], List[models.Model]] = {}
+        self._queued: Set[Tuple[Type[models.Model], int]] = set()
+
+    def add(self, obj: M) -> M:
+        """
+        Assign an id to a new object, and queue it for insertion. Fields can
+        still be modified until flush() is called.
+        """
+        model = type(obj)
+        root = _root(model)
+        next_id = self._next_id.get(root)
+        if next_id is None:
+            next_id = (
+                root.objects.aggregate(m=Max(root._meta.pk.attname))['m']
+                or 0
+            ) + 1
+
+        self._next_id[root] = next_id + 1
+        obj.pk = next_id
+        for parent in model._meta.get_parent_list():
+            setattr(obj, parent._meta.pk.attname, next_id)
+
+        self._pending.setdefault(model, []).append(obj)
+        self._queued.add((root, next_id))
+        return obj
+
+    def save(self, obj: models.Model) -> None:
+        """
+        Save an object: queue it if it is new, do nothing if it is already
+        queued, and save it immediately otherwise.
+        """
+        if obj.pk is None:
+            self.add(obj)
+        elif (_root(type(obj)), obj.pk) not in self._queued:
+            obj.save()
+
+    def pending(self, model: Type[M]) -> List[M]:
+        """
+        The objects of this model that are queued for insertion
+        """
+        return list(self._pending.get(model, []))  # type: ignore
+
+    @staticmethod
+    def _set_dates(objs: List[Any], prefix: str, names: Set[str]) -> None:
+        """
+        Compute the sort date (and julian days, if the model has them) of
+        objects from their date (with the given prefix).
+        """
+        dates = parse_dates([getattr(obj, f'{prefix}date') for obj in objs])
+        with_jd = f'{prefix}earliest_jd' in names
+        for obj, sort_date, earliest, latest in zip(
+                objs, dates.sort_dates,
+                dates.earliest_julian_days, dates.latest_julian_days):
+            setattr(obj, f'{prefix}date_sort', sort_date)
+            if with_jd:
+                setattr(obj, f'{prefix}earliest_jd', earliest)
+                setattr(obj, f'{prefix}latest_jd', latest)
+
+    def flush(self) -> None:
+        """
+        Insert all queued objects
+        """
+        with connection.cursor() as cur:
+            for model, objs in self._pending.items():
+                names = {f.name for f in model._meta.concrete_fields}
+                for prefix in ('', 'subject_'):
+                    if f'{prefix}date_sort' in names \
+                            and f'{prefix}date' in names:
+                        # Normally computed in save(), which we bypass
+                        self._set_dates(objs, prefix, names)
+
+                for m in reversed(model._meta.get_parent_list()):
+                    self._insert(cur, m, objs)
+                self._insert(cur, model, objs)
+
+                for obj in objs:
+                    obj._state.adding = False
+                    obj._state.db = connection.alias
+
+            # Some backends (postgresql) use sequences to generate ids, and
+            # they do not know about the ids we have allocated
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), list(self._next_id)):
+                cur.execute(sql)
+
+        self._pending = {}
+        self._queued = set()
+
+    def _insert(
+            self,
+            cur,
+            model: Type[models.Model],
+            objs: List[models.Model],
+            ) -> None:
+        """
+        Insert the columns of `model`'s own table for all objects (which
+        might be instances of a child model).
+        """
+        fields = model._meta.local_concrete_fields
+        quote = connection.ops.quote_name
+        sql = (
+            f"INSERT INTO {quote(model._meta.db_table)}"
+            f" ({', '.join(quote(f.column) for f in fields)})"
+            f" VALUES ({', '.join(['%s'] * len(fields))})"
+        )
+
+        for start in range(0, len(objs), BATCH_SIZE):
+            cur.executemany(
+                sql,
+                [
+                    [f.get_db_prep_save(getattr(obj, f.attname), connection)
+                     for f in fields]
+                    for obj in objs[start:start + BATCH_SIZE]
+                ])
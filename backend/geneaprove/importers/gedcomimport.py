@@ -23,13 +23,18 @@ from geneaprove.models.characteristic import (
     Characteristic_Part_Type, Characteristic_Part, Characteristic)
 from geneaprove.models.event import Event, Event_Type_Role, Event_Type
 from geneaprove.models.group import Group, Group_Type
-from geneaprove.models.persona import Persona
+from geneaprove.models.persona import Persona, Parent_Child
 from geneaprove.models.place import Place, Place_Part_Type, Place_Part
 from geneaprove.models.representation import Representation
 from geneaprove.models.repository import Repository
 from geneaprove.models.researcher import Researcher
 from geneaprove.models.source import Source, Citation_Part_Type, Citation_Part
 from geneaprove.models.surety import Surety_Scheme
+from geneaprove.importers.bulk import Bulk_Writer
+from geneaprove.sql import ancestry, graph, search, summary
+from geneaprove.sql.personas import PersonSet
+from geneaprove.utils.date import parse_date
+from geneaprove.utils.union_find import Union_Find
 import geneaprove.importers
 
 logger = logging.getLogger('geneaprove.importers')
@@ -80,9 +85,17 @@ class GedcomImporter:
     gedcom model.
     """
 
-    def __init__(self, filename: Union[BinaryIO, str]):
+    def __init__(
+            self,
+            filename: Union[BinaryIO, str],
+            progress: Optional[geneaprove.importers.Progress] = None,
+            ):
         self.filename = filename
         self.errors: List[Tuple[int, str]] = []
+        self._progress = progress
+
+        # Number of toplevel records imported so far, for each tag
+        self.counts: Dict[str, int] = {}
         self._source_for_gedcom: Optional[Source] = None
 
         self._surety_scheme = Surety_Scheme.objects.get(id=1)
@@ -139,6 +152,11 @@ class GedcomImporter:
 
         self._create_enum_cache()
 
+        # Personas, events, characteristics, places, sources and assertions
+        # are only inserted in the database at the end, in execute_bulks
+        self._bulk = Bulk_Writer()
+
+        self._all_personas: List[Persona] = []
         self._all_place_parts: List[Place_Part] = []
         self._all_p2c: List[P2C] = []
         self._all_p2e: List[P2E] = []
@@ -171,14 +189,26 @@ class GedcomImporter:
         d = parse_gedcom(
             self.filename,
             print_warning=print_warning,
+            compact=True,
+            progress=(
+                None if progress is None
+                else lambda done, total: self._report_progress(
+                    "parsing", done, total)
+            ),
         )
         assert d is not None
         self._data = d
         self._process_FILE()
 
+    def _report_progress(self, phase: str, done: int, total: int) -> None:
+        if self._progress is not None:
+            self._progress(phase, done, total, self.counts)
+
     def _process_FILE(self) -> None:
         self._create_ids()
+        self._report_progress("saving", 0, 1)
         self.execute_bulks()
+        self._report_progress("saving", 1, 1)
 
     def _create_ids(self) -> None:
         for f in self._data.fields:
@@ -223,7 +253,11 @@ class GedcomImporter:
                 self._ids_sour[f.id] = self._process_SOUR(
                     f)[1]  # Need NOTE/OBJE
 
-        for f in self._data.fields:
+        fields = self._data.fields
+        for index, f in enumerate(fields):
+            if index % 100 == 0:
+                self._report_progress("importing", index, len(fields))
+
             if f.tag in ("HEAD", "SUBM", "TRLR", "NOTE", "SUBN",
                          "SOUR", "REPO"):
                 pass   # nothing else to do
@@ -232,6 +266,10 @@ class GedcomImporter:
             elif f.tag == "FAM":
                 self._process_FAM(f)   # Need bare indi, SOUR
 
+            self.counts[f.tag] = self.counts.get(f.tag, 0) + 1
+
+        self._report_progress("importing", len(fields), len(fields))
+
         for f, name in self._data.report_not_imported():
             self.report_error(
                 f,
@@ -299,15 +337,23 @@ class GedcomImporter:
             f'created on {date_str}, '
             f'imported on {imported_date_time}')
 
-        return Source.objects.create(
+        return self._bulk.add(Source(
             jurisdiction_place_id=None,
             researcher=self._researcher,
-            subject_date=date,
+            subject_date=str(date) if date else None,
             title=title,
             abbrev=title,
             biblio=title,
             last_change=date or django.utils.timezone.now(),
-        )
+        ))
+
+    def _create_persona(self, **kwargs) -> Persona:
+        """
+        Create a new persona (inserted in execute_bulks)
+        """
+        p = self._bulk.add(Persona(**kwargs))
+        self._all_personas.append(p)
+        return p
 
     def _create_bare_indi(self, indi: GedcomRecord) -> Persona:
         """
@@ -361,7 +407,7 @@ class GedcomImporter:
                 else:
                     self.report_error(f, "ADOP without a FAM")
 
-        p = Persona.objects.create(
+        p = self._create_persona(
             description=None,
             last_change=chan or django.utils.timezone.now(),
         )
@@ -380,10 +426,10 @@ class GedcomImporter:
                 chan = self._process_CHAN(f)
             # Do not report on ignored or unexpected fields
 
-        return Source.objects.create(
+        return self._bulk.add(Source(
             higher_source=self._source_for_gedcom,
             researcher=self._researcher,
-            last_change=chan or django.utils.timezone.now())
+            last_change=chan or django.utils.timezone.now()))
 
     def _create_bare_SUBM(self, subm: GedcomRecord) -> Researcher:
         r: Optional[Researcher] = None
@@ -416,7 +462,61 @@ class GedcomImporter:
         result.place = place
         result.save()
 
+    def _set_main_ids(self) -> List[int]:
+        """
+        Compute main_id for the new personas, from the sameAs relationships
+        found in the file, without querying the database.
+        :return: the existing personas that are related to new ones, whose
+           main_id must be updated as well.
+        """
+        groups = Union_Find()
+        for a in self._all_p2p:
+            if a.type_id == P2P_Type.sameAs and not a.disproved:
+                groups.union(a.person1_id, a.person2_id)
+
+        new_ids = set()
+        for p in self._all_personas:
+            p.main_id = groups.find(p.id)
+            new_ids.add(p.id)
+
+        return [
+            id
+            for a in self._all_p2p
+            if a.type_id == P2P_Type.sameAs
+            for id in (a.person1_id, a.person2_id)
+            if id not in new_ids
+        ]
+
+    def _parent_child(self) -> List[Parent_Child]:
+        """
+        The rows of the parent_child table for the birth events found in
+        the file (see PersonSet.update_parent_child), computed without
+        querying the database. This must be called after _set_main_ids().
+        """
+        children: Dict[int, List[int]] = {}
+        parents: Dict[int, List[Tuple[int, int]]] = {}
+        for a in self._all_p2e:
+            if a.event.type_id != Event_Type.PK_birth:
+                continue
+            main_id = a.person.main_id
+            if a.role_id == self._principal.id:
+                children.setdefault(a.event_id, []).append(main_id)
+            elif a.role_id in (self._birth__father.id,
+                               self._birth__mother.id):
+                parents.setdefault(a.event_id, []).append(
+                    (main_id, a.role_id))
+
+        return [
+            Parent_Child(
+                child_main_id=child, parent_main_id=parent, role_id=role)
+            for event_id, event_parents in parents.items()
+            for child in children.get(event_id, [])
+            for parent, role in event_parents
+        ]
+
     def execute_bulks(self) -> None:
+        existing = self._set_main_ids()
+
         Place_Part.objects.bulk_create(self._all_place_parts)
         Characteristic_Part.objects.bulk_create(self._all_char_parts)
         Citation_Part.objects.bulk_create(self._all_citation_parts)
@@ -429,13 +529,21 @@ class GedcomImporter:
             self._all_g2c,
         )
         for a in all_asserts:
-            a.save()
+            self._bulk.add(a)
+
+        sources = [s.id for s in self._bulk.pending(Source)]
+        self._bulk.flush()
+        search.update_places(p.id for p in self._places.values())
+        search.update_sources(sources)
+
+        edges = self._parent_child()
+        Parent_Child.objects.bulk_create(edges, ignore_conflicts=True)
+        ancestry.update_ancestry({e.child_main_id for e in edges})
+        graph.changed()
+        summary.update_summary({p.main_id for p in self._all_personas})
 
-#        P2C.objects.bulk_create(self._all_p2c)
-#        P2E.objects.bulk_create(self._all_p2e)
-#        P2P.objects.bulk_create(self._all_p2p)
-#        P2G.objects.bulk_create(self._all_p2g)
-#        G2C.objects.bulk_create(self._all_g2c)
+        if existing:
+            PersonSet.update_main_ids(existing)
 
     def _create_project(
             self,
@@ -630,9 +738,9 @@ class GedcomImporter:
         # be ambiguities if that parent also belonged to another family
 
         if not husb:
-            husb = Persona.objects.create()
+            husb = self._create_persona()
         if not wife:
-            wife = Persona.objects.create()
+            wife = self._create_persona()
 
         # For all events, the list of individuals
 
@@ -797,11 +905,11 @@ class GedcomImporter:
                 if xr is not None:
                     all_persons.append(self._ids_indi[(NO_SOURCE, xr)])
 
-            g = Group.objects.create(
+            g = self._bulk.add(Group(
                 type=self._group_types["FAM"],
                 place=None,
                 name=f"Family {fam.id}",
-            )
+            ))
             for source in sources:
                 for indi in all_persons:
                     self._all_p2g.append(P2G(
@@ -814,13 +922,13 @@ class GedcomImporter:
 
                 for fam_char in fam_chars:
                     char = self._parse_characteristic(fam_char, sources)
-                    G2C.objects.create(
+                    self._all_g2c.append(G2C(
                         surety=self._default_surety,
                         last_change=chan,
                         group=g,
                         characteristic=char,
                         source=source[1],
-                    )
+                    ))
 
     def _indi_for_source(self, sourceId: str, indi: Persona) -> Persona:
         """
@@ -846,7 +954,7 @@ class GedcomImporter:
             if p:
                 return p
 
-        ind = Persona.objects.create(
+        ind = self._create_persona(
             description='',  # was set for the first persona already
             last_change=indi.last_change)
 
@@ -906,10 +1014,10 @@ class GedcomImporter:
             if f.tag == "DATE":
                 date = f.value
 
-        c = Characteristic.objects.create(
+        c = self._bulk.add(Characteristic(
             place=place,
             name=(typ and typ.name) or field.tag.capitalize(),
-            date=date)
+            date=date))
 
         # The main characteristic part is the value found on the same
         # GEDCOM line as the characteristic itself. For simple
@@ -1104,7 +1212,7 @@ class GedcomImporter:
         s.biblio = bibl or title
         s.comments = '\n\n'.join(notes)
         s.subject_date = subject_date
-        s.save()
+        self._bulk.save(s)
 
         # Associate with the repositories
 
@@ -1183,12 +1291,12 @@ class GedcomImporter:
                     et = self._event_types[tname] = \
                         Event_Type.objects.create(
                             gedcom=tname, name=tname)
-                ev = Event.objects.create(
+                ev = self._bulk.add(Event(
                     type=et,
                     place=plac,
                     name=et.name,
-                    date=date)
-                anonymous = Persona.objects.create(
+                    date=date))
+                anonymous = self._create_persona(
                     description="Created automatically by importer",
                     display_name='Anonymous from gedcom source',
                     last_change=last_change)
@@ -1352,10 +1460,10 @@ class GedcomImporter:
         p = self._places.get(lookup_name, None)
         if not p:
             # ??? Should create hierarchy of places
-            new_p = Place.objects.create(
+            new_p = self._bulk.add(Place(
                 name=name,
                 date=None,
-                parent_place=None)
+                parent_place=None))
             self._places[lookup_name] = new_p  # For reuse
 
             for gedcom, value in attr:
@@ -1509,7 +1617,7 @@ class GedcomImporter:
                 # No need to add media again
                 return []
 
-            source = self._sources[t] = Source.objects.create(
+            source = self._sources[t] = self._bulk.add(Source(
                 last_change=CHAN,
                 subject_place=place,
                 researcher=self._researcher,
@@ -1517,7 +1625,7 @@ class GedcomImporter:
                 title=t,
                 abbrev=t,
                 biblio=t,
-            )
+            ))
 
         return [
             Representation.objects.create(
@@ -1636,11 +1744,11 @@ class GedcomImporter:
 
                 for p, role in indi_and_role:
                     if p is not None and role == self._principal:
-                        c = Characteristic.objects.create(
+                        c = self._bulk.add(Characteristic(
                             place=None,
                             name=f'Age at {name}',
                             date=date,
-                        )
+                        ))
                         self._all_char_parts.append(Characteristic_Part(
                             characteristic=c,
                             type=self._char_types["AGE"],
@@ -1663,11 +1771,11 @@ class GedcomImporter:
         # Place2Place table relationship.
 
         for sid, s in sources:
-            e = Event.objects.create(
+            e = self._bulk.add(Event(
                 type=evt_type,
                 place=place,
                 name=name,
-                date=date)
+                date=date))
 
             for p, role in indi_and_role:
                 if p:
@@ -1833,14 +1941,20 @@ class GedcomFileImporter(geneaprove.importers.Importer):
             'Imports a standard GEDCOM file, which most genealogy' +
             ' software can export to')
 
-    def parse(self, filename: Union[BinaryIO, str]) -> Tuple[bool, str]:
+    def parse(
+            self,
+            filename: Union[BinaryIO, str],
+            progress: Optional[geneaprove.importers.Progress] = None,
+            ) -> Tuple[bool, str]:
         """Parse and import a gedcom file.
+           :param progress: to report on the progress of the import
            :return:
                A tuple (success, errors), where errors might be None
         """
         try:
             with transaction.atomic():
-                m = GedcomImporter(filename)
+                m = GedcomImporter(filename, progress=progress)
+            logger.info('Dates: %s', parse_date.cache_info())
             return (True, m.errors_as_string())
         except Invalid_Gedcom as e:
             logger.error("Exception while parsing GEDCOM: %s", e.msg)
@@ -0,0 +1,199 @@
+"""
+Run imports in the background.
+
+Importing a large file takes minutes, which is longer than what browsers
+and proxies are willing to wait for an HTTP response. So the files are
+imported by a background thread instead, and the client polls the job for
+its progress.
+
+Jobs are only stored in memory: the database is locked by the import
+transaction, so it cannot be used to report progress anyway. Imports are
+run one after the other, since they all write to the same tables.
+"""
+
+import concurrent.futures
+import datetime
+import io
+import logging
+import threading
+import traceback
+import uuid
+from typing import BinaryIO, Dict, List, Optional, Tuple
+import django.db
+import django.utils.timezone
+from geneaprove.importers.gedcomimport import GedcomFileImporter
+
+logger = logging.getLogger('geneaprove.importers')
+
+# Number of finished jobs whose status is kept
+MAX_FINISHED_JOBS = 20
+
+# Part of the import of each file spent in each phase, to compute the
+# overall progress
+PHASE_WEIGHTS = {
+    "parsing": (0.0, 0.3),      # (start, length)
+    "importing": (0.3, 0.6),
+    "saving": (0.9, 0.1),
+}
+
+
+class Import_Job:
+    """
+    The import of one or more files, and its progress
+    """
+
+    def __init__(self, files: List[Tuple[str, bytes]]):
+        """
+        :param files: the name and contents of the files to import
+        """
+        self.id = uuid.uuid4().hex
+        self.phase = "queued"
+        self.created = django.utils.timezone.now()
+        self.finished: Optional[datetime.datetime] = None
+
+        self.files = [name for name, _ in files]
+        self.current = 0          # index of the file being imported
+        self.done = 0             # progress in the current phase
+        self.total = 0
+
+        self.counts: Dict[str, int] = {}   # records imported, per tag
+        self._counts_before: Dict[str, int] = {}   # for previous files
+        self.errors: List[str] = []
+        self.success: Optional[bool] = None   # None until finished
+
+        self._contents = [data for _, data in files]
+        self._lock = threading.Lock()
+        self._future: Optional[concurrent.futures.Future] = None
+
+    @property
+    def percent(self) -> float:
+        """
+        Overall progress
+        """
+        if self.phase == "done":
+            return 100.0
+
+        start, length = PHASE_WEIGHTS.get(self.phase, (0.0, 0.0))
+        if self.total:
+            start += length * min(1.0, self.done / self.total)
+        return round(
+            100.0 * (self.current + start) / max(1, len(self.files)), 1)
+
+    def wait(self, timeout: float = None) -> None:
+        """
+        Wait until the job has finished
+        """
+        if self._future is not None:
+            self._future.result(timeout=timeout)
+
+    def to_json(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "phase": self.phase,
+                "percent": self.percent,
+                "file": (
+                    self.files[self.current]
+                    if self.current < len(self.files) else None
+                ),
+                "files": self.files,
+                "counts": dict(self.counts),
+                "created": self.created,
+                "finished": self.finished,
+                "success": self.success,
+                "errors": list(self.errors),
+                "error": "\n\n".join(self.errors),
+            }
+
+    def _progress(
+            self,
+            phase: str,
+            done: int,
+            total: int,
+            counts: Dict[str, int],
+            ) -> None:
+        with self._lock:
+            self.phase = phase
+            self.done = done
+            self.total = total
+            for tag, count in counts.items():
+                self.counts[tag] = self._counts_before.get(tag, 0) + count
+
+    def _run(self) -> None:
+        success = True
+        try:
+            for index, data in enumerate(self._contents):
+                with self._lock:
+                    self.current = index
+                    self.phase = "parsing"
+                    self.done = self.total = 0
+                    self._counts_before = dict(self.counts)
+
+                f = io.BytesIO(data)
+                f.name = self.files[index]   # used in the title of the source
+                suc, err = GedcomFileImporter().parse(
+                    f, progress=self._progress)
+                if err:
+                    with self._lock:
+                        self.errors.append(err)
+                success = success and suc
+
+            self._contents = []
+            with self._lock:
+                self.current = len(self.files)
+
+        except Exception:
+            logger.exception("Unexpected exception in import job %s", self.id)
+            success = False
+            with self._lock:
+                self.errors.append(traceback.format_exc())
+
+        finally:
+            # Each thread has its own connection to the database
+            django.db.connection.close()
+
+        with self._lock:
+            self.success = success
+            self.phase = "done" if success else "failed"
+            self.finished = django.utils.timezone.now()
+
+
+_jobs: Dict[str, Import_Job] = {}
+_jobs_lock = threading.Lock()
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+
+def submit(files: List[Tuple[str, BinaryIO]]) -> Import_Job:
+    """
+    Start importing files in the background.
+    The files are read immediately, since uploaded files are deleted once
+    the request has been processed.
+    :param files: the name and contents of the files to import
+    """
+    global _executor
+
+    job = Import_Job([(name, f.read()) for name, f in files])
+
+    with _jobs_lock:
+        finished = sorted(
+            (j for j in _jobs.values() if j.finished is not None),
+            key=lambda j: j.finished)
+        for j in finished[:-MAX_FINISHED_JOBS]:
+            del _jobs[j.id]
+
+        _jobs[job.id] = job
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='import')
+        job._future = _executor.submit(job._run)
+
+    return job
+
+
+def get(job_id: str) -> Optional[Import_Job]:
+    """
+    The job with the given id, or None if it is unknown (or was finished a
+    long time ago)
+    """
+    with _jobs_lock:
+        return _jobs.get(job_id)
@@ -2,10 +2,15 @@
 unittest-based framework for testing imports
 """
 
+import io
 import unittest
 import os
 import os.path
-from .. import gedcomimport
+from django.db.models import Max
+from .. import gedcomimport, jobs
+from ...models import Assertion, Event, Persona, P2C, P2E, P2P, P2G
+from ...models.asserts import G2C
+from ...utils.gedcom.generator import generate_gedcom
 from ...utils.gedcom.exceptions import Invalid_Gedcom
 
 
@@ -41,3 +46,84 @@ class GedcomImportTestCase(unittest.TestCase):
     def test_gedcom_importer(self):
         """Test gedcom importer errors"""
         self._process_dir(self.dir)
+
+    def test_gedcom_import_synthetic(self):
+        """Synthetic files are imported without errors"""
+        out = io.BytesIO()
+        generate_gedcom(out, individuals=60, seed=2)
+        out.seek(0)
+        success, msg = gedcomimport.GedcomFileImporter().parse(out)
+        self.assertEqual((True, ''), (success, msg))
+
+    def test_gedcom_import_bulk(self):
+        """Objects inserted in bulk are complete"""
+        out = io.BytesIO()
+        generate_gedcom(out, individuals=30, seed=3)
+        out.seek(0)
+        last_event = Event.objects.aggregate(m=Max('id'))['m'] or 0
+        success, msg = gedcomimport.GedcomFileImporter().parse(out)
+        self.assertEqual((True, ''), (success, msg))
+
+        # Each assertion has both its parent and its child row
+        self.assertEqual(
+            Assertion.objects.count(),
+            sum(m.objects.count() for m in (P2C, P2E, P2P, P2G, G2C)))
+        self.assertTrue(P2E.objects.filter(surety__isnull=False).exists())
+
+        # Normally computed by Event.save()
+        self.assertFalse(
+            Event.objects.filter(
+                id__gt=last_event,
+                date__regex=r'^\d+ [A-Z]{3} \d{4}$',
+                date_sort__isnull=True).exists())
+
+    def test_gedcom_import_job(self):
+        """Files are imported in the background"""
+        out = io.BytesIO()
+        generate_gedcom(out, individuals=20, seed=4)
+        out.seek(0)
+
+        job = jobs.submit([('synthetic.ged', out)])
+        self.assertIs(job, jobs.get(job.id))
+        job.wait(timeout=60)
+
+        status = job.to_json()
+        self.assertEqual('done', status['phase'])
+        self.assertEqual(100.0, status['percent'])
+        self.assertEqual((True, ''), (status['success'], status['error']))
+        self.assertEqual(20, status['counts']['INDI'])
+        self.assertIsNone(jobs.get('unknown'))
+
+    def test_gedcom_import_progress(self):
+        """The importer reports its progress"""
+        out = io.BytesIO()
+        generate_gedcom(out, individuals=20, seed=5)
+        out.seek(0)
+        phases = []
+
+        def progress(phase, done, total, counts):
+            if not phases or phases[-1] != phase:
+                phases.append(phase)
+            self.assertLessEqual(done, total)
+
+        success, msg = gedcomimport.GedcomFileImporter().parse(
+            out, progress=progress)
+        self.assertTrue(success)
+        self.assertEqual(['parsing', 'importing', 'saving'], phases)
+
+    def test_gedcom_import_main_ids(self):
+        """Personas marked as aliases share the same main_id"""
+        out = io.BytesIO(
+            b"0 HEAD\n1 SOUR TEST\n1 SUBM @U1@\n1 GEDC\n2 VERS 5.5.1\n"
+            b"2 FORM LINEAGE-LINKED\n1 CHAR UTF-8\n0 @U1@ SUBM\n1 NAME T\n"
+            b"0 @I1@ INDI\n1 NAME A /B/\n1 ALIA @I2@\n"
+            b"0 @I2@ INDI\n1 NAME A /C/\n"
+            b"0 @I3@ INDI\n1 NAME D /E/\n"
+            b"0 TRLR\n")
+        last = Persona.objects.aggregate(m=Max('id'))['m'] or 0
+        success, msg = gedcomimport.GedcomFileImporter().parse(out)
+        self.assertEqual((True, ''), (success, msg))
+
+        p1, p2, p3 = Persona.objects.filter(id__gt=last).order_by('id')
+        self.assertEqual([p1.id, p1.id, p3.id],
+                         [p1.main_id, p2.main_id, p3.main_id])
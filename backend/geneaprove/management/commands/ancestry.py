@@ -0,0 +1,27 @@
+"""
+Provides new commands to ./manage.py
+"""
+
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from geneaprove.sql import ancestry
+
+
+class Command(BaseCommand):
+    """Fill the index of ancestors"""
+
+    help = (
+        'Recompute the index of all ancestors of each person, after setting'
+        ' GENEAPROVE_ANCESTRY_INDEX'
+    )
+
+    def handle(self, **options):
+        if not ancestry.enabled():
+            raise CommandError('GENEAPROVE_ANCESTRY_INDEX is not set')
+
+        start = time.time()
+        with transaction.atomic():
+            ancestry.rebuild_ancestry()
+        sys.stdout.write(f'Done ({(time.time() - start):0.3f} s)\n')
@@ -0,0 +1,256 @@
+"""
+Provides new commands to ./manage.py
+"""
+
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from geneaprove.importers.gedcomimport import GedcomImporter
+from geneaprove.utils.gedcom import parse_gedcom
+from geneaprove.utils.gedcom.file import File
+from geneaprove.utils.gedcom.generator import generate_gedcom, ENCODINGS
+from geneaprove.utils.gedcom.lexical import Lexical
+
+# Incremented whenever the format of the report changes
+REPORT_VERSION = 1
+
+# The stages that are measured. Each of them includes the previous ones,
+# and the report shows the time spent in each stage on its own.
+STAGES = ["lexical", "grammar", "import"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _ignore_warning(filename: str, line: int, msg: str) -> None:
+    pass
+
+
+def _lexical(filename: str) -> None:
+    f = File(filename)
+    try:
+        lexical = Lexical(f, print_warning=_ignore_warning)
+        while lexical.consume().level >= 0:
+            pass
+    finally:
+        f.close()
+
+
+def _grammar(filename: str) -> None:
+    parse_gedcom(filename, print_warning=_ignore_warning, compact=True)
+
+
+def _import(filename: str) -> None:
+    # Do not keep anything in the database
+    try:
+        with transaction.atomic():
+            GedcomImporter(filename)
+            raise _Rollback()
+    except _Rollback:
+        pass
+
+
+class Command(BaseCommand):
+    """Measure the performance of the GEDCOM parser and importer"""
+
+    help = (
+        'Measure the time and memory needed to parse and import a GEDCOM'
+        ' file (a synthetic one by default)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            help='Use an existing GEDCOM file instead of a synthetic one')
+        parser.add_argument(
+            '--individuals', type=int, default=10000,
+            help='Number of INDI in the synthetic file')
+        parser.add_argument('--families', type=int)
+        parser.add_argument('--sources', type=int)
+        parser.add_argument('--notes', type=int)
+        parser.add_argument('--objects', type=int)
+        parser.add_argument(
+            '--cont-density', type=float, default=0.2,
+            help='Probability that a text continues on one more line')
+        parser.add_argument(
+            '--encoding', default='UTF-8', choices=sorted(ENCODINGS))
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Run each stage several times, and keep the fastest')
+        parser.add_argument(
+            '--no-import', action='store_true',
+            help='Only measure the parser, not the database import')
+        parser.add_argument(
+            '--no-memory', action='store_true',
+            help='Do not measure peak memory (which takes one more run)')
+        parser.add_argument(
+            '--output',
+            help='Write the report, as JSON, to this file')
+        parser.add_argument(
+            '--compare',
+            help='A report from a previous run, to detect regressions')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Relative slowdown (or memory increase) reported as a'
+                 ' regression')
+
+    def handle(self, **options):
+        generated: Optional[str] = None
+        filename = options['file']
+        params: Dict[str, Any] = {}
+
+        if filename is None:
+            params = {
+                'individuals': options['individuals'],
+                'families': options['families'],
+                'sources': options['sources'],
+                'notes': options['notes'],
+                'objects': options['objects'],
+                'cont_density': options['cont_density'],
+                'encoding': options['encoding'],
+                'seed': options['seed'],
+            }
+            fd, generated = tempfile.mkstemp(suffix='.ged')
+            with os.fdopen(fd, 'wb') as out:
+                generate_gedcom(out, **params)
+            filename = generated
+
+        try:
+            report = self._run(filename, params, options)
+        finally:
+            if generated is not None:
+                os.unlink(generated)
+
+        self._print(report)
+
+        if options['output']:
+            with open(options['output'], 'w') as out:
+                json.dump(report, out, indent=2, sort_keys=True)
+                out.write('\n')
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            regressions = self._compare(
+                baseline, report, options['threshold'])
+            for r in regressions:
+                self.stderr.write(f'Regression: {r}')
+            if regressions:
+                raise CommandError(f'{len(regressions)} regression(s)')
+
+    def _run(
+            self,
+            filename: str,
+            params: Dict[str, Any],
+            options: Dict[str, Any],
+            ) -> Dict[str, Any]:
+        """
+        Measure all stages, and return the report
+        """
+        runs: List[Callable[[str], None]] = [_lexical, _grammar, _import]
+        if options['no_import']:
+            runs = runs[:2]
+
+        with open(filename, 'rb') as f:
+            data = f.read()
+
+        report: Dict[str, Any] = {
+            'version': REPORT_VERSION,
+            'python': platform.python_version(),
+            'file': {
+                'name': None if params else os.path.basename(filename),
+                'bytes': len(data),
+                'lines': len(data.splitlines()),
+                'generator': params or None,
+            },
+            'stages': {},
+        }
+        del data
+
+        previous_total = 0.0
+        for name, run in zip(STAGES, runs):
+            total = min(
+                self._time(run, filename)
+                for _ in range(max(1, options['repeat']))
+            )
+            report['stages'][name] = {
+                'seconds': round(max(0.0, total - previous_total), 4),
+                'total_seconds': round(total, 4),
+                'peak_mb': (
+                    None if options['no_memory']
+                    else round(self._peak(run, filename) / 1024 / 1024, 2)
+                ),
+            }
+            previous_total = total
+
+        return report
+
+    def _time(self, run: Callable[[str], None], filename: str) -> float:
+        gc.collect()
+        start = time.perf_counter()
+        run(filename)
+        return time.perf_counter() - start
+
+    def _peak(self, run: Callable[[str], None], filename: str) -> int:
+        """
+        Peak memory allocated by python while running the stage
+        """
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run(filename)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def _print(self, report: Dict[str, Any]) -> None:
+        f = report['file']
+        self.stdout.write(
+            f"{f['name'] or 'synthetic'}: {f['bytes']} bytes,"
+            f" {f['lines']} lines\n")
+        self.stdout.write(
+            f"{'stage':<10} {'seconds':>10} {'total':>10} {'peak MB':>10}\n")
+        for name, s in report['stages'].items():
+            peak = '-' if s['peak_mb'] is None else f"{s['peak_mb']:.2f}"
+            self.stdout.write(
+                f"{name:<10} {s['seconds']:>10.3f}"
+                f" {s['total_seconds']:>10.3f} {peak:>10}\n")
+        sys.stdout.flush()
+
+    def _compare(
+            self,
+            baseline: Dict[str, Any],
+            report: Dict[str, Any],
+            threshold: float,
+            ) -> List[str]:
+        """
+        Compare with a previous report, and return the list of regressions
+        """
+        if baseline.get('version') != REPORT_VERSION:
+            raise CommandError(
+                f"Cannot compare with a report in version"
+                f" {baseline.get('version')}")
+        if baseline['file'] != report['file']:
+            self.stderr.write(
+                'Warning: the reports were not computed on the same file')
+
+        result = []
+        for name, s in report['stages'].items():
+            old = baseline['stages'].get(name)
+            if old is None:
+                continue
+            for key, unit in (('total_seconds', 's'), ('peak_mb', 'MB')):
+                if old[key] and s[key] and s[key] > old[key] * (1 + threshold):
+                    result.append(
+                        f'{name} {key}: {old[key]}{unit} -> {s[key]}{unit}')
+        return result
@@ -0,0 +1,36 @@
+"""
+Provides new commands to ./manage.py
+"""
+
+import os
+import sys
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from geneaprove.sql import duplicates
+
+
+class Command(BaseCommand):
+    """Find persons that might be duplicates"""
+
+    help = (
+        'Compute the list of pairs of persons that might be the same, to be'
+        ' reviewed in the GUI'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help='Number of processes used to compare persons')
+        parser.add_argument(
+            '--min-score', type=int, default=duplicates.MIN_SCORE,
+            help='Ignore pairs of persons with a lower score')
+
+    def handle(self, **options):
+        start = time.time()
+        with transaction.atomic():
+            count = duplicates.find_duplicates(
+                processes=options['processes'],
+                min_score=options['min_score'])
+        sys.stdout.write(
+            f'Found {count} candidates ({(time.time() - start):0.3f} s)\n')
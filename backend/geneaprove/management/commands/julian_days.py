@@ -0,0 +1,25 @@
+"""
+Provides new commands to ./manage.py
+"""
+
+import sys
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from geneaprove.sql import dates
+
+
+class Command(BaseCommand):
+    """Fill the julian day columns"""
+
+    help = (
+        'Recompute the julian days (earliest_jd and latest_jd) of all events,'
+        ' characteristics, places and sources from their dates'
+    )
+
+    def handle(self, **options):
+        start = time.time()
+        with transaction.atomic():
+            count = dates.backfill_julian_days()
+        sys.stdout.write(
+            f'Updated {count} rows ({(time.time() - start):0.3f} s)\n')
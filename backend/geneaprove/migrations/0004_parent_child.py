@@ -0,0 +1,54 @@
+# Generated by Django 3.0.2 on 2026-10-18 06:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def forward(apps, schema_editor):
+    """
+    Compute the parent/child relationships for existing databases
+    """
+    EType = apps.get_model('geneaprove', 'Event_Type')
+    ETRole = apps.get_model('geneaprove', 'Event_Type_Role')
+    birth = EType.objects.get(gedcom='BIRT').pk
+    principal = ETRole.objects.get(name='principal').pk
+    parents = ','.join(
+        str(r.pk)
+        for r in ETRole.objects.filter(
+            type__gedcom='BIRT', name__in=('father', 'mother')))
+
+    schema_editor.execute(
+        "INSERT INTO parent_child (child_main_id, parent_main_id, role_id) "
+        "SELECT DISTINCT persona.main_id, pp.main_id, p2.role_id "
+        "FROM persona, p2e, event, p2e p2, persona pp "
+        "WHERE event.id=p2e.event_id "
+        f"AND p2e.role_id={principal} "
+        f"AND event.type_id={birth} "
+        f"AND p2.role_id IN ({parents}) "
+        "AND p2e.person_id=persona.id "
+        "AND p2.event_id=event.id "
+        "AND p2.person_id=pp.id")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geneaprove', '0003_initial_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Parent_Child',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('child_main', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='geneaprove.Persona')),
+                ('parent_main', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='geneaprove.Persona')),
+                ('role', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='geneaprove.Event_Type_Role')),
+            ],
+            options={
+                'db_table': 'parent_child',
+                'unique_together': {('child_main', 'parent_main', 'role')},
+            },
+        ),
+        migrations.RunPython(forward, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.0.2 on 2026-10-18 06:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geneaprove', '0004_parent_child'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ancestry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_generation', models.IntegerField(help_text='Number of generations between the two persons, following the shortest path (1 for a parent)')),
+                ('path_count', models.BigIntegerField(help_text='Number of distinct paths from the descendant to the ancestor, which is more than one when there is implex')),
+                ('ancestor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='geneaprove.Persona')),
+                ('descendant', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='geneaprove.Persona')),
+            ],
+            options={
+                'db_table': 'ancestry',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ancestry',
+            index=models.Index(fields=['descendant', 'min_generation'], name='ancestry_descendant'),
+        ),
+        migrations.AddIndex(
+            model_name='ancestry',
+            index=models.Index(fields=['ancestor', 'min_generation'], name='ancestry_ancestor'),
+        ),
+    ]
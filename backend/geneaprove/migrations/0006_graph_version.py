@@ -0,0 +1,18 @@
+# Generated by Django 3.0.2 on 2026-10-18 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geneaprove', '0005_ancestry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='config',
+            name='graph_version',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Changed (to a random value) whenever the parent_child table is modified, so that processes can detect that their in-memory copy of the graph is obsolete (see sql/graph.py)'),
+        ),
+    ]
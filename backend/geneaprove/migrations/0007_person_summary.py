@@ -0,0 +1,159 @@
+# Generated by Django 3.0.2 on 2026-10-18 06:58
+
+import collections
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def forward(apps, schema_editor):
+    """
+    Compute the summary of persons for existing databases.
+    This is a frozen copy of geneaprove.sql.summary.rebuild_summary()
+    """
+    CPType = apps.get_model('geneaprove', 'Characteristic_Part_Type')
+    EType = apps.get_model('geneaprove', 'Event_Type')
+    ETRole = apps.get_model('geneaprove', 'Event_Type_Role')
+    sex = CPType.objects.get(gedcom='SEX').pk
+    birth = EType.objects.get(gedcom='BIRT').pk
+    death = EType.objects.get(gedcom='DEAT').pk
+    marriage = EType.objects.get(gedcom='MARR').pk
+    principal = ETRole.objects.get(name='principal').pk
+    father = ETRole.objects.get(type__gedcom='BIRT', name='father').pk
+    mother = ETRole.objects.get(type__gedcom='BIRT', name='mother').pk
+    order = ('NPFX', 'GIVN', '_MIDL', 'SPFX', 'SURN', 'NSFX')
+
+    def display_name(parts):
+        def key(part):
+            return order.index(part[0]) if part[0] in order else len(order)
+        return ' '.join(
+            word
+            for _, value in sorted(parts, key=key)
+            for word in (value or '').replace('/', ' ').split())
+
+    with schema_editor.connection.cursor() as cur:
+        cur.execute("SELECT id FROM persona WHERE main_id=id")
+        persons = [row[0] for row in cur.fetchall()]
+
+        # The first name characteristic of each person
+        names = {}
+        cur.execute(
+            "SELECT DISTINCT p.main_id, p2c.characteristic_id, part.id, "
+            "t.gedcom, part.name "
+            "FROM persona p, p2c, assertion a, characteristic_part part, "
+            "characteristic_part_type t "
+            "WHERE p2c.person_id=p.id "
+            "AND a.id=p2c.assertion_ptr_id "
+            "AND NOT a.disproved "
+            "AND part.characteristic_id=p2c.characteristic_id "
+            "AND t.id=part.type_id "
+            "AND t.is_name_part "
+            "ORDER BY part.id")
+        for main_id, char_id, _, gedcom, value in cur.fetchall():
+            current = names.get(main_id)
+            if current is None or char_id < current[0]:
+                names[main_id] = (char_id, [(gedcom, value)])
+            elif char_id == current[0]:
+                current[1].append((gedcom, value))
+
+        sexes = collections.defaultdict(list)
+        cur.execute(
+            "SELECT DISTINCT p.main_id, c.name "
+            "FROM characteristic_part c, p2c, assertion a, persona p "
+            "WHERE c.characteristic_id=p2c.characteristic_id "
+            f"AND c.type_id={sex} "
+            "AND p2c.person_id=p.id "
+            "AND a.id=p2c.assertion_ptr_id "
+            "AND NOT a.disproved")
+        for main_id, value in cur.fetchall():
+            sexes[main_id].append(value)
+
+        dates = collections.defaultdict(dict)
+        cur.execute(
+            "SELECT p.main_id, e.type_id, MIN(e.date_sort), "
+            "MAX(e.date_sort) "
+            "FROM persona p, p2e, assertion a, event e "
+            "WHERE p2e.person_id=p.id "
+            "AND a.id=p2e.assertion_ptr_id "
+            "AND NOT a.disproved "
+            f"AND p2e.role_id={principal} "
+            "AND e.id=p2e.event_id "
+            f"AND e.type_id IN ({birth}, {death}, {marriage}) "
+            "AND e.date_sort IS NOT NULL "
+            "GROUP BY p.main_id, e.type_id")
+        for main_id, type_id, earliest, latest in cur.fetchall():
+            dates[main_id][type_id] = (earliest, latest)
+
+        parents = collections.defaultdict(list)
+        cur.execute("SELECT DISTINCT child_main_id, role_id FROM parent_child")
+        for main_id, role_id in cur.fetchall():
+            parents[main_id].append(role_id)
+
+        cur.execute(
+            "SELECT main_id, MAX(last_change) FROM persona GROUP BY main_id")
+        last_change = dict(cur.fetchall())
+        for table in ('p2c', 'p2e', 'p2g'):
+            cur.execute(
+                "SELECT p.main_id, MAX(a.last_change) "
+                f"FROM persona p, {table} x, assertion a "
+                "WHERE x.person_id=p.id "
+                "AND a.id=x.assertion_ptr_id "
+                "GROUP BY p.main_id")
+            for main_id, changed in cur.fetchall():
+                if changed is not None and (
+                        last_change.get(main_id) is None
+                        or changed > last_change[main_id]):
+                    last_change[main_id] = changed
+
+        rows = []
+        for main_id in persons:
+            name = display_name(names[main_id][1]) if main_id in names else ''
+            s = sexes[main_id]
+            d = dates.get(main_id, {})
+            rows.append((
+                main_id,
+                name,
+                name.lower(),
+                s[0] if len(s) == 1 else ('?' if s else None),
+                d.get(birth, (None, None))[0],
+                d.get(death, (None, None))[1],
+                d.get(marriage, (None, None))[0],
+                father in parents[main_id],
+                mother in parents[main_id],
+                last_change.get(main_id),
+            ))
+
+        cur.executemany(
+            "INSERT INTO person_summary (main_id, display_name, sort_name, "
+            "sex, birth_sort, death_sort, marriage_sort, has_father, "
+            "has_mother, last_change) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geneaprove', '0006_graph_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Person_Summary',
+            fields=[
+                ('main', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='geneaprove.Persona')),
+                ('display_name', models.TextField(default='', help_text='Name of the person, built from the parts of its first name characteristic')),
+                ('sort_name', models.TextField(db_index=True, default='', help_text='Lower-cased display_name, to sort lists of persons')),
+                ('sex', models.CharField(max_length=20, null=True)),
+                ('birth_sort', models.CharField(help_text='Earliest birth date', max_length=100, null=True)),
+                ('death_sort', models.CharField(help_text='Latest death date', max_length=100, null=True)),
+                ('marriage_sort', models.CharField(help_text='Earliest marriage date', max_length=100, null=True)),
+                ('has_father', models.BooleanField(default=False)),
+                ('has_mother', models.BooleanField(default=False)),
+                ('last_change', models.DateTimeField(help_text="Most recent change to the person's personas or assertions", null=True)),
+            ],
+            options={
+                'db_table': 'person_summary',
+            },
+        ),
+        migrations.RunPython(forward, migrations.RunPython.noop),
+    ]
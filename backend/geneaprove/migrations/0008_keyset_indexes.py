@@ -0,0 +1,31 @@
+# Generated by Django 3.0.2 on 2026-10-18 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geneaprove', '0007_person_summary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='person_summary',
+            name='sort_name',
+            field=models.TextField(default='', help_text='Lower-cased display_name, to sort lists of persons'),
+        ),
+        migrations.AddIndex(
+            model_name='person_summary',
+            index=models.Index(fields=['sort_name', 'main'], name='person_summary_sort'),
+        ),
+
+        # Expression indexes for the sort order of PlaceList and SourcesList
+        migrations.RunSQL(
+            "CREATE INDEX place_sort ON place (lower(name), id)",
+            "DROP INDEX IF EXISTS place_sort"),
+        migrations.RunSQL(
+            "CREATE INDEX source_sort ON source "
+            "(lower(coalesce(abbrev, '')), lower(coalesce(title, '')), id)",
+            "DROP INDEX IF EXISTS source_sort"),
+    ]
@@ -0,0 +1,98 @@
+import collections
+from django.db import migrations, OperationalError
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# The search tables, and their columns (see geneaprove.sql.search)
+TABLES = (
+    ('search_person', ('names', )),
+    ('search_place', ('name', 'parts')),
+    ('search_source', ('title', 'abbrev', 'biblio')),
+)
+
+
+def _fill(cur):
+    """
+    A frozen copy of geneaprove.sql.search.rebuild()
+    """
+    cur.execute(
+        "SELECT DISTINCT p.main_id, part.id, part.name "
+        "FROM persona p, p2c, assertion a, characteristic_part part, "
+        "characteristic_part_type t "
+        "WHERE p2c.person_id=p.id "
+        "AND a.id=p2c.assertion_ptr_id "
+        "AND NOT a.disproved "
+        "AND part.characteristic_id=p2c.characteristic_id "
+        "AND t.id=part.type_id "
+        "AND t.is_name_part "
+        "ORDER BY part.id")
+    names = collections.defaultdict(list)
+    for main_id, _, name in cur.fetchall():
+        names[main_id].append(name or '')
+    cur.executemany(
+        "INSERT INTO search_person (rowid, names) VALUES (%s, %s)",
+        [(id, ' '.join(n)) for id, n in names.items()])
+
+    cur.execute("SELECT place_id, name FROM place_part ORDER BY id")
+    parts = collections.defaultdict(list)
+    for id, name in cur.fetchall():
+        parts[id].append(name or '')
+    cur.execute("SELECT id, name FROM place")
+    cur.executemany(
+        "INSERT INTO search_place (rowid, name, parts) VALUES (%s, %s, %s)",
+        [(id, name or '', ' '.join(parts[id]))
+         for id, name in cur.fetchall()])
+
+    cur.execute("SELECT id, title, abbrev, biblio FROM source")
+    cur.executemany(
+        "INSERT INTO search_source (rowid, title, abbrev, biblio) "
+        "VALUES (%s, %s, %s, %s)",
+        [(id, title or '', abbrev or '', biblio or '')
+         for id, title, abbrev, biblio in cur.fetchall()])
+
+
+def forward(apps, schema_editor):
+    """
+    Create and fill the full-text search tables, when sqlite supports them
+    (see geneaprove.sql.search)
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    # remove_diacritics=2 requires sqlite 3.27, and handles more characters
+    remove_diacritics = 2 if sqlite3.sqlite_version_info >= (3, 27) else 1
+    try:
+        with schema_editor.connection.cursor() as cur:
+            for table, columns in TABLES:
+                cur.execute(
+                    f"CREATE VIRTUAL TABLE {table} USING fts5("
+                    f"{', '.join(columns)}, "
+                    "tokenize='unicode61 remove_diacritics "
+                    f"{remove_diacritics:d}', "
+                    "prefix='2 3')")
+    except OperationalError:
+        logger.warning('No FTS5 support in sqlite, searching will be slower')
+        return
+
+    with schema_editor.connection.cursor() as cur:
+        _fill(cur)
+
+
+def backward(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cur:
+            for table, _ in TABLES:
+                cur.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geneaprove', '0008_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 3.0.2 on 2026-10-18 07:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def forward(apps, schema_editor):
+    """
+    Compute the phonetic codes for existing databases.
+    This is a frozen copy of geneaprove.sql.phonetic.rebuild_phonetic(),
+    only the encoders (which do not depend on the schema) are shared.
+    """
+    from geneaprove.utils import phonetic
+
+    with schema_editor.connection.cursor() as cur:
+        cur.execute(
+            "SELECT DISTINCT p.main_id, part.name "
+            "FROM persona p, p2c, assertion a, characteristic_part part, "
+            "characteristic_part_type t "
+            "WHERE p2c.person_id=p.id "
+            "AND a.id=p2c.assertion_ptr_id "
+            "AND NOT a.disproved "
+            "AND part.characteristic_id=p2c.characteristic_id "
+            "AND t.id=part.type_id "
+            "AND t.gedcom IN ('SURN', 'GIVN')")
+        rows = set()
+        for main_id, name in cur.fetchall():
+            for algorithm in ('soundex', 'daitch_mokotoff', 'french'):
+                for code in phonetic.codes(algorithm, name or ''):
+                    rows.add((main_id, algorithm, code))
+
+        cur.executemany(
+            "INSERT INTO person_phonetic (main_id, algorithm, code) "
+            "VALUES (%s, %s, %s)",
+            sorted(rows))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geneaprove', '0009_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Person_Phonetic',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('algorithm', models.CharField(choices=[('soundex', 'Soundex'), ('daitch_mokotoff', 'Daitch-Mokotoff'), ('french', 'French (Soundex2)')], max_length=20)),
+                ('code', models.CharField(max_length=10)),
+                ('main', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='geneaprove.Persona')),
+            ],
+            options={
+                'db_table': 'person_phonetic',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='person_phonetic',
+            index=models.Index(fields=['algorithm', 'code', 'main'], name='person_phonetic_code'),
+        ),
+        migrations.RunPython(forward, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.0.2 on 2026-10-18 07:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geneaprove', '0010_person_phonetic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Duplicate_Candidate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.IntegerField(help_text='The higher, the more likely the persons are the same')),
+                ('person1', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='geneaprove.Persona')),
+                ('person2', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='geneaprove.Persona')),
+            ],
+            options={
+                'db_table': 'duplicate_candidate',
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 3.0.2 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+def forward(apps, schema_editor):
+    """
+    Compute the julian days for existing databases
+    """
+    from geneaprove.sql import dates
+    dates.backfill_julian_days()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geneaprove', '0011_duplicate_candidate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='characteristic',
+            name='earliest_jd',
+            field=models.IntegerField(db_index=True, help_text='First julian day covered by the date, computed from date, for comparisons in the database', null=True),
+        ),
+        migrations.AddField(
+            model_name='characteristic',
+            name='latest_jd',
+            field=models.IntegerField(db_index=True, help_text='Last julian day covered by the date', null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='earliest_jd',
+            field=models.IntegerField(db_index=True, help_text='First julian day covered by the date, computed from date, for comparisons in the database', null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='latest_jd',
+            field=models.IntegerField(db_index=True, help_text='Last julian day covered by the date', null=True),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='earliest_jd',
+            field=models.IntegerField(db_index=True, help_text='First julian day covered by the date, computed from date, for comparisons in the database', null=True),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='latest_jd',
+            field=models.IntegerField(db_index=True, help_text='Last julian day covered by the date', null=True),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='subject_earliest_jd',
+            field=models.IntegerField(db_index=True, help_text='First julian day covered by the subject date, computed from subject_date, for comparisons in the database', null=True),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='subject_latest_jd',
+            field=models.IntegerField(db_index=True, help_text='Last julian day covered by the subject date', null=True),
+        ),
+        migrations.RunPython(forward, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    On SQLite, adding the julian day columns in 0012 rebuilds the place
+    and source tables, which drops the expression indexes created by 0008.
+    """
+
+    dependencies = [
+        ('geneaprove', '0012_julian_days'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS place_sort ON place (lower(name), id)",
+            "DROP INDEX IF EXISTS place_sort"),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS source_sort ON source "
+            "(lower(coalesce(abbrev, '')), lower(coalesce(title, '')), id)",
+            "DROP INDEX IF EXISTS source_sort"),
+    ]
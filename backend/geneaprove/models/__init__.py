@@ -15,7 +15,9 @@ from .characteristic import (
     Characteristic_Part_Type, Characteristic, Characteristic_Part)
 from .event import Event_Type, Event_Type_Role, Event
 from .group import Group_Type, Group_Type_Role, Group
-from .persona import Persona
+from .persona import (
+    Persona, Parent_Child, Ancestry, Person_Summary, Person_Phonetic,
+    Duplicate_Candidate)
 from .place import Place, Place_Part_Type, Place_Part
 from .representation import Representation
 from .repository import Repository, Repository_Type
@@ -37,6 +39,12 @@ class Config(GeneaProveModel):
         help_text="Version number of this database. Used to detect what"
         " updates need to be performed")
 
+    graph_version = models.BigIntegerField(
+        editable=False, default=0,
+        help_text="Changed (to a random value) whenever the parent_child"
+        " table is modified, so that processes can detect that their"
+        " in-memory copy of the graph is obsolete (see sql/graph.py)")
+
     class Meta:
         """Meta data for the model"""
         db_table = "config"
@@ -1,17 +1,18 @@
 import collections
 from django.db import models
+from django.db.models import Q
 import django.utils.timezone
 import logging
 from .base import GeneaProveModel
 from .characteristic import Characteristic, Characteristic_Part_Type
-from .event import Event, Event_Type_Role
+from .event import Event, Event_Type, Event_Type_Role
 from .group import Group, Group_Type_Role
 from .persona import Persona
 from .place import Place
 from .researcher import Researcher
 from .source import Source
 from .surety import Surety_Scheme_Part
-from typing import List, Any, Dict, Protocol, Iterable
+from typing import List, Any, Dict, Protocol, Iterable, Tuple
 
 
 logger = logging.getLogger('geneaprove.asserts')
@@ -157,6 +158,37 @@ class P2P(Assertion):
     class Meta:
         db_table = "p2p"
 
+    def save(self, **kwargs):
+        previous = (
+            None
+            if self.pk is None
+            else P2P.objects.filter(pk=self.pk)
+               .values_list('person1_id', 'person2_id').first()
+        )
+        super().save(**kwargs)
+        self._update_main_ids(previous)
+
+    def delete(self, **kwargs):
+        result = super().delete(**kwargs)
+        self._update_main_ids()
+        return result
+
+    def _update_main_ids(self, previous: Tuple[int, int] = None) -> None:
+        """
+        Keep Persona.main_id up-to-date when a sameAs relationship is
+        created, modified, disproved or deleted (we do not know the previous
+        type, so this is also done for other relationships).
+        :param previous: the (person1_id, person2_id) before the save, which
+           might no longer be connected.
+        Objects created via bulk_create or deleted via a QuerySet are not
+        handled.
+        """
+        from geneaprove.sql.personas import PersonSet
+        persons = {self.person1_id, self.person2_id}
+        if previous is not None:
+            persons.update(previous)
+        PersonSet.update_main_ids(persons)
+
     def getRelatedIds(self, into: AssertListProtocol) -> None:
         super().getRelatedIds(into)
         into.add_missing(persons=(self.person1_id, self.person2_id))
@@ -187,6 +219,35 @@ class P2C(Assertion):
     def __str__(self) -> str:
         return f"<P2C person={self.person_id} char={self.characteristic}>"
 
+    def save(self, **kwargs):
+        previous = (
+            None
+            if self.pk is None
+            else P2C.objects.filter(pk=self.pk)
+               .values_list('person_id', flat=True).first()
+        )
+        super().save(**kwargs)
+        self._update_summary(previous)
+
+    def delete(self, **kwargs):
+        result = super().delete(**kwargs)
+        self._update_summary()
+        return result
+
+    def _update_summary(self, previous_person: int = None) -> None:
+        """
+        Keep the person_summary table up-to-date (name and sex).
+        Objects created via bulk_create or deleted via a QuerySet are not
+        handled.
+        """
+        from geneaprove.sql import summary
+        summary.update_summary(
+            Persona.objects
+            .filter(id__in=(self.person_id, previous_person))
+            .exclude(main_id=None)
+            .values_list('main_id', flat=True)
+            .distinct())
+
     @staticmethod
     def related_json_fields() -> List[str]:
         return Assertion.related_json_fields() + ['characteristic']
@@ -243,6 +304,59 @@ class P2E(Assertion):
         """Meta data for the model"""
         db_table = "p2e"
 
+    def save(self, **kwargs):
+        previous = (
+            None
+            if self.pk is None
+            else P2E.objects.filter(pk=self.pk)
+               .values_list('person_id', 'event_id').first()
+        )
+        super().save(**kwargs)
+        self._update_parent_child(previous)
+
+    def delete(self, **kwargs):
+        result = super().delete(**kwargs)
+        self._update_parent_child()
+        return result
+
+    def _update_parent_child(
+            self, previous: Tuple[int, int] = None) -> None:
+        """
+        Keep the parent_child table up-to-date when the actors of a birth
+        event change, and the summary when the actors of a death or
+        marriage change.
+        :param previous: the (person_id, event_id) before the save.
+        Objects created via bulk_create or deleted via a QuerySet are not
+        handled.
+        """
+        from geneaprove.sql.personas import PersonSet
+        from geneaprove.sql import summary
+        persons = [self.person_id]
+        events = [self.event_id]
+        if previous is not None:
+            persons.append(previous[0])
+            events.append(previous[1])
+
+        types = set(
+            Event.objects.filter(id__in=events)
+            .values_list('type_id', flat=True))
+        if Event_Type.PK_birth in types:
+            PersonSet.update_parent_child(
+                Persona.objects
+                .filter(Q(events__event_id__in=events) | Q(id__in=persons))
+                .exclude(main_id=None)
+                .values_list('main_id', flat=True)
+                .distinct())
+        elif any(Event_Type.in_summary(t) for t in types):
+            main_ids = list(
+                Persona.objects
+                .filter(id__in=persons)
+                .exclude(main_id=None)
+                .values_list('main_id', flat=True)
+                .distinct())
+            if main_ids:
+                summary.update_summary(main_ids)
+
     @staticmethod
     def related_json_fields() -> List[str]:
         """What select_related() to use if we want to export to JSON"""
@@ -1,6 +1,6 @@
 from django.db import models
 from geneaprove.utils import date
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 
 class GeneaProveModel(models.Model):
@@ -30,10 +30,26 @@ def compute_sort_date(partial_date: Optional[str]) -> Optional[str]:
     return (
         None
         if partial_date is None
-        else date.DateRange(partial_date).sort_date()
+        else date.parse_date(partial_date).sort_date()
     )
 
 
+def compute_julian_days(
+        partial_date: Optional[str],
+        ) -> Tuple[Optional[int], Optional[int]]:
+    """
+    The range of julian days covered by a date as read in a source, which
+    is stored (and indexed) so that dates can be compared in the database.
+    Both are None when the date cannot be parsed.
+    """
+    if partial_date is None:
+        return (None, None)
+    d = date.parse_date(partial_date)
+    if d.sort_date() is None:
+        return (None, None)
+    return (d.earliest_julian_day, d.latest_julian_day)
+
+
 ##########
 # Lookup #
 ##########
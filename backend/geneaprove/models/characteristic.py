@@ -1,7 +1,11 @@
 from django.db import models
-from geneaprove.utils.date import DateRange
+from geneaprove.utils.date import parse_date
+from typing import List
 from .place import Place
-from .base import GeneaProveModel, compute_sort_date, Part_Type, lazy_lookup
+from .persona import Persona
+from .base import (
+    GeneaProveModel, compute_sort_date, compute_julian_days, Part_Type,
+    lazy_lookup)
 
 
 class Characteristic_Part_Type(Part_Type):
@@ -37,6 +41,13 @@ class Characteristic(GeneaProveModel):
     date_sort = models.CharField(
         null=True, max_length=100,
         help_text="Date, parsed automatically")
+    earliest_jd = models.IntegerField(
+        null=True, db_index=True,
+        help_text="First julian day covered by the date, computed from"
+        " date, for comparisons in the database")
+    latest_jd = models.IntegerField(
+        null=True, db_index=True,
+        help_text="Last julian day covered by the date")
 
     def __str__(self):
         return f"<Characteristic name={self.name}>"
@@ -46,15 +57,25 @@ class Characteristic(GeneaProveModel):
         db_table = "characteristic"
 
     def save(self, **kwargs):
+        is_new = self.pk is None
         self.date_sort = compute_sort_date(self.date)
+        self.earliest_jd, self.latest_jd = compute_julian_days(self.date)
         super().save(**kwargs)
+        if not is_new:
+            _update_summary(_persons(self.id))
+
+    def delete(self, **kwargs):
+        persons = _persons(self.id)
+        result = super().delete(**kwargs)
+        _update_summary(persons)
+        return result
 
     def to_json(self):
         return {
             "name": self.name,
             "date": self.date,
             "date_sort": None
-                if not self.date_sort else DateRange(self.date_sort),
+                if not self.date_sort else parse_date(self.date_sort),
             "place": self.place_id}
 
 
@@ -79,3 +100,35 @@ class Characteristic_Part(GeneaProveModel):
 
     def __str__(self):
         return self.type.name + "=" + self.name
+
+    def save(self, **kwargs):
+        super().save(**kwargs)
+        _update_summary(_persons(self.characteristic_id))
+
+    def delete(self, **kwargs):
+        result = super().delete(**kwargs)
+        _update_summary(_persons(self.characteristic_id))
+        return result
+
+
+def _persons(characteristic_id: int) -> List[int]:
+    """
+    The persons (main_id) that have the characteristic
+    """
+    return list(
+        Persona.objects
+        .filter(p2c__characteristic_id=characteristic_id)
+        .exclude(main_id=None)
+        .values_list('main_id', flat=True)
+        .distinct())
+
+
+def _update_summary(main_ids: List[int]) -> None:
+    """
+    Keep the person_summary table up-to-date (name and sex) when a
+    characteristic or its parts are modified.
+    Objects modified via bulk_create or a QuerySet are not handled.
+    """
+    from geneaprove.sql import summary
+    if main_ids:
+        summary.update_summary(main_ids)
@@ -1,7 +1,11 @@
 from django.db import models
 from geneaprove.utils.date import DateRange
+from typing import List, Optional
 from .place import Place
-from .base import GeneaProveModel, Part_Type, compute_sort_date, lazy_lookup
+from .persona import Persona
+from .base import (
+    GeneaProveModel, Part_Type, compute_sort_date, compute_julian_days,
+    lazy_lookup)
 
 
 class Event_Type(Part_Type):
@@ -17,6 +21,14 @@ class Event_Type(Part_Type):
     PK_marriage = lazy_lookup(gedcom='MARR')
     PK_death = lazy_lookup(gedcom='DEAT')
 
+    @staticmethod
+    def in_summary(type_id: Optional[int]) -> bool:
+        """
+        Whether events of this type are used in the person_summary table
+        """
+        return type_id in (
+            Event_Type.PK_birth, Event_Type.PK_death, Event_Type.PK_marriage)
+
 
 class Event_Type_Role(GeneaProveModel):
     """
@@ -69,15 +81,48 @@ class Event(GeneaProveModel):
     date_sort = models.CharField(
         max_length=100, null=True,
         help_text="Date of the event, parsed automatically")
+    earliest_jd = models.IntegerField(
+        null=True, db_index=True,
+        help_text="First julian day covered by the date, computed from"
+        " date, for comparisons in the database")
+    latest_jd = models.IntegerField(
+        null=True, db_index=True,
+        help_text="Last julian day covered by the date")
 
     class Meta:
         """Meta data for the model"""
         db_table = "event"
 
     def save(self, **kwargs):
+        from geneaprove.sql.personas import PersonSet
+        previous_type = (
+            None
+            if self.pk is None
+            else Event.objects.filter(pk=self.pk)
+               .values_list('type_id', flat=True).first()
+        )
         self.date_sort = compute_sort_date(self.date)
+        self.earliest_jd, self.latest_jd = compute_julian_days(self.date)
         super().save(**kwargs)
 
+        # A new event has no actors yet. The parent_child table only
+        # depends on birth events, the summary on a few more types.
+        if previous_type is not None:
+            if previous_type != self.type_id and Event_Type.PK_birth in (
+                    previous_type, self.type_id):
+                PersonSet.update_parent_child(_actors(self.id))
+            elif Event_Type.in_summary(previous_type) \
+                    or Event_Type.in_summary(self.type_id):
+                _update_summary(_actors(self.id))
+
+    def delete(self, **kwargs):
+        # The assertions are deleted too, which might change the parents
+        from geneaprove.sql.personas import PersonSet
+        actors = _actors(self.id)
+        result = super().delete(**kwargs)
+        PersonSet.update_parent_child(actors)
+        return result
+
     def __str__(self):
         d = self.date
         date = " (on " + d + ")" if d else ""
@@ -111,3 +156,26 @@ class Event(GeneaProveModel):
                     return None
         else:
             return None
+
+
+def _actors(event_id: int) -> List[int]:
+    """
+    The persons (main_id) involved in the event
+    """
+    return list(
+        Persona.objects
+        .filter(events__event_id=event_id)
+        .exclude(main_id=None)
+        .values_list('main_id', flat=True)
+        .distinct())
+
+
+def _update_summary(main_ids: List[int]) -> None:
+    """
+    Keep the person_summary table up-to-date (birth and death dates) when
+    an event is modified.
+    Objects modified via a QuerySet are not handled.
+    """
+    from geneaprove.sql import summary
+    if main_ids:
+        summary.update_summary(main_ids)
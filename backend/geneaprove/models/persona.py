@@ -20,6 +20,7 @@ class Persona(GeneaProveModel):
     # The last change date will be computed as the date of the most recent
     # assertion that applies to the person.
 
+    display_name: Optional[str] = None     # precomputed via person_summary
     birthISODate: Optional[str] = None     # precomputed via extended_personas
     deathISODate: Optional[str] = None     # precomputed via extended_personas
     marriageISODate: Optional[str] = None  # precomputed via extended_personas
@@ -51,6 +52,8 @@ class Persona(GeneaProveModel):
         result = {
             'id': self.id,
         }
+        if self.display_name is not None:
+            result['display_name'] = self.display_name
         if self.description:
             result['description'] = self.description
         if self.birthISODate is not None:
@@ -65,3 +68,170 @@ class Persona(GeneaProveModel):
             result['generation'] = self.generation
 
         return result
+
+
+class Parent_Child(GeneaProveModel):
+    """
+    A cache of the parent/child relationships between persons (main_id),
+    derived from the birth events: `parent` is the father or mother in the
+    birth event of `child`.
+    Like Persona.main_id, this is kept up-to-date when assertions are
+    modified (see PersonSet.update_parent_child), and avoids joining the
+    event tables every time we need to walk the tree of a person.
+    """
+
+    child_main_id: int
+    child_main = models.ForeignKey(
+        Persona, on_delete=models.CASCADE, related_name="+",
+        db_index=False)   # first column of the unique index
+
+    parent_main_id: int
+    parent_main = models.ForeignKey(
+        Persona, on_delete=models.CASCADE, related_name="+")
+
+    role_id: int
+    role = models.ForeignKey(
+        "Event_Type_Role", on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        """Meta data for the model"""
+        db_table = "parent_child"
+        unique_together = (("child_main", "parent_main", "role"), )
+
+
+class Ancestry(GeneaProveModel):
+    """
+    An optional index of all the ancestors of each person (the transitive
+    closure of Parent_Child), so that walking the tree of a person is a
+    single query (see geneaprove.sql.ancestry).
+    This table is only maintained when settings.GENEAPROVE_ANCESTRY_INDEX
+    is set, since it can grow large.
+    """
+
+    ancestor_id: int
+    ancestor = models.ForeignKey(
+        Persona, on_delete=models.CASCADE, related_name="+",
+        db_index=False)
+
+    descendant_id: int
+    descendant = models.ForeignKey(
+        Persona, on_delete=models.CASCADE, related_name="+",
+        db_index=False)
+
+    min_generation = models.IntegerField(
+        help_text="Number of generations between the two persons, following"
+        " the shortest path (1 for a parent)")
+    path_count = models.BigIntegerField(
+        help_text="Number of distinct paths from the descendant to the"
+        " ancestor, which is more than one when there is implex")
+
+    class Meta:
+        """Meta data for the model"""
+        db_table = "ancestry"
+        indexes = [
+            models.Index(
+                fields=["descendant", "min_generation"],
+                name="ancestry_descendant"),
+            models.Index(
+                fields=["ancestor", "min_generation"],
+                name="ancestry_ancestor"),
+        ]
+
+
+class Person_Summary(GeneaProveModel):
+    """
+    A cache of the information displayed for each person (main_id) in lists,
+    pedigrees and statistics, so that they do not have to be computed from
+    the assertions on every request.
+    Like Parent_Child, this is kept up-to-date when assertions are modified
+    (see geneaprove.sql.summary).
+    """
+
+    main_id: int
+    main = models.OneToOneField(
+        Persona, on_delete=models.CASCADE, related_name="+",
+        primary_key=True)
+
+    display_name = models.TextField(
+        default='', help_text="Name of the person, built from the parts of"
+        " its first name characteristic")
+    sort_name = models.TextField(
+        default='',
+        help_text="Lower-cased display_name, to sort lists of persons")
+    sex = models.CharField(max_length=20, null=True)
+
+    birth_sort = models.CharField(
+        max_length=100, null=True, help_text="Earliest birth date")
+    death_sort = models.CharField(
+        max_length=100, null=True, help_text="Latest death date")
+    marriage_sort = models.CharField(
+        max_length=100, null=True, help_text="Earliest marriage date")
+
+    has_father = models.BooleanField(default=False)
+    has_mother = models.BooleanField(default=False)
+
+    last_change = models.DateTimeField(
+        null=True, help_text="Most recent change to the person's personas or"
+        " assertions")
+
+    class Meta:
+        """Meta data for the model"""
+        db_table = "person_summary"
+        indexes = [
+            # For keyset pagination (see PersonSet.add_ids)
+            models.Index(
+                fields=["sort_name", "main"], name="person_summary_sort"),
+        ]
+
+
+class Person_Phonetic(GeneaProveModel):
+    """
+    The phonetic codes of the given names and surnames of each person
+    (main_id), to find spelling variants of names without looking at all
+    characteristic parts (see geneaprove.utils.phonetic and
+    geneaprove.sql.phonetic).
+    """
+
+    ALGORITHMS = (
+        ("soundex", "Soundex"),
+        ("daitch_mokotoff", "Daitch-Mokotoff"),
+        ("french", "French (Soundex2)"),
+    )
+
+    main_id: int
+    main = models.ForeignKey(
+        Persona, on_delete=models.CASCADE, related_name="+")
+    algorithm = models.CharField(max_length=20, choices=ALGORITHMS)
+    code = models.CharField(max_length=10)
+
+    class Meta:
+        """Meta data for the model"""
+        db_table = "person_phonetic"
+        indexes = [
+            models.Index(
+                fields=["algorithm", "code", "main"],
+                name="person_phonetic_code"),
+        ]
+
+
+class Duplicate_Candidate(GeneaProveModel):
+    """
+    A pair of persons (main_id) that might be the same, as found by
+    geneaprove.sql.duplicates. The table is recomputed as a whole, with rows
+    inserted by decreasing score, so that the id gives their order.
+    """
+
+    person1_id: int
+    person1 = models.ForeignKey(
+        Persona, on_delete=models.CASCADE, related_name="+")
+
+    person2_id: int
+    person2 = models.ForeignKey(
+        Persona, on_delete=models.CASCADE, related_name="+")
+
+    score = models.IntegerField(
+        help_text="The higher, the more likely the persons are the same")
+
+    class Meta:
+        """Meta data for the model"""
+        db_table = "duplicate_candidate"
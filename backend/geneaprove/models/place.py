@@ -1,5 +1,6 @@
 from django.db import models
-from .base import GeneaProveModel, compute_sort_date, Part_Type
+from .base import (
+    GeneaProveModel, compute_sort_date, compute_julian_days, Part_Type)
 
 
 class Place(GeneaProveModel):
@@ -18,6 +19,13 @@ class Place(GeneaProveModel):
     date_sort = models.CharField(
         max_length=100, null=True,
         help_text="Date parsed automatically")
+    earliest_jd = models.IntegerField(
+        null=True, db_index=True,
+        help_text="First julian day covered by the date, computed from"
+        " date, for comparisons in the database")
+    latest_jd = models.IntegerField(
+        null=True, db_index=True,
+        help_text="Last julian day covered by the date")
 
     parent_place = models.ForeignKey(
         'self', null=True,
@@ -41,6 +49,7 @@ class Place(GeneaProveModel):
 
     def save(self, **kwargs):
         self.date_sort = compute_sort_date(self.date)
+        self.earliest_jd, self.latest_jd = compute_julian_days(self.date)
         super().save(**kwargs)
 
 
@@ -1,7 +1,8 @@
 from django.db import models
 import django.utils.timezone
 
-from .base import GeneaProveModel, Part_Type
+from .base import (
+    GeneaProveModel, Part_Type, compute_sort_date, compute_julian_days)
 from .place import Place
 from .repository import Repository
 from .researcher import Researcher
@@ -46,6 +47,13 @@ class Source(GeneaProveModel):
     subject_date_sort = models.CharField(
         max_length=100, null=True,
         help_text="Date parsed automatically")
+    subject_earliest_jd = models.IntegerField(
+        null=True, db_index=True,
+        help_text="First julian day covered by the subject date, computed"
+        " from subject_date, for comparisons in the database")
+    subject_latest_jd = models.IntegerField(
+        null=True, db_index=True,
+        help_text="Last julian day covered by the subject date")
     medium = models.TextField(
         null=True,
         help_text="""The type of the source, used to construct the citation.
@@ -72,6 +80,12 @@ documents the citation styles.""")
         """Meta data for the model"""
         db_table = "source"
 
+    def save(self, **kwargs):
+        self.subject_date_sort = compute_sort_date(self.subject_date)
+        self.subject_earliest_jd, self.subject_latest_jd = \
+            compute_julian_days(self.subject_date)
+        super().save(**kwargs)
+
     def to_json(self):
         return {
             "higher_source_id": self.higher_source_id,
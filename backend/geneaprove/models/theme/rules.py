@@ -2,6 +2,7 @@ import collections
 import datetime
 from geneaprove.models.persona import Persona
 from geneaprove.models.asserts import P2C, P2E, Assertion
+from geneaprove.utils.date import CalendarGregorian
 from .checks import Check_Success, Check_Exact, Check
 from .styles import Style
 from geneaprove.sql.personas import PersonSet, Relationship
@@ -336,11 +337,9 @@ class Ancestor(RuleChecker):
             decujus: int,
             precomputed: Precomputed,
             ):
-        ancestors = personset.get_folks(
+        precomputed[self.id] = set(personset.count_folks(
             relationship=Relationship.ANCESTORS,
-            person_id=decujus if self.decujus < 0 else self.decujus)
-        precomputed[self.id] = set(   # Do not insert the decujus himself
-            a.main_id for a in ancestors if a.generation != 0)
+            person_id=decujus if self.decujus < 0 else self.decujus))
 
     def initial(
             self,
@@ -373,11 +372,9 @@ class Descendant(RuleChecker):
             decujus: int,
             precomputed: Precomputed,
             ):
-        desc = personset.get_folks(
+        precomputed[self.id] = set(personset.count_folks(
             relationship=Relationship.DESCENDANTS,
-            person_id=decujus if self.decujus < 0 else self.decujus)
-        precomputed[self.id] = set(   # Do not insert the decujus himself
-            a.main_id for a in desc if a.generation != 0)
+            person_id=decujus if self.decujus < 0 else self.decujus))
 
     def initial(
             self,
@@ -425,19 +422,12 @@ class Implex(RuleChecker):
         """
         count: Dict[int, int] = collections.defaultdict(int)
 
-        ancestors = personset.get_folks(
-            relationship=Relationship.ANCESTORS,
-            person_id=decujus if self.decujus < 0 else self.decujus)
-        for a in ancestors:
-            if a.generation != 0:
-                count[a.main_id] += 1
-
-        desc = personset.get_folks(
-            relationship=Relationship.DESCENDANTS,
-            person_id=decujus if self.decujus < 0 else self.decujus)
-        for a in desc:
-            if a.generation != 0:
-                count[a.main_id] += 1
+        for relationship in (Relationship.ANCESTORS, Relationship.DESCENDANTS):
+            for main_id, c in personset.count_folks(
+                    relationship=relationship,
+                    person_id=decujus if self.decujus < 0 else self.decujus,
+                    ).items():
+                count[main_id] += c
 
         precomputed[self.id] = count
 
@@ -565,13 +555,14 @@ class Event(RuleChecker):
         birth = births.get(person.main_id, None)
 
         if self.age and birth:
-            if birth[0] and assertion.event.date_sort:
-                try:
-                    year2 = int(assertion.event.date_sort[0:4])
-                    if not self.age.match(year2 - birth[0]):
-                        return
-                except Exception:
-                    print('Cannot parse date_sort for event', assertion)
+            if (
+                    birth[0]
+                    and assertion.event.date_sort
+                    and assertion.event.earliest_jd is not None
+               ):
+                year2 = CalendarGregorian().components(
+                    assertion.event.earliest_jd)[0]
+                if not self.age.match(year2 - birth[0]):
                     return
             else:
                 return
@@ -0,0 +1,171 @@
+"""
+An optional index of all ancestors of each person (see models.Ancestry).
+
+Walking the tree of a person with a recursive query over parent_child
+gets slow for deep trees, in particular when there is a lot of implex
+since the same ancestors are reached again and again. The ancestry table
+stores the transitive closure instead, so that "all ancestors of X up to N
+generations" is a single range query on an index.
+
+The table can grow large (one row per person and ancestor), so it is only
+maintained when settings.GENEAPROVE_ANCESTRY_INDEX is set. After enabling
+it on an existing database, run `./manage.py ancestry` to fill it.
+"""
+
+import collections
+import logging
+import django.db
+from django.conf import settings
+from typing import Dict, Iterable, List, Set, Tuple
+from .sqlsets import SQLSet
+
+logger = logging.getLogger(__name__)
+
+# Path counts grow exponentially with implex, but must fit in the database
+MAX_PATH_COUNT = 2 ** 62
+
+# For each ancestor: (min_generation, path_count)
+Ancestors = Dict[int, Tuple[int, int]]
+
+
+def enabled() -> bool:
+    """
+    Whether the ancestry table is maintained, and can be used in queries
+    """
+    return getattr(settings, 'GENEAPROVE_ANCESTRY_INDEX', False)
+
+
+def _ids(chunk: Iterable[int]) -> str:
+    return ','.join(f"{n:d}" for n in chunk)
+
+
+def _descendants(cur, main_ids: Set[int]) -> Set[int]:
+    """
+    All descendants of the persons, as found in the parent_child table
+    (not the ancestry table, which might not be up-to-date).
+    This is not a recursive query, to handle cycles in the data.
+    """
+    sql = SQLSet()
+    result: Set[int] = set()
+    todo = main_ids
+    while todo:
+        found: Set[int] = set()
+        for chunk in sql.sql_split(todo):
+            cur.execute(
+                "SELECT DISTINCT child_main_id FROM parent_child "
+                f"WHERE parent_main_id IN ({_ids(chunk)})")
+            found.update(row[0] for row in cur)
+        todo = found - result
+        result |= todo
+    return result
+
+
+def _compute(cur, persons: Set[int]) -> None:
+    """
+    Recompute the ancestors of all `persons`. Their current rows must
+    have been deleted, and the rows of other persons must be up-to-date.
+    Each person's ancestors are computed from those of its parents, so the
+    persons are processed parents first.
+    """
+    sql = SQLSet()
+    parents: Dict[int, List[int]] = collections.defaultdict(list)
+    children: Dict[int, List[int]] = collections.defaultdict(list)
+    for chunk in sql.sql_split(persons):
+        cur.execute(
+            "SELECT DISTINCT child_main_id, parent_main_id FROM parent_child "
+            f"WHERE child_main_id IN ({_ids(chunk)})")
+        for child, parent in cur:
+            parents[child].append(parent)
+            if parent in persons:
+                children[parent].append(child)
+
+    # Ancestors of the parents that are not recomputed
+    ancestors: Dict[int, Ancestors] = collections.defaultdict(dict)
+    known = {p for pa in parents.values() for p in pa} - persons
+    for chunk in sql.sql_split(known):
+        cur.execute(
+            "SELECT descendant_id, ancestor_id, min_generation, path_count "
+            f"FROM ancestry WHERE descendant_id IN ({_ids(chunk)})")
+        for desc, anc, gen, count in cur:
+            ancestors[desc][anc] = (gen, count)
+
+    # Topological sort: a person is processed once all its parents have
+    # been
+    waiting = {
+        p: sum(1 for pa in parents[p] if pa in persons) for p in persons}
+    ready = [p for p, count in waiting.items() if count == 0]
+    rows: List[Tuple[int, int, int, int]] = []
+
+    while ready:
+        person = ready.pop()
+        result: Ancestors = {}
+        for parent in parents[person]:
+            for anc, (gen, count) in ((parent, (0, 1)),
+                                      *ancestors[parent].items()):
+                previous = result.get(anc)
+                if previous is None:
+                    result[anc] = (gen + 1, count)
+                else:
+                    result[anc] = (
+                        min(previous[0], gen + 1),
+                        min(previous[1] + count, MAX_PATH_COUNT))
+
+        ancestors[person] = result
+        rows.extend(
+            (anc, person, gen, count)
+            for anc, (gen, count) in result.items())
+
+        for child in children[person]:
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                ready.append(child)
+
+    cycles = [p for p, count in waiting.items() if count > 0]
+    if cycles:
+        logger.warning(
+            'Persons are their own ancestors, not indexed: %s', cycles)
+
+    cur.executemany(
+        "INSERT INTO ancestry "
+        "(ancestor_id, descendant_id, min_generation, path_count) "
+        "VALUES (%s, %s, %s, %s)",
+        rows)
+
+
+def update_ancestry(main_ids: Iterable[int]) -> None:
+    """
+    Recompute the ancestors of the given persons (main_id) and all their
+    descendants. This must be called whenever parent_child is modified for
+    those persons, either as parent or child (see
+    PersonSet.update_parent_child).
+    """
+    if not enabled():
+        return
+
+    sql = SQLSet()
+    ids = set(main_ids)
+    with django.db.connection.cursor() as cur:
+        # The descendants before the change (from the ancestry table), and
+        # after the change (from parent_child)
+        persons = ids | _descendants(cur, ids)
+        for chunk in sql.sql_split(ids):
+            cur.execute(
+                "SELECT descendant_id FROM ancestry "
+                f"WHERE ancestor_id IN ({_ids(chunk)})")
+            persons.update(row[0] for row in cur)
+
+        for chunk in sql.sql_split(persons):
+            cur.execute(
+                f"DELETE FROM ancestry WHERE descendant_id IN ({_ids(chunk)})")
+
+        _compute(cur, persons)
+
+
+def rebuild_ancestry() -> None:
+    """
+    Recompute the whole ancestry table
+    """
+    with django.db.connection.cursor() as cur:
+        cur.execute("DELETE FROM ancestry")
+        cur.execute("SELECT DISTINCT child_main_id FROM parent_child")
+        _compute(cur, set(row[0] for row in cur))
@@ -85,6 +85,32 @@ class AssertList(SQLSet, AssertListProtocol):
         self._missing_places.update(places)
         self._missing_sources.update(sources)
 
+    def filter_dates(
+            self,
+            tables: Iterable[QuerySet],
+            date_from: Optional[str] = None,
+            date_to: Optional[str] = None,
+            ) -> List[QuerySet]:
+        """
+        Only keep the assertions whose event or characteristic has a date
+        that overlaps the range (see SQLSet.date_range).
+        Assertions without dates (P2P and P2G) are filtered out when a range
+        is given.
+        :param list tables: as for fetch_asserts_subset.
+        """
+        if not date_from and not date_to:
+            return list(tables)
+
+        result: List[QuerySet] = []
+        for queryset in tables:
+            if queryset.model == P2E:
+                result.append(self.date_range(
+                    queryset, date_from, date_to, prefix='event__'))
+            elif queryset.model == P2C:
+                result.append(self.date_range(
+                    queryset, date_from, date_to, prefix='characteristic__'))
+        return result
+
     def fetch_asserts_subset(
             self,
             tables: Iterable[QuerySet],
@@ -0,0 +1,53 @@
+"""
+Maintain the julian day columns (earliest_jd and latest_jd) of events,
+characteristics, places and sources.
+
+They are normally computed when the objects are saved (see
+models.base.compute_julian_days), but need to be filled for databases
+created before they existed.
+"""
+
+import django.db
+from typing import Dict, Tuple
+from ..utils.date import parse_dates
+from .sqlsets import SQLSet
+
+# For each table: the column with the date, and the prefix for the
+# columns with the julian days.
+TABLES: Dict[str, Tuple[str, str]] = {
+    'event': ('date', ''),
+    'characteristic': ('date', ''),
+    'place': ('date', ''),
+    'source': ('subject_date', 'subject_'),
+}
+
+# Number of rows updated in each batch
+BATCH_SIZE = 2000
+
+
+def backfill_julian_days() -> int:
+    """
+    Recompute the julian days (and sort dates) of all rows from their dates.
+    Returns the number of rows updated.
+    """
+    count = 0
+    sql = SQLSet()
+    with django.db.connection.cursor() as cur:
+        for table, (date_col, prefix) in TABLES.items():
+            cur.execute(f"SELECT id, {date_col} FROM {table}")
+            rows = cur.fetchall()
+            dates = parse_dates([date for _, date in rows])
+            values = [
+                (sort_date, earliest, latest, id)
+                for (id, _), sort_date, earliest, latest in zip(
+                    rows, dates.sort_dates,
+                    dates.earliest_julian_days, dates.latest_julian_days)
+            ]
+            for chunk in sql.sql_split(values, BATCH_SIZE):
+                cur.executemany(
+                    f"UPDATE {table} SET {prefix}date_sort=%s, "
+                    f"{prefix}earliest_jd=%s, {prefix}latest_jd=%s "
+                    "WHERE id=%s",
+                    chunk)
+            count += len(values)
+    return count
@@ -0,0 +1,313 @@
+"""
+Find persons that might be duplicates, and should be merged.
+
+Comparing every pair of persons does not scale (a million persons is half
+a trillion pairs), so persons are first grouped by "blocking keys": their
+surname (Soundex code) with either their birth or death decade, or one of
+the places of their events. Only persons that share at least one key are
+compared, which is typically a few pairs per person.
+
+The candidate pairs are then scored (by comparing their events and
+characteristics, see score()), possibly in several processes, and the best
+ones are stored in the duplicate_candidate table so that users can review
+them (see models.Duplicate_Candidate).
+"""
+
+import collections
+import concurrent.futures
+import django.db
+import logging
+import re
+from typing import (
+    Dict, Iterable, List, NamedTuple, Optional, Set, Tuple)
+from ..models.characteristic import Characteristic_Part_Type
+from ..utils import phonetic
+from .sqlsets import SQLSet
+
+logger = logging.getLogger(__name__)
+
+# Blocks with more persons than this are ignored: they correspond to very
+# common names, and would generate too many pairs to compare. Such persons
+# are usually also in smaller blocks (their other dates or places).
+MAX_BLOCK_SIZE = 500
+
+# Pairs with a lower score are not stored
+MIN_SCORE = 150
+
+# Pairs are only scored in several processes when there are more than this
+MIN_PARALLEL_PAIRS = 10000
+
+# Number of chunks per process, so that processes that finish early can
+# take on more work.
+CHUNKS_PER_PROCESS = 4
+
+# Characteristic parts that uniquely identify a person
+UID_PARTS = ('_UID', 'UID')
+
+
+class Event_Data(NamedTuple):
+    date: Optional[str]
+    date_sort: Optional[str]
+    place_id: Optional[int]
+
+
+class Char_Data(NamedTuple):
+    date: Optional[str]
+    place_id: Optional[int]
+    parts: Dict[str, str]    # gedcom tag (or name) of type -> lower value
+
+
+class Person_Data(NamedTuple):
+    """
+    What is needed to compare two persons. This is sent to other processes,
+    so only contains simple types.
+    """
+    events: Dict[Tuple[int, int], List[Event_Data]]  # (type, role) -> events
+    chars: Dict[str, List[Char_Data]]    # characteristic name -> details
+
+
+def _surname(value: str) -> str:
+    """
+    The surname in a SURN part. Names that were not split by the importer
+    store the whole gedcom name, as in "John /Smith/".
+    """
+    m = re.search(r'/([^/]*)/', value)
+    return m.group(1) if m else value
+
+
+def blocking_keys() -> Dict[int, Set[Tuple]]:
+    """
+    The blocking keys of each person (main_id)
+    """
+    surnames: Dict[int, Set[str]] = collections.defaultdict(set)
+    keys: Dict[int, Set[Tuple]] = collections.defaultdict(set)
+
+    with django.db.connection.cursor() as cur:
+        cur.execute(
+            "SELECT DISTINCT p.main_id, part.name "
+            "FROM persona p, p2c, assertion a, characteristic_part part "
+            "WHERE p2c.person_id=p.id "
+            "AND a.id=p2c.assertion_ptr_id "
+            "AND NOT a.disproved "
+            "AND part.characteristic_id=p2c.characteristic_id "
+            "AND part.type_id=%s",
+            [Characteristic_Part_Type.PK_surname])
+        for main_id, name in cur:
+            surnames[main_id].update(
+                phonetic.codes('soundex', _surname(name or '')))
+
+        cur.execute(
+            "SELECT main_id, birth_sort, death_sort FROM person_summary")
+        for main_id, birth, death in cur:
+            for kind, date in (('birth', birth), ('death', death)):
+                if date and date[:4].isdigit():
+                    decade = int(date[:4]) // 10
+                    keys[main_id].update(
+                        (kind, code, decade) for code in surnames[main_id])
+
+        cur.execute(
+            "SELECT DISTINCT p.main_id, e.place_id "
+            "FROM persona p, p2e, assertion a, event e "
+            "WHERE p2e.person_id=p.id "
+            "AND a.id=p2e.assertion_ptr_id "
+            "AND NOT a.disproved "
+            "AND e.id=p2e.event_id "
+            "AND e.place_id IS NOT NULL")
+        for main_id, place_id in cur:
+            keys[main_id].update(
+                ('place', code, place_id) for code in surnames[main_id])
+
+    return keys
+
+
+def candidate_pairs(keys: Dict[int, Set[Tuple]]) -> Set[Tuple[int, int]]:
+    """
+    All pairs of persons (smallest id first) that share a blocking key
+    """
+    blocks: Dict[Tuple, List[int]] = collections.defaultdict(list)
+    for main_id, person_keys in keys.items():
+        for k in person_keys:
+            blocks[k].append(main_id)
+
+    pairs: Set[Tuple[int, int]] = set()
+    for k, persons in blocks.items():
+        if len(persons) > MAX_BLOCK_SIZE:
+            logger.info('Ignoring block %s with %d persons', k, len(persons))
+            continue
+        persons.sort()
+        for i, p1 in enumerate(persons):
+            for p2 in persons[i + 1:]:
+                pairs.add((p1, p2))
+    return pairs
+
+
+def person_data(main_ids: Iterable[int]) -> Dict[int, Person_Data]:
+    """
+    The events and characteristics of the given persons
+    """
+    result: Dict[int, Person_Data] = {}
+
+    def get(main_id: int) -> Person_Data:
+        p = result.get(main_id)
+        if p is None:
+            p = result[main_id] = Person_Data(
+                events=collections.defaultdict(list),
+                chars=collections.defaultdict(list))
+        return p
+
+    sql = SQLSet()
+    with django.db.connection.cursor() as cur:
+        for in_ids, params in sql.in_clauses(main_ids):
+            cur.execute(
+                "SELECT p.main_id, e.type_id, p2e.role_id, e.date, "
+                "e.date_sort, e.place_id "
+                "FROM persona p, p2e, assertion a, event e "
+                "WHERE p2e.person_id=p.id "
+                "AND a.id=p2e.assertion_ptr_id "
+                "AND NOT a.disproved "
+                "AND e.id=p2e.event_id "
+                f"AND p.main_id {in_ids}",
+                params)
+            for main_id, type_id, role_id, date, date_sort, place_id in cur:
+                get(main_id).events[(type_id, role_id)].append(
+                    Event_Data(date, date_sort, place_id))
+
+            chars: Dict[int, Tuple[int, str, Char_Data]] = {}
+            cur.execute(
+                "SELECT p.main_id, c.id, c.name, c.date, c.place_id, "
+                "t.gedcom, t.name, part.name "
+                "FROM persona p, p2c, assertion a, characteristic c, "
+                "characteristic_part part, characteristic_part_type t "
+                "WHERE p2c.person_id=p.id "
+                "AND a.id=p2c.assertion_ptr_id "
+                "AND NOT a.disproved "
+                "AND c.id=p2c.characteristic_id "
+                "AND part.characteristic_id=c.id "
+                "AND t.id=part.type_id "
+                f"AND p.main_id {in_ids}",
+                params)
+            for (main_id, char_id, name, date, place_id,
+                    gedcom, type_name, value) in cur:
+                c = chars.get(char_id)
+                if c is None:
+                    c = chars[char_id] = (
+                        main_id, name, Char_Data(date, place_id, {}))
+                c[2].parts[gedcom or type_name] = (value or '').lower()
+
+            for main_id, name, char in chars.values():
+                get(main_id).chars[name].append(char)
+
+    return result
+
+
+def score(p1: Person_Data, p2: Person_Data) -> int:
+    """
+    How likely it is that the two persons are the same. Each similar event
+    and characteristic increases the score.
+    """
+    result = 0
+    place_score = 0   # If at least two events occurred in same place.
+    # This helps separate people from different cities
+
+    for r, events2 in p2.events.items():
+        for e2 in events2:
+            # Compare with similar events where the person plays the same
+            # role, and keep the best score
+            evt_score = 0
+            for e1 in p1.events.get(r, []):
+                tmp_score = 0
+                if e1.date_sort is None or e2.date_sort is None:
+                    # Both unknown, or only one is unknown and might be set
+                    # somewhere else
+                    tmp_score += 5
+                elif e1.date_sort == e2.date_sort:
+                    tmp_score += 20
+                    if e1.date == e2.date:
+                        # Further bonus since both dates are written exactly
+                        # the same (so were not modified if we have an
+                        # export, modif, import cycle)
+                        tmp_score += 20
+
+                if e1.place_id is not None and e1.place_id == e2.place_id:
+                    place_score = 20
+
+                evt_score = max(evt_score, tmp_score)
+            result += evt_score
+
+    # Also compare characteristics (this also compares names). UIDs are
+    # worth more.
+    for name, chars2 in p2.chars.items():
+        for c2 in chars2:
+            for c1 in p1.chars.get(name, []):
+                if c1.place_id is not None and c1.place_id == c2.place_id:
+                    place_score = 20
+                if c1.date is not None and c1.date == c2.date:
+                    result += 20
+                for tag, value in c2.parts.items():
+                    if c1.parts.get(tag) == value:
+                        result += 20
+                        if tag in UID_PARTS:
+                            result += 300
+
+    return result + place_score
+
+
+def _score_chunk(
+        pairs: List[Tuple[int, int]],
+        persons: Dict[int, Person_Data],
+        min_score: int,
+        ) -> List[Tuple[int, int, int]]:
+    """
+    Score pairs of persons, and return those above min_score.
+    This might run in a separate process.
+    """
+    result = []
+    for id1, id2 in pairs:
+        p1 = persons.get(id1)
+        p2 = persons.get(id2)
+        if p1 is not None and p2 is not None:
+            s = score(p1, p2)
+            if s >= min_score:
+                result.append((id1, id2, s))
+    return result
+
+
+def find_duplicates(processes: int = 1, min_score: int = MIN_SCORE) -> int:
+    """
+    Find all pairs of persons that might be duplicates, and store them in
+    the duplicate_candidate table (replacing its previous contents).
+    Returns the number of pairs stored.
+    :param processes: if greater than 1, large numbers of pairs are scored
+       in that many processes.
+    """
+    pairs = sorted(candidate_pairs(blocking_keys()))
+    persons = person_data({p for pair in pairs for p in pair})
+    logger.info('Comparing %d pairs of persons', len(pairs))
+
+    if processes > 1 and len(pairs) > MIN_PARALLEL_PAIRS:
+        size = -(-len(pairs) // (processes * CHUNKS_PER_PROCESS))
+        chunks = [pairs[k:k + size] for k in range(0, len(pairs), size)]
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(
+                _score_chunk,
+                chunks,
+                [{p: persons[p] for pair in c for p in pair if p in persons}
+                 for c in chunks],
+                [min_score] * len(chunks),
+            ))
+    else:
+        results = [_score_chunk(pairs, persons, min_score)]
+
+    # Rows are inserted by decreasing score, so that the ids can be used to
+    # sort them.
+    found = sorted(
+        (r for chunk in results for r in chunk),
+        key=lambda r: (-r[2], r[0], r[1]))
+
+    with django.db.connection.cursor() as cur:
+        cur.execute("DELETE FROM duplicate_candidate")
+        cur.executemany(
+            "INSERT INTO duplicate_candidate (person1_id, person2_id, score) "
+            "VALUES (%s, %s, %s)",
+            found)
+    return len(found)
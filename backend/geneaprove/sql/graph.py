@@ -0,0 +1,366 @@
+"""
+A process-wide, in-memory copy of the parent/child graph.
+
+Pedigree, stats, quilts and the theme rules all need to walk the tree of a
+person. Rather than querying the database every time, the whole
+parent_child table is loaded once, in compact arrays (as in the CSR format
+for sparse matrices): the parents of the person keys[i] are
+    targets[offsets[i]:offsets[i + 1]]
+and likewise for the children.
+
+Whenever parent_child is modified, changed() stores a new random token in
+the config table, as part of the same transaction. get_graph() compares it
+with the token of the graph in memory, and reloads the graph when they
+differ. So changes done by other processes (for instance
+`./manage.py import`) are taken into account, and a rolled back
+transaction does not leave an obsolete graph. While serving a request,
+the token is only checked the first time the graph is needed.
+Changes done by the current process are instead applied to the graph in
+memory once the transaction is committed, so that editing a person does
+not require reloading the whole graph.
+"""
+
+import bisect
+import collections
+import random
+import threading
+from array import array
+import django.db
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# When more persons than this have been patched since the graph was loaded,
+# the changes are merged into the compact arrays.
+MAX_OVERLAY_SIZE = 10000
+
+
+def enabled() -> bool:
+    """
+    Whether the graph is kept in memory
+    """
+    return getattr(settings, 'GENEAPROVE_GRAPH_CACHE', False)
+
+
+class _Adjacency:
+    """
+    For each person, the list of its parents (or children)
+    """
+
+    def __init__(self, edges: Iterable[Tuple[int, int]]):
+        """
+        :param edges: (person, folk) tuples, sorted and without duplicates
+        """
+        self.keys = array('q')
+        self.offsets = array('l')
+        self.targets = array('q')
+
+        previous = None
+        for source, target in edges:
+            if source != previous:
+                self.keys.append(source)
+                self.offsets.append(len(self.targets))
+                previous = source
+            self.targets.append(target)
+        self.offsets.append(len(self.targets))
+
+    def get(self, main_id: int) -> array:
+        i = bisect.bisect_left(self.keys, main_id)
+        if i < len(self.keys) and self.keys[i] == main_id:
+            return self.targets[self.offsets[i]:self.offsets[i + 1]]
+        return array('q')
+
+
+class Genealogy_Graph:
+    """
+    The parent/child relationships between persons (main_id)
+    """
+
+    def __init__(
+            self,
+            parents: Iterable[Tuple[int, int]],
+            children: Iterable[Tuple[int, int]],
+            version: int = 0,
+            ):
+        """
+        :param parents: (child, parent) tuples, sorted and without
+           duplicates.
+        :param children: the same relationships as (parent, child) tuples,
+           also sorted.
+        """
+        self.version = version
+        self._parents = _Adjacency(parents)
+        self._children = _Adjacency(children)
+
+        # Changes applied since the graph was loaded: the new list of parents
+        # (or children) for some persons
+        self._parents_overlay: Dict[int, List[int]] = {}
+        self._children_overlay: Dict[int, List[int]] = {}
+
+    @staticmethod
+    def from_edges(
+            edges: Iterable[Tuple[int, int]],
+            version: int = 0,
+            ) -> "Genealogy_Graph":
+        """
+        Build a graph from (child, parent) tuples, in any order
+        """
+        unique = set(edges)
+        return Genealogy_Graph(
+            sorted(unique), sorted((p, c) for c, p in unique), version)
+
+    def parents(self, main_id: int) -> List[int]:
+        return self.folks(main_id, ancestors=True)
+
+    def children(self, main_id: int) -> List[int]:
+        return self.folks(main_id, ancestors=False)
+
+    def folks(self, main_id: int, ancestors: bool) -> List[int]:
+        """
+        The parents (or children) of a person
+        """
+        if ancestors:
+            overlay, adjacency = self._parents_overlay, self._parents
+        else:
+            overlay, adjacency = self._children_overlay, self._children
+
+        result = overlay.get(main_id)
+        if result is None:
+            return adjacency.get(main_id).tolist()
+        return result
+
+    def edges(self) -> List[Tuple[int, int]]:
+        """
+        All (child, parent) relationships, sorted
+        """
+        persons = set(self._parents.keys).union(self._parents_overlay)
+        return [
+            (child, parent)
+            for child in sorted(persons)
+            for parent in self.parents(child)
+        ]
+
+    def generations(
+            self,
+            main_id: int,
+            ancestors: bool,
+            max_depth: int = None,
+            ) -> Dict[int, int]:
+        """
+        All ancestors (or descendants) of a person, and the generation at
+        which they first appear (1 for parents). This includes the person
+        itself, at generation 0.
+        Since this is a breadth-first search, cycles in the data are not an
+        issue.
+        """
+        result = {main_id: 0}
+        current = [main_id]
+        gen = 0
+        while current and (max_depth is None or gen < max_depth):
+            gen += 1
+            next_gen = []
+            for person in current:
+                for folk in self.folks(person, ancestors):
+                    if folk not in result:
+                        result[folk] = gen
+                        next_gen.append(folk)
+            current = next_gen
+        return result
+
+    def path_counts(self, main_id: int, ancestors: bool) -> Dict[int, int]:
+        """
+        All ancestors (or descendants) of a person, not including itself,
+        with the number of distinct paths that lead to them (more than one
+        when there is implex).
+        Persons that are part of a cycle are not returned.
+        """
+        # The subgraph reachable from main_id, and for each person the
+        # number of edges leading to it
+        folks: Dict[int, List[int]] = {}
+        incoming: Dict[int, int] = collections.defaultdict(int)
+        todo = [main_id]
+        while todo:
+            person = todo.pop()
+            folks[person] = self.folks(person, ancestors)
+            for folk in folks[person]:
+                incoming[folk] += 1
+                if folk not in folks:
+                    folks[folk] = []   # visited
+                    todo.append(folk)
+
+        # Propagate the counts in topological order
+        counts: Dict[int, int] = collections.defaultdict(int)
+        counts[main_id] = 1
+        ready = [main_id] if incoming[main_id] == 0 else []
+        result: Dict[int, int] = {}
+        while ready:
+            person = ready.pop()
+            if person != main_id:
+                result[person] = counts[person]
+            for folk in folks[person]:
+                counts[folk] += counts[person]
+                incoming[folk] -= 1
+                if incoming[folk] == 0:
+                    ready.append(folk)
+
+        return result
+
+    def patched(
+            self,
+            main_ids: Set[int],
+            edges: Iterable[Tuple[int, int]],
+            version: int,
+            ) -> "Genealogy_Graph":
+        """
+        A copy of self after all relationships that involve `main_ids` have
+        been replaced with `edges`, as done by PersonSet.update_parent_child.
+        The arrays are shared with self.
+        """
+        result = Genealogy_Graph.__new__(Genealogy_Graph)
+        result.version = version
+        result._parents = self._parents
+        result._children = self._children
+        result._parents_overlay = dict(self._parents_overlay)
+        result._children_overlay = dict(self._children_overlay)
+
+        edges = set(edges)
+        for ancestors, overlay in ((True, result._parents_overlay),
+                                   (False, result._children_overlay)):
+            new: Dict[int, List[int]] = collections.defaultdict(list)
+            for child, parent in edges:
+                if ancestors:
+                    new[child].append(parent)
+                else:
+                    new[parent].append(child)
+
+            # All persons whose list might have changed
+            touched = set(main_ids).union(new)
+            for m in main_ids:
+                touched.update(self.folks(m, not ancestors))
+
+            for person in touched:
+                if person in main_ids:
+                    overlay[person] = sorted(new[person])
+                else:
+                    overlay[person] = sorted(
+                        [f for f in self.folks(person, ancestors)
+                         if f not in main_ids]
+                        + new[person])
+
+        # Do not let the overlays grow forever
+        if (len(result._parents_overlay) + len(result._children_overlay)
+                > MAX_OVERLAY_SIZE):
+            result = Genealogy_Graph.from_edges(result.edges(), version)
+
+        return result
+
+
+_graph: Optional[Genealogy_Graph] = None
+_lock = threading.Lock()
+
+# The graph already checked during the current request, if any
+_request = threading.local()
+
+
+def _start_request(**kwargs) -> None:
+    _request.active = True
+    _request.graph = None
+
+
+def _finish_request(**kwargs) -> None:
+    _request.active = False
+    _request.graph = None
+
+
+request_started.connect(_start_request)
+request_finished.connect(_finish_request)
+
+
+def _current_version(cur) -> int:
+    cur.execute("SELECT graph_version FROM config")
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def get_graph() -> Genealogy_Graph:
+    """
+    The graph, loaded from the database if needed.
+    """
+    in_request = getattr(_request, 'active', False)
+    if in_request and _request.graph is not None:
+        return _request.graph
+
+    graph = _load_graph()
+    if in_request:
+        _request.graph = graph
+    return graph
+
+
+def _load_graph() -> Genealogy_Graph:
+    """
+    Check the version of the graph in memory, and reload it if needed
+    """
+    global _graph
+
+    with django.db.connection.cursor() as cur:
+        version = _current_version(cur)
+        graph = _graph
+        if graph is not None and graph.version == version:
+            return graph
+
+        with _lock:
+            if _graph is not None and _graph.version == version:
+                return _graph
+
+            # Let the database sort, this is much faster than python
+            cur.execute(
+                "SELECT DISTINCT child_main_id, parent_main_id "
+                "FROM parent_child ORDER BY 1, 2")
+            parents = cur.fetchall()
+            cur.execute(
+                "SELECT DISTINCT parent_main_id, child_main_id "
+                "FROM parent_child ORDER BY 1, 2")
+            _graph = Genealogy_Graph(parents, cur.fetchall(), version)
+            return _graph
+
+
+def changed(
+        main_ids: Iterable[int] = None,
+        edges: Iterable[Tuple[int, int]] = None,
+        ) -> None:
+    """
+    Must be called whenever the relationships in the parent_child table
+    are modified, so that all processes reload the graph.
+    :param main_ids: if specified, only the relationships that involve
+       those persons were modified, and `edges` are the new (child, parent)
+       relationships for them. This process will then patch its graph
+       instead of reloading it.
+       Nothing is done when the graph is not kept in memory.
+    """
+    if not enabled():
+        return
+
+    # The rest of the request must see the new relationships
+    _request.graph = None
+
+    version = random.getrandbits(62) + 1
+    with django.db.connection.cursor() as cur:
+        previous = _current_version(cur)
+        cur.execute("UPDATE config SET graph_version=%s", [version])
+        if cur.rowcount == 0:
+            cur.execute(
+                "INSERT INTO config (schema_version, graph_version) "
+                "VALUES (1, %s)",
+                [version])
+
+    if main_ids is not None and edges is not None:
+        ids = set(main_ids)
+        edges = list(edges)
+
+        def patch():
+            global _graph
+            with _lock:
+                if _graph is not None and _graph.version == previous:
+                    _graph = _graph.patched(ids, edges, version)
+
+        django.db.transaction.on_commit(patch)
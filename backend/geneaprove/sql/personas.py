@@ -6,6 +6,7 @@ import collections
 from enum import Enum
 import django.db.transaction
 from django.db.models import F, Q, QuerySet
+from django.db.models.expressions import RawSQL
 import logging
 from ..models.asserts import P2E, P2C, P2P, P2G, P2P_Type
 from ..models.persona import Persona
@@ -13,7 +14,9 @@ from ..models.event import Event_Type, Event_Type_Role
 from ..models.characteristic import Characteristic_Part_Type
 from ..models.theme.styles import Style
 from .asserts import AssertList
-from .sqlsets import SQLSet
+from .sqlsets import SQLSet, CHUNK_SIZE
+from . import ancestry, graph, phonetic, search, summary
+from ..utils.union_find import Union_Find
 from typing import (
     Dict, List, NamedTuple, Iterable, Optional, Literal, Tuple, Any, Protocol,
     Set)
@@ -56,20 +59,32 @@ class StylesProtocol(Protocol):
 
 
 class Relationship(Enum):
-    ANCESTORS = ('ancestors', 'parents', 'parent', ('p2e', 'p2'))
-    DESCENDANTS = ('descendants', 'children', 'child', ('p2', 'p2e'))
+    ANCESTORS = ('ancestors', 'parents', 'parent',
+                 ('child_main_id', 'parent_main_id'))
+    DESCENDANTS = ('descendants', 'children', 'child',
+                   ('parent_main_id', 'child_main_id'))
 
     def __init__(
             self,
             relations: Literal["ancestors", "descendants"],
             group: Literal["parents", "children"],
             individual: Literal["parent", "child"],
-            query_tables: Tuple[str, ...],
+            columns: Tuple[str, str],
             ):
         self.relations = relations
         self.group = group
         self.individual = individual
-        self.query_tables = query_tables
+        self.columns = columns   # columns of parent_child: (from, to)
+
+    @property
+    def ancestry_columns(self) -> Tuple[str, str]:
+        """
+        Columns of the ancestry table: (person, relatives)
+        """
+        if self == Relationship.ANCESTORS:
+            return ('descendant_id', 'ancestor_id')
+        else:
+            return ('ancestor_id', 'descendant_id')
 
 
 class PersonSet(SQLSet):
@@ -83,6 +98,7 @@ class PersonSet(SQLSet):
         self.asserts = AssertList()  # All Assertions used to compute persons
         self.persons: Dict[int, Persona] = collections.OrderedDict()
         self.styles = styles
+        self.after: Optional[str] = None   # cursor for the next page
 
         # main_id -> parents and children
         self.layout: Dict[int, Parent_And_Children] = collections.defaultdict(
@@ -128,7 +144,9 @@ class PersonSet(SQLSet):
             namefilter: str = None,
             offset: int = None,
             limit: int = None,
-            compute_sex=True,
+            after: str = None,
+            soundslike: str = None,
+            algorithm: str = 'soundex',
             ) -> None:
         """
         Append to the list all persons for which one of the base personas has
@@ -139,65 +157,88 @@ class PersonSet(SQLSet):
               which could take a long time.
 
         The additional parameters can be used to restrict that subset to
-        [offset:offset+limit]
+        [offset:offset+limit], or to the `limit` persons after the cursor
+        `after` (as returned in self.after by a previous call). The latter
+        is much faster when far into the list.
+        `soundslike` only keeps persons with names that sound like each of
+        its words, using one of the algorithms in utils.phonetic.
+        The name, sex and main dates of the persons are read from the
+        person_summary table.
         """
         assert ids is None or isinstance(ids, collections.abc.Iterable)
 
-        # This query is much slower than the one below, though it returns a
-        # real manager that we can further manipulate.
-        #     .annotate(sex=RawSQL(
-        #         "SELECT c.name FROM characteristic_part c, p2c, persona p "
-        #         "WHERE c.characteristic_id=p2c.characteristic_id "
-        #         "AND c.type_id=%s "
-        #         "AND p2c.person_id=p.id "
-        #         "AND p.main_id=persona.id",
-        #         (Characteristic_Part_Type.PK_sex,)))
-        #
-        # ??? Doesn't work, second instance of persona disappears
-        #     .extra(
-        #        select={'sex': 'characteristic_part.name', 'foo': 't2.id'},
-        #         tables=['characteristic_part', 'p2c', 'persona'],
-        #         where=["characteristic_part.characteristic_id="
-        #                "p2c.characteristic_id",
-        #                "characteristic_part.type_id=%s",
-        #                "p2c.person_id=t2.id",
-        #                "t2.main_id=persona.id"],
-        #         params=(Characteristic_Part_Type.PK_sex,))
-
+        args: List[Any] = []
         if ids:
             # Convert from ids to main ids
-            ids_str = ','.join(f"{n:d}" for n in ids)
-            id_to_main = (
+            ids = list(ids)
+            subquery = self.values_subquery(ids)
+            if subquery is not None:
+                ids_str, args = subquery
+            else:
+                ids_str = ','.join(f"{n:d}" for n in ids)
+            tables = (
+                "persona LEFT JOIN person_summary s ON s.main_id=persona.id")
+            where = (
                 f"persona.id IN ("
                 f"SELECT p.main_id FROM persona p WHERE p.id IN ({ids_str}))")
+            order_id = "persona.id"
+            # Persons might not have a summary yet
+            sort_name = "coalesce(s.sort_name, '')"
         else:
-            id_to_main = "persona.main_id=persona.id"
+            # All main personas have a summary. Reading from it first lets
+            # the database use its index for sorting.
+            tables = "person_summary s JOIN persona ON persona.id=s.main_id"
+            where = "1=1"
+            order_id = "s.main_id"
+            sort_name = "s.sort_name"
 
-        args = []
         if namefilter:
-            args.append(f"%{namefilter}%")
-
-        if compute_sex:
-            sex_field = "sub1.sex"
-            sex_query = (
-                f"LEFT JOIN ({self._query_get_sex()}) sub1 ON "
-                f"sub1.main_id=persona.id "
-            )
-        else:
-            sex_field = "'?' as sex"
-            sex_query = ""
+            if search.enabled():
+                subquery = search.match_subquery('person', namefilter)
+                if subquery is None:
+                    where += " AND 1=0"
+                else:
+                    where += f" AND persona.id IN ({subquery[0]})"
+                    args.extend(subquery[1])
+            else:
+                where += " AND s.sort_name LIKE %s"
+                args.append(f"%{namefilter.lower()}%")
+
+        if soundslike:
+            subquery = phonetic.match_subquery(algorithm, soundslike)
+            if subquery is not None:
+                where += f" AND persona.id IN ({subquery[0]})"
+                args.extend(subquery[1])
+
+        if after:
+            after_name, main_id = self.decode_cursor(after, 2)
+            where += (
+                f" AND ({sort_name} > %s"
+                f" OR ({sort_name} = %s AND {order_id} > %s))")
+            args.extend([after_name, after_name, main_id])
 
         pm = Persona.objects.raw(
-            f"SELECT persona.*, {sex_field} "
-            f"FROM persona {sex_query}"
-            f"WHERE {id_to_main} " +
-            #  ("AND persona.name LIKE %s " if namefilter else "") +
-            "ORDER BY lower(persona.name) ASC " +
+            "SELECT persona.*, s.display_name, s.sex, "
+            f"{sort_name} AS sort_name, "
+            's.birth_sort AS "birthISODate", '
+            's.death_sort AS "deathISODate", '
+            's.marriage_sort AS "marriageISODate" '
+            f"FROM {tables} "
+            f"WHERE {where} "
+            f"ORDER BY {sort_name} ASC, {order_id} " +
             (f"LIMIT {int(limit)} " if limit is not None else "") +
             (f"OFFSET {int(offset)} " if offset else ""),
             args)
 
-        self.persons.update({p.id: p for p in pm.iterator()})
+        persons = list(pm.iterator())
+        self.persons.update({p.id: p for p in persons})
+
+        if limit is not None:
+            self.after = (
+                self.encode_cursor(persons[-1].sort_name, persons[-1].id)
+                if persons and len(persons) == int(limit)
+                else None
+            )
 
         # Do not fetch them again
         self.asserts.add_known(persons=self.persons.values())
@@ -209,11 +250,12 @@ class PersonSet(SQLSet):
         """
         return (
             "SELECT p.main_id, c.name AS sex "
-            "FROM characteristic_part c, p2c, persona p "
+            "FROM characteristic_part c, p2c, assertion a, persona p "
             "WHERE c.characteristic_id=p2c.characteristic_id "
             f"AND c.type_id={Characteristic_Part_Type.PK_sex} "
             "AND p2c.person_id=p.id "
-            "AND NOT p2c.disproved "
+            "AND a.id=p2c.assertion_ptr_id "
+            "AND NOT a.disproved "
             "GROUP BY p.main_id, c.name"
         )
 
@@ -223,20 +265,11 @@ class PersonSet(SQLSet):
         A query that computes the list of direct parents or children
         for a person
         """
+        from_col, to_col = relationship.columns
         return (
-            f"SELECT DISTINCT persona.main_id,"
-            f" pp.main_id as {relationship.individual} "
-            "FROM persona, p2e, event, p2e p2, persona pp "
-            "WHERE event.id=p2e.event_id "
-            f"AND {relationship.query_tables[0]}.role_id="
-            f" {Event_Type_Role.PK_principal} "
-            f"AND event.type_id={Event_Type.PK_birth} "
-            f"AND {relationship.query_tables[1]}.role_id IN"
-            f" ({Event_Type_Role.PK_birth__father}, "
-            f"  {Event_Type_Role.PK_birth__mother}) "
-            "AND p2e.person_id=persona.id "
-            "AND p2.event_id=event.id "
-            "AND p2.person_id=pp.id"
+            f"SELECT DISTINCT {from_col} AS main_id,"
+            f" {to_col} AS {relationship.individual} "
+            "FROM parent_child"
         )
 
     def get_folks(
@@ -248,10 +281,22 @@ class PersonSet(SQLSet):
             ) -> List[FolkLore]:
         """
         :returntype: list of FolkLore
-           This includes person_id itself, at generation 0
+           This includes person_id itself, at generation 0. Each person is
+           returned only once, at the closest generation, whether the tree
+           is read from the in-memory graph, the ancestry index or the
+           parent_child table.
         """
         assert isinstance(person_id, int)
 
+        if graph.enabled():
+            return self._get_folks_from_graph(
+                relationship, person_id, max_depth, skip)
+        elif ancestry.enabled():
+            return self._get_folks_from_index(
+                relationship, person_id, max_depth, skip)
+
+        from_col, to_col = relationship.columns
+
         with django.db.connection.cursor() as cur:
             pid = self.cast(person_id, 'bigint')
             zero = self.cast(0, 'bigint')  # ??? do we really need to cast
@@ -261,47 +306,161 @@ class PersonSet(SQLSet):
                 if max_depth
                 else ""
             )
-            sk = (
-                f"WHERE {relationship.relations}.generation>{skip} "
-                if skip
-                else ""
-            )
+            folks_col = self.group_concat(
+                f'parent_child.{to_col}', distinct=True)
             cur.execute(
-                f"WITH RECURSIVE {relationship.group}("
-                f"  main_id, {relationship.individual}) "
-                f"AS ("
-                f"  {self._query_get_folks(relationship)}"
-                f"), "
-                f"{relationship.relations}(main_id,generation) "
+                f"WITH RECURSIVE {relationship.relations}(main_id,generation) "
                 f"AS ("
                 f" {initial} "
                 "  UNION "
-                f" SELECT {relationship.group}.{relationship.individual},"
+                f" SELECT parent_child.{to_col},"
                 f" {relationship.relations}.generation + 1 "
-                f" FROM {relationship.group}, {relationship.relations} "
-                f" WHERE {relationship.group}.main_id ="
+                f" FROM parent_child, {relationship.relations} "
+                f" WHERE parent_child.{from_col} ="
                 f"   {relationship.relations}.main_id "
                 f" {md}"
                 f") "
                 f"SELECT {relationship.relations}.main_id,"
                 f" {relationship.relations}.generation,"
-                f" {self.group_concat(f'{relationship.group}.{relationship.individual}')} AS {relationship.group} "
+                f" {folks_col} AS {relationship.group} "
                 f"FROM {relationship.relations} "
-                f"LEFT JOIN {relationship.group} "
-                f"ON {relationship.group}.main_id="
+                f"LEFT JOIN parent_child "
+                f"ON parent_child.{from_col}="
                 f" {relationship.relations}.main_id "
-                f"{sk}"
                 f"GROUP BY {relationship.relations}.main_id,"
                 f" {relationship.relations}.generation"
             )
 
-            return [
-                FolkLore(
-                    main_id,
-                    generation,
-                    [] if not f else [int(a) for a in f.split(',')]
-                )
-                for main_id, generation, f in cur.fetchall()]
+            # A person might be found at several generations when there is
+            # implex, only keep the closest
+            folks: Dict[int, FolkLore] = {}
+            for main_id, generation, f in cur.fetchall():
+                if main_id not in folks \
+                        or generation < folks[main_id].generation:
+                    folks[main_id] = FolkLore(
+                        main_id,
+                        generation,
+                        [] if not f else sorted(int(a) for a in f.split(','))
+                    )
+
+        return [f for f in folks.values() if not skip or f.generation > skip]
+
+    def _get_folks_from_graph(
+            self,
+            relationship: Relationship,
+            person_id: int,
+            max_depth: int = None,
+            skip=0,
+            ) -> List[FolkLore]:
+        """
+        Same as get_folks(), using the in-memory graph.
+        Each person is returned only once, at the closest generation.
+        """
+        g = graph.get_graph()
+        ancestors = relationship == Relationship.ANCESTORS
+
+        # get_folks() computes one more generation than max_depth
+        generations = g.generations(
+            person_id, ancestors, max_depth + 1 if max_depth else None)
+        return [
+            FolkLore(main_id, generation, g.folks(main_id, ancestors))
+            for main_id, generation in generations.items()
+            if not skip or generation > skip
+        ]
+
+    def _get_folks_from_index(
+            self,
+            relationship: Relationship,
+            person_id: int,
+            max_depth: int = None,
+            skip=0,
+            ) -> List[FolkLore]:
+        """
+        Same as get_folks(), using the ancestry table.
+        Each person is returned only once, at the closest generation.
+        """
+        from_col, to_col = relationship.columns
+        self_col, other_col = relationship.ancestry_columns
+
+        # get_folks() computes one more generation than max_depth
+        where = ''
+        if max_depth:
+            where += f" AND min_generation<={max_depth + 1:d}"
+        if skip:
+            where += f" AND min_generation>{skip:d}"
+
+        with django.db.connection.cursor() as cur:
+            cur.execute(
+                f"SELECT {other_col}, min_generation FROM ancestry "
+                f"WHERE {self_col}=%s {where}",
+                [person_id])
+            generations = dict(cur.fetchall())
+            if not skip:
+                generations[person_id] = 0
+
+            folks: Dict[int, List[int]] = collections.defaultdict(list)
+            for chunk in self.sql_split(generations):
+                ids = ','.join(f"{n:d}" for n in chunk)
+                cur.execute(
+                    f"SELECT DISTINCT {from_col}, {to_col} FROM parent_child "
+                    f"WHERE {from_col} IN ({ids})")
+                for main_id, folk in cur:
+                    folks[main_id].append(folk)
+
+        return [
+            FolkLore(main_id, generation, sorted(folks[main_id]))
+            for main_id, generation in generations.items()
+        ]
+
+    def count_folks(
+            self,
+            relationship: Relationship,
+            person_id: int,
+            ) -> Dict[int, int]:
+        """
+        All ancestors or descendants of `person_id` (not including itself),
+        with the number of times they occur in its tree (more than once
+        when there is implex).
+        """
+        if graph.enabled():
+            return graph.get_graph().path_counts(
+                person_id, relationship == Relationship.ANCESTORS)
+
+        elif ancestry.enabled():
+            self_col, other_col = relationship.ancestry_columns
+            with django.db.connection.cursor() as cur:
+                cur.execute(
+                    f"SELECT {other_col}, path_count FROM ancestry "
+                    f"WHERE {self_col}=%s",
+                    [person_id])
+                return dict(cur.fetchall())
+
+        # Count the paths in the subgraph made of all the folks
+        ancestors = relationship == Relationship.ANCESTORS
+        return graph.Genealogy_Graph.from_edges(
+            (f.main_id, folk) if ancestors else (folk, f.main_id)
+            for f in self.get_folks(relationship, person_id)
+            for folk in f.folks
+        ).path_counts(person_id, ancestors)
+
+    def get_parents(self, main_ids: Iterable[int]) -> Dict[int, List[int]]:
+        """
+        The parents of each of the given persons (main_id)
+        """
+        if graph.enabled():
+            g = graph.get_graph()
+            return {m: g.parents(m) for m in main_ids}
+
+        result: Dict[int, List[int]] = collections.defaultdict(list)
+        with django.db.connection.cursor() as cur:
+            for chunk in self.sql_split(main_ids):
+                ids = ','.join(f"{n:d}" for n in chunk)
+                cur.execute(
+                    "SELECT DISTINCT child_main_id, parent_main_id "
+                    f"FROM parent_child WHERE child_main_id IN ({ids})")
+                for child, parent in cur:
+                    result[child].append(parent)
+        return result
 
     def add_folks(
             self,
@@ -506,11 +665,65 @@ class PersonSet(SQLSet):
         )
         self.asserts.extend(pm)
 
+    @staticmethod
+    def update_main_ids(persona_ids: Iterable[int]) -> None:
+        """
+        Recompute main_id for the given personas, and all the personas they
+        are connected to via "sameAs" relationships, directly or not.
+        This must be called after creating, disproving or deleting a sameAs
+        assertion (see P2P.save()), and is much faster than
+        recompute_main_ids() since only those persons are impacted.
+        """
+        sql = SQLSet()
+        groups = Union_Find()
+        same_as = P2P.objects.filter(
+            type_id=P2P_Type.sameAs, disproved=False)
+
+        # Find all connected personas
+        seen: Set[int] = set(persona_ids)
+        todo = seen
+        while todo:
+            found: Set[int] = set()
+            # Each chunk is used twice in the query
+            for chunk in sql.sql_split(todo, chunk_size=CHUNK_SIZE // 2):
+                for p1, p2 in (
+                        same_as
+                        .filter(Q(person1__in=chunk) | Q(person2__in=chunk))
+                        .values_list('person1_id', 'person2_id')):
+                    groups.union(p1, p2)
+                    found.add(p1)
+                    found.add(p2)
+            todo = found - seen
+            seen |= todo
+
+        changed: List[Tuple[int, int]] = []
+        affected: Set[int] = set()
+        for chunk in sql.sql_split(seen):
+            for id, main_id in (
+                    Persona.objects.filter(id__in=chunk)
+                    .values_list('id', 'main_id')):
+                m = groups.find(id)
+                if m != main_id:
+                    changed.append((m, id))
+                    affected.add(m)
+                    if main_id is not None:
+                        affected.add(main_id)
+
+        if changed:
+            with django.db.connection.cursor() as cur:
+                cur.executemany(
+                    "UPDATE persona SET main_id=%s WHERE id=%s", changed)
+
+            # The parent_child rows refer to either the old or the new main_id
+            PersonSet.update_parent_child(affected)
+
     @staticmethod
     def recompute_main_ids() -> None:
         """
         Recompute all main_ids in the database (thread-safe).
-        Must be called outside of a transaction, or it will be very slow
+        Must be called outside of a transaction, or it will be very slow.
+        This is only needed to repair the database, since main_ids are kept
+        up-to-date via update_main_ids().
         """
         with django.db.connection.cursor() as cur:
             q = (
@@ -522,9 +735,10 @@ class PersonSet(SQLSet):
                         "THEN p2p.person2_id "
                         "ELSE p2p.person1_id "
                     "END "
-                    "FROM mains, p2p "
+                    "FROM mains, p2p, assertion "
                     "WHERE mains.main_id IN (p2p.person1_id, p2p.person2_id) "
-                    "AND NOT p2p.disproved "
+                    "AND assertion.id=p2p.assertion_ptr_id "
+                    "AND NOT assertion.disproved "
                     f"AND p2p.type_id={P2P_Type.sameAs}"
                 "), main(id, main_id) AS ("
                     "SELECT id, MIN(main_id) "
@@ -546,22 +760,125 @@ class PersonSet(SQLSet):
 
                 with django.db.transaction.atomic():
                     cur.execute(q)
+                    PersonSet.rebuild_parent_child()
+                    summary.rebuild_summary()
+                    phonetic.rebuild_phonetic()
+                    search.rebuild(['person'])
             finally:
                 cur.execute("pragma foreign_keys=%s" % previous)
 
-    def _query_asserts(self) -> List[QuerySet]:
-        return [
-            table.objects.filter(person__main_id__in=self.persons.keys())
-            for table in (P2C, P2E, P2G)
-        ] + [
-            P2P.objects
-            .filter(Q(person1__main_id__in=self.persons.keys())
-                    | Q(person2__main_id__in=self.persons.keys()))
-        ]
+    @staticmethod
+    def _query_parent_child(where: str) -> str:
+        """
+        A query that computes the rows of the parent_child table from the
+        birth events, restricted to the rows that match `where`.
+        """
+        return (
+            "SELECT DISTINCT persona.main_id, pp.main_id, p2.role_id "
+            "FROM persona, p2e, event, p2e p2, persona pp "
+            "WHERE event.id=p2e.event_id "
+            f"AND p2e.role_id={Event_Type_Role.PK_principal} "
+            f"AND event.type_id={Event_Type.PK_birth} "
+            "AND p2.role_id IN"
+            f" ({Event_Type_Role.PK_birth__father}, "
+            f"  {Event_Type_Role.PK_birth__mother}) "
+            "AND p2e.person_id=persona.id "
+            "AND p2.event_id=event.id "
+            "AND p2.person_id=pp.id "
+            f"AND ({where})"
+        )
 
-    def count_asserts(self) -> int:
+    @staticmethod
+    def update_parent_child(main_ids: Iterable[int]) -> None:
+        """
+        Recompute the rows of the parent_child table where the given persons
+        (main_id) are either the parent or the child, as well as their
+        summary.
+        This must be called after modifying the assertions for a birth event
+        (see P2E.save()), or when main_ids change (with both the old and
+        the new main_ids).
+        """
+        sql = SQLSet()
+        main_ids = set(main_ids)
+
+        def relationships(cur) -> Set[Tuple[int, int]]:
+            result: Set[Tuple[int, int]] = set()
+            for chunk in sql.sql_split(main_ids):
+                ids = ','.join(f"{n:d}" for n in chunk)
+                cur.execute(
+                    "SELECT DISTINCT child_main_id, parent_main_id "
+                    "FROM parent_child "
+                    f"WHERE child_main_id IN ({ids}) "
+                    f"OR parent_main_id IN ({ids})")
+                result.update(cur.fetchall())
+            return result
+
+        with django.db.connection.cursor() as cur:
+            before = relationships(cur)
+            for chunk in sql.sql_split(main_ids):
+                ids = ','.join(f"{n:d}" for n in chunk)
+                cur.execute(
+                    "DELETE FROM parent_child "
+                    f"WHERE child_main_id IN ({ids}) "
+                    f"OR parent_main_id IN ({ids})")
+                cur.execute(
+                    "INSERT INTO parent_child "
+                    "(child_main_id, parent_main_id, role_id) " +
+                    PersonSet._query_parent_child(
+                        f"persona.main_id IN ({ids}) OR pp.main_id IN ({ids})"
+                    ) +
+                    # Rows that involve persons from several chunks
+                    " ON CONFLICT DO NOTHING")
+            after = relationships(cur)
+
+        # Most events are not births, and do not change the tree
+        if before != after:
+            ancestry.update_ancestry(main_ids)
+            graph.changed(main_ids, after)
+
+        summary.update_summary(main_ids)
+
+    @staticmethod
+    def rebuild_parent_child() -> None:
+        """
+        Recompute the whole parent_child table.
+        This is only needed to repair the database.
+        """
+        with django.db.connection.cursor() as cur:
+            cur.execute("DELETE FROM parent_child")
+            cur.execute(
+                "INSERT INTO parent_child "
+                "(child_main_id, parent_main_id, role_id) " +
+                PersonSet._query_parent_child("1=1"))
+
+        if ancestry.enabled():
+            ancestry.rebuild_ancestry()
+        graph.changed()
+
+    def _query_asserts(
+            self,
+            date_from: Optional[str] = None,
+            date_to: Optional[str] = None,
+            ) -> List[QuerySet]:
+        return self.asserts.filter_dates(
+            [
+                table.objects.filter(person__main_id__in=self.persons.keys())
+                for table in (P2C, P2E, P2G)
+            ] + [
+                P2P.objects
+                .filter(Q(person1__main_id__in=self.persons.keys())
+                        | Q(person2__main_id__in=self.persons.keys()))
+            ],
+            date_from=date_from,
+            date_to=date_to)
+
+    def count_asserts(
+            self,
+            date_from: Optional[str] = None,
+            date_to: Optional[str] = None,
+            ) -> int:
         total = 0
-        for a in self._query_asserts():
+        for a in self._query_asserts(date_from, date_to):
             total += a.count()
         return total
 
@@ -569,11 +886,47 @@ class PersonSet(SQLSet):
             self,
             offset: int = None,
             limit: int = None,
+            date_from: Optional[str] = None,
+            date_to: Optional[str] = None,
             ) -> AssertList:
         self.asserts.fetch_asserts_subset(
-            self._query_asserts(), offset=offset, limit=limit)
+            self._query_asserts(date_from, date_to),
+            offset=offset, limit=limit)
         return self.asserts
 
+    def fetch_timeline(
+            self,
+            after: str = None,
+            limit: int = None,
+            date_from: Optional[str] = None,
+            date_to: Optional[str] = None,
+            ) -> Optional[str]:
+        """
+        Fetch the events of all persons in self, sorted by date (events
+        without a known date are ignored), into self.asserts.
+        This uses keyset pagination (see SQLSet.keyset), and returns the
+        cursor for the next page, or None if this is the last page.
+        """
+        subquery = self.values_subquery(self.persons.keys())
+        pm = (
+            P2E.objects
+            .filter(person__main_id__in=(
+                RawSQL(*subquery)
+                if subquery is not None
+                else list(self.persons.keys())))
+            .annotate(jd=F('event__earliest_jd'))
+        )
+        if date_from or date_to:
+            pm = self.date_range(pm, date_from, date_to, prefix='event__')
+        else:
+            pm = pm.filter(event__earliest_jd__isnull=False)
+
+        asserts, cursor = self.keyset(
+            pm, ('jd', 'id'), after=after, limit=limit)
+        self.asserts.extend(
+            self.prefetch_related(asserts, *P2E.related_json_fields()))
+        return cursor
+
     def to_json(self) -> Dict[str, Any]:
         result: Dict[str, Any] = {}
         result['persons'] = list(self.persons.values())
@@ -584,4 +937,7 @@ class PersonSet(SQLSet):
         if self.layout:
             result['layout'] = self.layout
 
+        if self.after is not None:
+            result['after'] = self.after
+
         return result
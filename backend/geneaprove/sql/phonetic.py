@@ -0,0 +1,104 @@
+"""
+Maintain the person_phonetic table (see models.Person_Phonetic).
+
+The codes are computed from the given names and surnames of all personas
+of each person, and stored with an index, so that searching for a name
+only needs to compute its codes and look them up.
+"""
+
+from django.core.exceptions import SuspiciousOperation
+import django.db
+from typing import Any, Iterable, List, Optional, Tuple
+from ..utils import phonetic
+from .sqlsets import SQLSet
+
+# The characteristic parts (gedcom tags) that are coded
+NAME_PARTS = ('SURN', 'GIVN')
+
+
+def _compute(cur, in_ids: Optional[str], params: List[Any]) -> List[Tuple]:
+    """
+    Compute the rows of person_phonetic.
+    :param in_ids: an "IN (...)" clause to restrict the persons (main_id),
+       or None to compute all of them.
+    """
+    where = f"p.main_id {in_ids}" if in_ids else "1=1"
+    cur.execute(
+        "SELECT DISTINCT p.main_id, part.name "
+        "FROM persona p, p2c, assertion a, characteristic_part part, "
+        "characteristic_part_type t "
+        "WHERE p2c.person_id=p.id "
+        "AND a.id=p2c.assertion_ptr_id "
+        "AND NOT a.disproved "
+        "AND part.characteristic_id=p2c.characteristic_id "
+        "AND t.id=part.type_id "
+        f"AND t.gedcom IN ({', '.join(['%s'] * len(NAME_PARTS))}) "
+        f"AND {where}",
+        [*NAME_PARTS, *params])
+
+    rows = set()
+    for main_id, name in cur.fetchall():
+        for algorithm in phonetic.ALGORITHMS:
+            for code in phonetic.codes(algorithm, name or ''):
+                rows.add((main_id, algorithm, code))
+    return sorted(rows)
+
+
+def _insert(cur, rows: List[Tuple]) -> None:
+    cur.executemany(
+        "INSERT INTO person_phonetic (main_id, algorithm, code) "
+        "VALUES (%s, %s, %s)",
+        rows)
+
+
+def update_phonetic(main_ids: Iterable[int]) -> None:
+    """
+    Recompute the codes of the given persons (main_id), see
+    summary.update_summary()
+    """
+    sql = SQLSet()
+    with django.db.connection.cursor() as cur:
+        for in_ids, params in sql.in_clauses(main_ids):
+            cur.execute(
+                f"DELETE FROM person_phonetic WHERE main_id {in_ids}", params)
+            _insert(cur, _compute(cur, in_ids, params))
+
+
+def rebuild_phonetic() -> None:
+    """
+    Recompute the whole person_phonetic table
+    """
+    with django.db.connection.cursor() as cur:
+        cur.execute("DELETE FROM person_phonetic")
+        _insert(cur, _compute(cur, None, []))
+
+
+def match_subquery(
+        algorithm: str,
+        text: str,
+        ) -> Optional[Tuple[str, List[str]]]:
+    """
+    A subquery returning the persons (main_id) that have a name sounding
+    like each of the words in `text`, or None when there are no words (in
+    which case nothing should be filtered out).
+    Words that have no code (for instance a silent "h" in french) are
+    ignored, since names are never indexed with them either.
+    """
+    encode = phonetic.ALGORITHMS.get(algorithm)
+    if encode is None:
+        raise SuspiciousOperation(f'Invalid phonetic algorithm {algorithm!r}')
+
+    queries: List[str] = []
+    params: List[str] = []
+    for word in phonetic.words(text):
+        codes = sorted(encode(word))
+        if not codes:
+            continue
+        queries.append(
+            "SELECT main_id FROM person_phonetic WHERE algorithm=%s "
+            f"AND code IN ({', '.join(['%s'] * len(codes))})")
+        params.extend([algorithm, *codes])
+
+    if not queries:
+        return None
+    return " INTERSECT ".join(queries), params
@@ -11,22 +11,24 @@ class PlaceSet(SQLSet):
     def add_ids(self, ids):
         self.place_ids.update(ids)
 
-    def count_asserts(self):
-        p2c = models.P2C.objects \
-                .filter(characteristic__place_id__in=self.place_ids) \
-                .count()
-        p2e = models.P2E.objects \
-                .filter(event__place_id__in=self.place_ids) \
-                .count()
-        return p2c + p2e
-
-    def fetch_asserts(self, offset=None, limit=None):
-        result = AssertList()
-        result.fetch_asserts_subset(
+    def _query_asserts(self, date_from=None, date_to=None):
+        return AssertList().filter_dates(
             [models.P2C.objects
                 .filter(characteristic__place__in=self.place_ids),
              models.P2E.objects
                 .filter(event__place__in=self.place_ids)],
+            date_from=date_from,
+            date_to=date_to)
+
+    def count_asserts(self, date_from=None, date_to=None):
+        return sum(
+            a.count() for a in self._query_asserts(date_from, date_to))
+
+    def fetch_asserts(
+            self, offset=None, limit=None, date_from=None, date_to=None):
+        result = AssertList()
+        result.fetch_asserts_subset(
+            self._query_asserts(date_from, date_to),
             offset=offset,
             limit=limit)
         return result
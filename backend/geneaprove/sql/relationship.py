@@ -0,0 +1,200 @@
+"""
+Find how two persons are related.
+
+Both persons' ancestors are searched at the same time (a bidirectional
+breadth-first search), one generation at a time, always extending the side
+with the fewest persons to look at. The search stops as soon as no closer
+common ancestor can be found, so that only a small part of the tree is
+visited even when it is large and has a lot of implex.
+"""
+
+import collections
+import itertools
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set
+
+# Returns the parents of each of the given persons
+ParentsOf = Callable[[Iterable[int]], Dict[int, List[int]]]
+
+
+class Common_Ancestor:
+    """
+    A most recent common ancestor of the two persons
+    """
+
+    def __init__(self, main_id: int, generations: List[int], path_count: int):
+        self.main_id = main_id
+        self.generations = generations   # distance from each of the persons
+        self.path_count = path_count     # number of shortest paths through it
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "id": self.main_id,
+            "generations": self.generations,
+            "path_count": self.path_count,
+            "description": describe(*self.generations),
+        }
+
+
+class _Side:
+    """
+    The breadth-first search from one of the persons
+    """
+
+    def __init__(self, main_id: int):
+        self.depth = 0
+        self.distance = {main_id: 0}
+        self.counts = {main_id: 1}   # number of shortest paths
+        self.children: Dict[int, List[int]] = collections.defaultdict(list)
+        self.frontier = [main_id]
+
+    def expand(self, parents_of: ParentsOf) -> None:
+        """
+        Look at one more generation
+        """
+        self.depth += 1
+        next_frontier: List[int] = []
+        for person, parents in parents_of(self.frontier).items():
+            for p in parents:
+                d = self.distance.get(p)
+                if d is None:
+                    self.distance[p] = self.depth
+                    self.counts[p] = 0
+                    next_frontier.append(p)
+                elif d != self.depth:
+                    continue   # already reached through a shorter path
+                self.counts[p] += self.counts[person]
+                self.children[p].append(person)
+        self.frontier = next_frontier
+
+    def paths(self, ancestor: int, limit: int) -> List[List[int]]:
+        """
+        Up to `limit` shortest paths from the ancestor down to the person
+        """
+        result: List[List[int]] = []
+        todo = [[ancestor]]
+        while todo and len(result) < limit:
+            path = todo.pop()
+            children = self.children.get(path[-1])
+            if not children:
+                result.append(path)
+            else:
+                todo.extend(path + [c] for c in children)
+        return result
+
+
+def describe(gen1: int, gen2: int) -> str:
+    """
+    The relationship of the second person, seen from the first one, given
+    their distance to a common ancestor.
+    """
+    def great(n: int, name: str) -> str:
+        if n <= 0:
+            return name
+        elif n == 1:
+            return f"great-{name}"
+        return f"{n}x great-{name}"
+
+    def ordinal(n: int) -> str:
+        suffix = (
+            "th" if 10 <= n % 100 <= 20
+            else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+        )
+        return f"{n}{suffix}"
+
+    if gen1 == 0 and gen2 == 0:
+        return "same person"
+    elif gen2 == 0:
+        return "parent" if gen1 == 1 else great(gen1 - 2, "grandparent")
+    elif gen1 == 0:
+        return "child" if gen2 == 1 else great(gen2 - 2, "grandchild")
+    elif gen1 == 1 and gen2 == 1:
+        return "sibling"
+    elif gen2 == 1:
+        return great(gen1 - 2, "uncle/aunt")
+    elif gen1 == 1:
+        return great(gen2 - 2, "nephew/niece")
+
+    removed = abs(gen1 - gen2)
+    result = f"{ordinal(min(gen1, gen2) - 1)} cousin"
+    if removed == 1:
+        result += " once removed"
+    elif removed == 2:
+        result += " twice removed"
+    elif removed > 2:
+        result += f" {removed} times removed"
+    return result
+
+
+def find_relationship(
+        main_id1: int,
+        main_id2: int,
+        parents_of: ParentsOf,
+        max_depth: int = 20,
+        max_paths: int = 10,
+        ) -> Dict[str, Any]:
+    """
+    Find the most recent common ancestors of the two persons (a person is
+    considered as its own ancestor, at generation 0, so that direct lines
+    are found too), and the shortest paths between them.
+    :param max_depth: maximum number of generations to look at, on each
+       side.
+    :param max_paths: maximum number of paths returned (the total number
+       is always returned as "path_count").
+    """
+    sides = (_Side(main_id1), _Side(main_id2))
+    best = None
+    common: Set[int] = set()
+
+    while True:
+        for m in set(sides[0].distance).intersection(sides[1].distance):
+            d = sides[0].distance[m] + sides[1].distance[m]
+            if best is None or d < best:
+                best = d
+                common = {m}
+            elif d == best:
+                common.add(m)
+
+        # A common ancestor not found yet is further than the current depth
+        # of one side, and at least one generation away on the other side,
+        # unless it is the other person itself.
+        if best is not None \
+                and best <= min(s.depth for s in sides) + 1 \
+                and all(best <= s.depth or not s.frontier for s in sides):
+            break
+
+        candidates = [
+            s for s in sides if s.frontier and s.depth < max_depth]
+        if not candidates:
+            break
+        min(candidates, key=lambda s: len(s.frontier)).expand(parents_of)
+
+    ancestors = sorted(
+        (Common_Ancestor(
+            m,
+            [sides[0].distance[m], sides[1].distance[m]],
+            sides[0].counts[m] * sides[1].counts[m])
+         for m in common),
+        key=lambda a: a.main_id)
+
+    def all_paths() -> Iterator[List[int]]:
+        for a in ancestors:
+            downs = sides[1].paths(a.main_id, max_paths)
+            for up in sides[0].paths(a.main_id, max_paths):
+                head = list(reversed(up))
+                for down in downs:
+                    yield head + down[1:]
+
+    # Stops as soon as we have enough paths
+    paths = list(itertools.islice(all_paths(), max_paths))
+
+    path_count = sum(a.path_count for a in ancestors)
+    return {
+        "person1": main_id1,
+        "person2": main_id2,
+        "found": bool(ancestors),
+        "distance": best,
+        "ancestors": ancestors,
+        "paths": paths,
+        "path_count": path_count,
+        "truncated": len(paths) < path_count,
+    }
@@ -0,0 +1,203 @@
+"""
+Full-text search on the names of persons, places and sources.
+
+Filtering lists with `name__icontains` is a LIKE '%x%', which has to look
+at every row of the table. With sqlite, the words of the names are instead
+stored in FTS5 tables, and the lists look for the words that start with
+what the user typed (so that they can be used for typeahead), ignoring
+case and diacritics ("emi" finds "Émile").
+
+The tables are created by a migration, when sqlite supports FTS5. On other
+databases, filter_names() falls back to icontains.
+"""
+
+import collections
+import django.db
+import logging
+import re
+from django.db.models import QuerySet
+from django.db.models.expressions import RawSQL
+from typing import Dict, Iterable, List, Optional, Tuple
+from .sqlsets import SQLSet
+
+logger = logging.getLogger(__name__)
+
+# The search table for each kind of entity, and its columns
+TABLES = {
+    'person': ('search_person', ('names', )),
+    'place': ('search_place', ('name', 'parts')),
+    'source': ('search_source', ('title', 'abbrev', 'biblio')),
+}
+
+# Whether the search tables exist, for each database
+_enabled: Dict[str, bool] = {}
+
+
+def enabled() -> bool:
+    """
+    Whether the search tables are available
+    """
+    connection = django.db.connection
+    name = connection.settings_dict['NAME']
+    result = _enabled.get(name)
+    if result is None:
+        result = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cur:
+                cur.execute(
+                    "SELECT count(*) FROM sqlite_master "
+                    "WHERE type='table' AND name='search_person'")
+                result = cur.fetchone()[0] > 0
+        _enabled[name] = result
+    return result
+
+
+def _query(text: str) -> Optional[str]:
+    """
+    A FTS5 query for all words that start like those in text, or None if
+    there are no words.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return ' '.join(f'"{w}"*' for w in words)
+
+
+def filter_names(
+        queryset: QuerySet,
+        kind: str,
+        text: str,
+        field: str,
+        ) -> QuerySet:
+    """
+    Only keep the rows of the queryset whose names contain all the words of
+    `text`.
+    :param kind: the key in TABLES, for the model of the queryset
+    :param field: the field to use when the search tables are not
+       available
+    """
+    if not enabled():
+        return queryset.filter(**{f"{field}__icontains": text})
+
+    subquery = match_subquery(kind, text)
+    if subquery is None:
+        # Same as icontains: names are only indexed via their words
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(*subquery))
+
+
+def match_subquery(kind: str, text: str) -> Optional[Tuple[str, List[str]]]:
+    """
+    A subquery returning the ids whose names contain all the words of
+    `text`, for use in raw SQL queries (when enabled()). Returns None when
+    the text has no words, in which case nothing matches.
+    """
+    query = _query(text)
+    if query is None:
+        return None
+    table = TABLES[kind][0]
+    return (f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [query])
+
+
+def _names(cur, kind: str, in_ids: Optional[str], params) -> Dict[int, List]:
+    """
+    The text of each column of the search table, for each id
+    """
+    if kind == 'person':
+        where = f"AND p.main_id {in_ids}" if in_ids else ""
+        cur.execute(
+            "SELECT DISTINCT p.main_id, part.id, part.name "
+            "FROM persona p, p2c, assertion a, characteristic_part part, "
+            "characteristic_part_type t "
+            "WHERE p2c.person_id=p.id "
+            "AND a.id=p2c.assertion_ptr_id "
+            "AND NOT a.disproved "
+            "AND part.characteristic_id=p2c.characteristic_id "
+            "AND t.id=part.type_id "
+            f"AND t.is_name_part {where} "
+            "ORDER BY part.id",
+            params)
+        parts: Dict[int, List[str]] = collections.defaultdict(list)
+        for main_id, _, name in cur:
+            parts[main_id].append(name or '')
+        return {id: [' '.join(p)] for id, p in parts.items()}
+
+    elif kind == 'place':
+        where = f"WHERE place.id {in_ids}" if in_ids else ""
+        cur.execute(f"SELECT id, name FROM place {where}", params)
+        places = dict(cur.fetchall())
+        where = f"WHERE place_id {in_ids}" if in_ids else ""
+        cur.execute(
+            f"SELECT place_id, name FROM place_part {where} ORDER BY id",
+            params)
+        parts = collections.defaultdict(list)
+        for id, name in cur:
+            parts[id].append(name or '')
+        return {
+            id: [name or '', ' '.join(parts[id])]
+            for id, name in places.items()
+        }
+
+    else:
+        where = f"WHERE id {in_ids}" if in_ids else ""
+        cur.execute(f"SELECT id, title, abbrev, biblio FROM source {where}",
+                    params)
+        return {
+            id: [title or '', abbrev or '', biblio or '']
+            for id, title, abbrev, biblio in cur
+        }
+
+
+def _update(kind: str, ids: Optional[Iterable[int]]) -> None:
+    table, columns = TABLES[kind]
+    with django.db.connection.cursor() as cur:
+        if ids is None:
+            cur.execute(f"DELETE FROM {table}")
+            clauses: Iterable[Tuple[Optional[str], List]] = [(None, [])]
+        else:
+            clauses = SQLSet().in_clauses(ids)
+
+        for in_ids, params in clauses:
+            if in_ids is not None:
+                cur.execute(
+                    f"DELETE FROM {table} WHERE rowid {in_ids}", params)
+            cur.executemany(
+                f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(columns))})",
+                [(id, *texts)
+                 for id, texts in _names(cur, kind, in_ids, params).items()])
+
+
+def update_persons(main_ids: Iterable[int]) -> None:
+    """
+    Update the names of the given persons (main_id), see
+    summary.update_summary()
+    """
+    if enabled():
+        _update('person', main_ids)
+
+
+def update_places(ids: Iterable[int]) -> None:
+    """
+    Update the names of the given places, after they have been modified
+    """
+    if enabled():
+        _update('place', ids)
+
+
+def update_sources(ids: Iterable[int]) -> None:
+    """
+    Update the title, abbreviation and bibliography of the given sources,
+    after they have been modified
+    """
+    if enabled():
+        _update('source', ids)
+
+
+def rebuild(kinds: Iterable[str] = TABLES) -> None:
+    """
+    Recompute the search tables
+    """
+    if enabled():
+        for kind in kinds:
+            _update(kind, None)
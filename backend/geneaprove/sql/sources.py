@@ -69,32 +69,32 @@ class SourceSet(SQLSet):
             for s, parent in cur.fetchall():
                 self._higher[s].append(parent)
 
-    def count_asserts(self):
-        """
-        Count all asserts for the sources, but doesn't fetch them
-        """
+    def _query_asserts(self, date_from=None, date_to=None):
         assert len(self.sources) == 1
         sid = next(iter(self.sources))
+        return self.asserts.filter_dates(
+            [models.P2E.objects.filter(source=sid),
+             models.P2C.objects.filter(source=sid),
+             models.P2P.objects.filter(source=sid),
+             models.P2G.objects.filter(source=sid)],
+            date_from=date_from,
+            date_to=date_to)
 
-        count = 0
-        for table in (models.P2E, models.P2C, models.P2P, models.P2G):
-            count += table.objects.filter(source=sid).count()
-        return count
+    def count_asserts(self, date_from=None, date_to=None):
+        """
+        Count all asserts for the sources, but doesn't fetch them
+        """
+        return sum(
+            a.count() for a in self._query_asserts(date_from, date_to))
 
-    def fetch_asserts(self, offset=None, limit=None):
+    def fetch_asserts(
+            self, offset=None, limit=None, date_from=None, date_to=None):
         """
         Fetch all assertions for all sources
         """
         logger.debug('SourceSet.fetch_asserts')
-
-        assert len(self.sources) == 1
-        sid = next(iter(self.sources))
-
         self.asserts.fetch_asserts_subset(
-            [models.P2E.objects.filter(source=sid),
-             models.P2C.objects.filter(source=sid),
-             models.P2P.objects.filter(source=sid),
-             models.P2G.objects.filter(source=sid)],
+            self._query_asserts(date_from, date_to),
             offset=offset,
             limit=limit)
 
@@ -1,8 +1,17 @@
-from django.db.models import prefetch_related_objects, QuerySet, Model
+from django.core.exceptions import SuspiciousOperation
+from django.db.models import prefetch_related_objects, QuerySet, Model, Q
+from django.db.models.expressions import RawSQL
 from django.conf import settings
+import base64
+import binascii
+import django.db
 import itertools
+import json
 import logging
-from typing import Optional, Iterable, Generator, List, TypeVar, Union
+from geneaprove.utils.date import parse_date
+from typing import (
+    Any, Optional, Iterable, Generator, List, Sequence, Tuple, TypeVar,
+    Union)
 
 
 logger = logging.getLogger(__name__)
@@ -25,6 +34,10 @@ class SQLSet:
 
     ENGINE = settings.DATABASES['default']['ENGINE']
 
+    # Whether sqlite was compiled with the JSON functions (None until we
+    # have checked)
+    _has_json_each: Optional[bool] = None
+
     def sql_split(
             self,
             ids: Optional[Iterable[T]],
@@ -43,6 +56,64 @@ class SQLSet:
                 []
             )
 
+    def values_subquery(
+            self,
+            ids: Iterable[Any],
+            ) -> Optional[Tuple[str, List[Any]]]:
+        """
+        A subquery that returns all the values in `ids`, which are passed to
+        the database as a single parameter (a JSON array for sqlite, an
+        array for postgresql), so that there is no limit on their number.
+        Returns the SQL and its parameters, or None when the database does
+        not support it, in which case the ids must be split in chunks
+        instead (see sql_split).
+        """
+        if 'postgresql' in self.ENGINE:
+            values = list(ids)
+            if not values:
+                # The type of an empty array cannot be guessed
+                return ("SELECT NULL WHERE false", [])
+            return ("SELECT unnest(%s)", [values])
+
+        elif 'sqlite' in self.ENGINE:
+            if SQLSet._has_json_each is None:
+                try:
+                    with django.db.connection.cursor() as cur:
+                        cur.execute("SELECT value FROM json_each('[1]')")
+                        SQLSet._has_json_each = True
+                except django.db.OperationalError:
+                    logger.info('No json support in sqlite, splitting queries')
+                    SQLSet._has_json_each = False
+
+            if SQLSet._has_json_each:
+                try:
+                    return (
+                        "SELECT value FROM json_each(%s)",
+                        [json.dumps(list(ids))])
+                except TypeError:   # values cannot be sent as JSON
+                    pass
+
+        return None
+
+    def in_clauses(
+            self,
+            ids: Iterable[Any],
+            ) -> Generator[Tuple[str, List[Any]], None, None]:
+        """
+        Generate one or more "IN (...)" clauses and their parameters, for
+        use in raw SQL queries. Together, they match all the ids.
+        """
+        values = list(ids)
+        if not values:
+            return
+
+        subquery = self.values_subquery(values)
+        if subquery is not None:
+            yield f"IN ({subquery[0]})", subquery[1]
+        else:
+            for chunk in self.sql_split(values):
+                yield f"IN ({','.join(['%s'] * len(chunk))})", chunk
+
     def prefetch_related(
             self,
             objects: Iterable[M],
@@ -60,15 +131,16 @@ class SQLSet:
                 prefetch_related_objects(chunk, *attrs)
         return obj
 
-    def group_concat(self, field: str) -> str:
+    def group_concat(self, field: str, distinct=False) -> str:
         """
         An aggregate function for the database, that takes all values for
         the field and returns a comma-separated list of values
         """
+        d = "DISTINCT " if distinct else ""
         if 'postgresql' in self.ENGINE:
-            return f"string_agg({field}::text, ',')"
+            return f"string_agg({d}{field}::text, ',')"
         else:
-            return f"group_concat({field})"
+            return f"group_concat({d}{field})"
 
     def cast(self, field: Union[int, str], typename: str) -> str:
         """
@@ -86,7 +158,9 @@ class SQLSet:
         Return one or more querysets, after adding additional:
              WHERE  param_name IN param_value
         As opposed to django's builtin support, this works with sqlite even
-        when there are more than 1000 values.
+        when there are more than 1000 values. When possible, a single query
+        is generated (see values_subquery), otherwise one query per chunk of
+        values.
 
         example:
             for q in sqlin(model.Table.objects, ids__in=[...]):
@@ -100,8 +174,17 @@ class SQLSet:
 
             if v is None:
                 yield queryset
+                continue
+
+            values = list(v)
+            if not values:
+                continue
+
+            subquery = self.values_subquery(values)
+            if subquery is not None:
+                yield queryset.filter(**{k: RawSQL(*subquery)})
             else:
-                for chunk in self.sql_split(v):
+                for chunk in self.sql_split(values):
                     if chunk is not None:
                         yield queryset.filter(**{k: chunk})
 
@@ -118,3 +201,101 @@ class SQLSet:
             else:
                 return queryset[:int(limit)]
         return queryset
+
+    def encode_cursor(self, *values: Any) -> str:
+        """
+        An opaque cursor for keyset pagination: the values of the sort keys
+        for the last row returned.
+        """
+        return base64.urlsafe_b64encode(
+            json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor: str, count: int) -> List[Any]:
+        """
+        The values encoded in a cursor, which must have `count` of them.
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, binascii.Error):
+            values = None
+
+        if not isinstance(values, list) or len(values) != count:
+            raise SuspiciousOperation(f'Invalid cursor {cursor!r}')
+        return values
+
+    def date_range(
+            self,
+            queryset: QuerySet,
+            date_from: Optional[str] = None,
+            date_to: Optional[str] = None,
+            prefix: str = '',
+            ) -> QuerySet:
+        """
+        Only keep the rows whose dates overlap the range between the two
+        dates (as entered by the user, either of which can be omitted).
+        This compares the indexed julian day columns, whose names are
+        `prefix` followed by "earliest_jd" and "latest_jd" (for instance
+        "event__" or "subject_").
+        Rows without a known date are filtered out, unless both dates are
+        omitted.
+        """
+        if not date_from and not date_to:
+            return queryset
+
+        filters = {}
+        if date_from:
+            d = parse_date(date_from)
+            if d.sort_date() is None:
+                raise SuspiciousOperation(f'Invalid date {date_from!r}')
+            filters[f'{prefix}latest_jd__gte'] = d.earliest_julian_day
+        if date_to:
+            d = parse_date(date_to)
+            if d.sort_date() is None:
+                raise SuspiciousOperation(f'Invalid date {date_to!r}')
+            filters[f'{prefix}earliest_jd__lte'] = d.latest_julian_day
+        return queryset.filter(
+            **{f'{prefix}earliest_jd__isnull': False}, **filters)
+
+    def keyset(
+            self,
+            queryset: QuerySet,
+            keys: Sequence[str],
+            *,
+            after: str = None,
+            limit: int = None,
+            ) -> Tuple[List[M], Optional[str]]:
+        """
+        Keyset (or "seek") pagination: sort the queryset on the `keys`
+        (fields or annotations, the last of which must be unique, for
+        instance "id"), and return the rows that come after the cursor.
+        As opposed to limit_offset(), the cost of fetching a page does not
+        depend on how far it is in the list, as long as the database has an
+        index on the keys.
+        Returns the rows, and the cursor to fetch the next page, or None if
+        this is the last page. `limit` must be at least 1.
+        """
+        queryset = queryset.order_by(*keys)
+
+        if after:
+            values = self.decode_cursor(after, len(keys))
+
+            # (k1, k2) > (v1, v2)   is   k1 > v1 OR (k1 = v1 AND k2 > v2)
+            cond = Q(**{f"{keys[-1]}__gt": values[-1]})
+            for k, v in zip(reversed(keys[:-1]), reversed(values[:-1])):
+                cond = Q(**{f"{k}__gt": v}) | (Q(**{k: v}) & cond)
+            queryset = queryset.filter(cond)
+
+        if limit is None:
+            return list(queryset), None
+
+        try:
+            count = int(limit)
+        except (TypeError, ValueError):
+            count = 0
+        if count < 1:
+            raise SuspiciousOperation(f'Invalid limit {limit!r}')
+
+        rows = list(queryset[:count])
+        if len(rows) < count:
+            return rows, None
+        return rows, self.encode_cursor(*(getattr(rows[-1], k) for k in keys))
@@ -0,0 +1,203 @@
+"""
+Maintain the person_summary table (see models.Person_Summary).
+
+Lists of persons, pedigrees and statistics need the name, sex and main
+dates of a lot of persons. Computing them from the assertions means
+joining characteristics, events and all personas of each person, for every
+request. Instead, they are stored in person_summary, and recomputed
+whenever the assertions for a person change.
+"""
+
+import collections
+import django.db
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from ..models.characteristic import Characteristic_Part_Type
+from ..models.event import Event_Type, Event_Type_Role
+from .sqlsets import SQLSet
+from . import phonetic, search
+
+logger = logging.getLogger(__name__)
+
+# Order of the name parts in display names (by gedcom tag). Other parts
+# (nicknames, farm names,...) come last.
+NAME_PARTS_ORDER = ('NPFX', 'GIVN', '_MIDL', 'SPFX', 'SURN', 'NSFX')
+
+
+def _display_name(parts: List[Tuple[str, str]]) -> str:
+    """
+    Build a name from (gedcom tag, value) tuples
+    """
+    def key(part: Tuple[str, str]) -> int:
+        try:
+            return NAME_PARTS_ORDER.index(part[0])
+        except ValueError:
+            return len(NAME_PARTS_ORDER)
+
+    # Gedcom names that were not split in parts use slashes around the
+    # surname, as in "John /Smith/"
+    return ' '.join(
+        word
+        for _, value in sorted(parts, key=key)
+        for word in (value or '').replace('/', ' ').split())
+
+
+def _compute(cur, in_ids: Optional[str], params: List[Any]) -> List[Tuple]:
+    """
+    Compute the rows of person_summary.
+    :param in_ids: an "IN (...)" clause to restrict the persons (main_id),
+       or None to compute all of them.
+    """
+    where = f"p.main_id {in_ids}" if in_ids else "1=1"
+    cur.execute(
+        "SELECT p.id FROM persona p "
+        f"WHERE p.main_id=p.id AND {where}",
+        params)
+    persons = [row[0] for row in cur]
+
+    # Only keep the first name characteristic for each person
+    names: Dict[int, Tuple[int, List[Tuple[str, str]]]] = {}
+    cur.execute(
+        "SELECT DISTINCT p.main_id, p2c.characteristic_id, part.id, "
+        "t.gedcom, part.name "
+        "FROM persona p, p2c, assertion a, characteristic_part part, "
+        "characteristic_part_type t "
+        "WHERE p2c.person_id=p.id "
+        "AND a.id=p2c.assertion_ptr_id "
+        "AND NOT a.disproved "
+        "AND part.characteristic_id=p2c.characteristic_id "
+        "AND t.id=part.type_id "
+        "AND t.is_name_part "
+        f"AND {where} "
+        "ORDER BY part.id",
+        params)
+    for main_id, char_id, _, gedcom, value in cur:
+        current = names.get(main_id)
+        if current is None or char_id < current[0]:
+            names[main_id] = (char_id, [(gedcom, value)])
+        elif char_id == current[0]:
+            current[1].append((gedcom, value))
+
+    # Same as PersonSet._query_get_sex(). Persons with conflicting
+    # information get a "?"
+    sexes: Dict[int, List[str]] = collections.defaultdict(list)
+    cur.execute(
+        "SELECT DISTINCT p.main_id, c.name "
+        "FROM characteristic_part c, p2c, assertion a, persona p "
+        "WHERE c.characteristic_id=p2c.characteristic_id "
+        f"AND c.type_id={Characteristic_Part_Type.PK_sex} "
+        "AND p2c.person_id=p.id "
+        "AND a.id=p2c.assertion_ptr_id "
+        "AND NOT a.disproved "
+        f"AND {where}",
+        params)
+    for main_id, sex in cur:
+        sexes[main_id].append(sex)
+
+    # Same as PersonSet.fetch_p2e()
+    dates: Dict[int, Dict[int, Tuple[str, str]]] = collections.defaultdict(
+        dict)
+    cur.execute(
+        "SELECT p.main_id, e.type_id, MIN(e.date_sort), MAX(e.date_sort) "
+        "FROM persona p, p2e, assertion a, event e "
+        "WHERE p2e.person_id=p.id "
+        "AND a.id=p2e.assertion_ptr_id "
+        "AND NOT a.disproved "
+        f"AND p2e.role_id={Event_Type_Role.PK_principal} "
+        "AND e.id=p2e.event_id "
+        "AND e.type_id IN "
+        f"({Event_Type.PK_birth}, {Event_Type.PK_death}, "
+        f"{Event_Type.PK_marriage}) "
+        "AND e.date_sort IS NOT NULL "
+        f"AND {where} "
+        "GROUP BY p.main_id, e.type_id",
+        params)
+    for main_id, type_id, earliest, latest in cur:
+        dates[main_id][type_id] = (earliest, latest)
+
+    parents: Dict[int, List[int]] = collections.defaultdict(list)
+    cur.execute(
+        "SELECT DISTINCT child_main_id, role_id FROM parent_child "
+        f"WHERE {f'child_main_id {in_ids}' if in_ids else '1=1'}",
+        params)
+    for main_id, role_id in cur:
+        parents[main_id].append(role_id)
+
+    cur.execute(
+        "SELECT p.main_id, MAX(p.last_change) FROM persona p "
+        f"WHERE {where} GROUP BY p.main_id",
+        params)
+    last_change = dict(cur.fetchall())
+    for table in ('p2c', 'p2e', 'p2g'):
+        cur.execute(
+            "SELECT p.main_id, MAX(a.last_change) "
+            f"FROM persona p, {table} x, assertion a "
+            "WHERE x.person_id=p.id "
+            "AND a.id=x.assertion_ptr_id "
+            f"AND {where} "
+            "GROUP BY p.main_id",
+            params)
+        for main_id, changed in cur:
+            if changed is not None and (
+                    last_change.get(main_id) is None
+                    or changed > last_change[main_id]):
+                last_change[main_id] = changed
+
+    rows: List[Tuple] = []
+    for main_id in persons:
+        name = _display_name(names[main_id][1]) if main_id in names else ''
+        sex: Optional[str] = None
+        if len(sexes[main_id]) == 1:
+            sex = sexes[main_id][0]
+        elif sexes[main_id]:
+            sex = '?'
+        d = dates.get(main_id, {})
+        rows.append((
+            main_id,
+            name,
+            name.lower(),
+            sex,
+            d.get(Event_Type.PK_birth, (None, None))[0],
+            d.get(Event_Type.PK_death, (None, None))[1],
+            d.get(Event_Type.PK_marriage, (None, None))[0],
+            Event_Type_Role.PK_birth__father in parents[main_id],
+            Event_Type_Role.PK_birth__mother in parents[main_id],
+            last_change.get(main_id),
+        ))
+    return rows
+
+
+def _insert(cur, rows: List[Tuple]) -> None:
+    cur.executemany(
+        "INSERT INTO person_summary (main_id, display_name, sort_name, sex, "
+        "birth_sort, death_sort, marriage_sort, has_father, has_mother, "
+        "last_change) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+        rows)
+
+
+def update_summary(main_ids: Iterable[int]) -> None:
+    """
+    Recompute the summary of the given persons (main_id). This must be
+    called whenever their assertions or their parents are modified, and
+    when main_ids change (with both the old and the new main_ids, so that
+    obsolete rows are removed).
+    """
+    main_ids = list(main_ids)
+    sql = SQLSet()
+    with django.db.connection.cursor() as cur:
+        for in_ids, params in sql.in_clauses(main_ids):
+            cur.execute(
+                f"DELETE FROM person_summary WHERE main_id {in_ids}", params)
+            _insert(cur, _compute(cur, in_ids, params))
+    phonetic.update_phonetic(main_ids)
+    search.update_persons(main_ids)
+
+
+def rebuild_summary() -> None:
+    """
+    Recompute the whole person_summary table. The phonetic codes and search
+    index of persons must be rebuilt separately.
+    """
+    with django.db.connection.cursor() as cur:
+        cur.execute("DELETE FROM person_summary")
+        _insert(cur, _compute(cur, None, []))
@@ -0,0 +1,172 @@
+"""
+Helpers to create test data for the sql/ modules
+"""
+
+import django.test
+from geneaprove.models.persona import Persona
+from geneaprove.models.asserts import P2P, P2P_Type, P2C, P2E
+from geneaprove.models.place import Place
+from geneaprove.models.surety import Surety_Scheme_Part
+from geneaprove.models.event import Event, Event_Type, Event_Type_Role
+from geneaprove.models.characteristic import (
+    Characteristic, Characteristic_Part_Type, Characteristic_Part)
+from geneaprove.sql.personas import PersonSet, Relationship
+from typing import List, Optional, Tuple
+
+
+class PersonaTestCase(django.test.TestCase):
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.default_surety = Surety_Scheme_Part.objects.get(name='normal')
+        self.surn = Characteristic_Part_Type.objects.get(gedcom="SURN")
+
+    def create_persona(self, name: str = None, birth: str = None) -> Persona:
+        p = Persona.objects.create()
+
+        if name is not None:
+            c = Characteristic.objects.create(name=f"surname of {name}")
+            Characteristic_Part.objects.create(
+                characteristic=c,
+                type=self.surn,
+                name=name,
+            )
+            P2C.objects.create(
+                person=p,
+                characteristic=c,
+                surety=self.default_surety,
+                disproved=False,
+            )
+
+        if birth is not None:
+            e = Event.objects.create(
+                name=f"birth of {name}",
+                type_id=Event_Type.PK_birth,
+                date=birth,
+            )
+            P2E.objects.create(
+                person=p,
+                event=e,
+                surety=self.default_surety,
+                disproved=False,
+            )
+
+        return p
+
+    def create_persons(self, count: int) -> List[int]:
+        """
+        Create personas that are their own main_id, and return their ids
+        """
+        personas = [Persona.objects.create() for j in range(0, count)]
+        for p in personas:
+            p.main_id = p.id
+            p.save()
+        return [p.id for p in personas]
+
+    def add_name(
+            self,
+            person_id: int,
+            *parts: Tuple[str, str],
+            ) -> Characteristic:
+        """
+        Add a name characteristic to a person
+        :param parts: (gedcom, value) tuples, for instance ("SURN", "Smith")
+        """
+        c = Characteristic.objects.create(name="name")
+        for gedcom, value in parts:
+            Characteristic_Part.objects.create(
+                characteristic=c,
+                type=Characteristic_Part_Type.objects.get(gedcom=gedcom),
+                name=value)
+        P2C.objects.create(
+            person_id=person_id,
+            characteristic=c,
+            surety=self.default_surety,
+            disproved=False,
+        )
+        return c
+
+    def add_event(
+            self,
+            date: Optional[str],
+            *roles: Tuple[Optional[int], int],
+            place: Place = None,
+            ) -> Event:
+        """
+        Add a birth event
+        :param roles: (person_id, role_id) tuples. Persons that are None
+           are ignored.
+        """
+        e = Event.objects.create(
+            name="birth", type_id=Event_Type.PK_birth, date=date, place=place)
+        for person_id, role in roles:
+            if person_id is not None:
+                P2E.objects.create(
+                    person_id=person_id,
+                    event=e,
+                    role_id=role,
+                    surety=self.default_surety,
+                    disproved=False,
+                )
+        return e
+
+    def add_birth(
+            self,
+            child: int,
+            father: int = None,
+            mother: int = None,
+            date: str = None,
+            ) -> Event:
+        return self.add_event(
+            date,
+            (child, Event_Type_Role.PK_principal),
+            (father, Event_Type_Role.PK_birth__father),
+            (mother, Event_Type_Role.PK_birth__mother))
+
+    def merge_personas(
+            self,
+            p1: Persona,
+            p2: Persona,
+            disproved: bool = False) -> None:
+        P2P.objects.create(
+            person1=p1,
+            person2=p2,
+            type_id=P2P_Type.sameAs,
+            disproved=disproved,
+            surety=self.default_surety,
+        )
+
+    def check_implex(self):
+        """
+        Check that the number of paths to each ancestor is computed
+        correctly, and updated when parents change.
+
+              grandfather
+               /       \\
+           father    mother
+               \\       /
+                 child
+        """
+        grandfather, father, mother, child = self.create_persons(4)
+        self.add_birth(child, father=father, mother=mother)
+        self.add_birth(father, father=grandfather)
+        self.add_birth(mother, father=grandfather)
+
+        s = PersonSet()
+        self.assertEqual(
+            s.count_folks(Relationship.ANCESTORS, child),
+            {father: 1, mother: 1, grandfather: 2})
+        self.assertEqual(
+            s.count_folks(Relationship.DESCENDANTS, grandfather),
+            {father: 1, mother: 1, child: 2})
+        self.assertEqual(
+            {f.main_id: f.generation
+             for f in s.get_folks(Relationship.ANCESTORS, child, skip=1)},
+            {grandfather: 2})
+
+        P2E.objects.get(
+            person_id=grandfather,
+            event__actors__person_id=mother).delete()
+        self.assertEqual(
+            s.count_folks(Relationship.ANCESTORS, child),
+            {father: 1, mother: 1, grandfather: 1})
@@ -0,0 +1,13 @@
+from django.test import override_settings
+from .base import PersonaTestCase
+
+
+class TestAncestry(PersonaTestCase):
+
+    @override_settings(
+        GENEAPROVE_ANCESTRY_INDEX=True, GENEAPROVE_GRAPH_CACHE=False)
+    def test_ancestry(self):
+        """
+        The ancestry index is updated when parents change
+        """
+        self.check_implex()
@@ -0,0 +1,55 @@
+from django.core.exceptions import SuspiciousOperation
+from geneaprove.models.event import Event, Event_Type_Role
+from geneaprove.models.place import Place
+from geneaprove.sql.personas import PersonSet
+from geneaprove.sql.sqlsets import SQLSet
+from geneaprove.sql import dates
+from .base import PersonaTestCase
+
+
+class TestDates(PersonaTestCase):
+
+    def test_date_range(self):
+        """
+        Filtering on dates uses the julian day columns
+        """
+        p = self.create_persona(name="Smith")
+        p.main_id = p.id
+        p.save()
+        for date in ("1750", "between 1800 and 1810", "1900-02-03", None):
+            self.add_event(date, (p.id, Event_Type_Role.PK_principal))
+            Place.objects.create(name=f"place {date}", date=date)
+
+        e = Event.objects.get(date="between 1800 and 1810")
+        self.assertLess(e.earliest_jd, e.latest_jd)
+
+        # The columns can be recomputed for existing databases
+        Event.objects.update(earliest_jd=None, latest_jd=None)
+        dates.backfill_julian_days()
+        self.assertEqual(
+            Event.objects.filter(earliest_jd__isnull=False).count(), 3)
+        self.assertEqual(
+            Event.objects.get(id=e.id).latest_jd, e.latest_jd)
+
+        s = SQLSet()
+        places = Place.objects.all()
+        self.assertEqual(s.date_range(places).count(), 4)
+        self.assertEqual(
+            set(s.date_range(places, "1805", "1850")
+                .values_list('date', flat=True)),
+            {"between 1800 and 1810"})
+        self.assertEqual(
+            set(s.date_range(places, date_to="1800")
+                .values_list('date', flat=True)),
+            {"1750", "between 1800 and 1810"})
+        with self.assertRaises(SuspiciousOperation):
+            s.date_range(places, "foo")
+
+        persons = PersonSet()
+        persons.add_ids([p.main_id])
+        self.assertEqual(persons.count_asserts(), 5)  # includes the name
+        self.assertEqual(persons.count_asserts(date_from="1801"), 2)
+        self.assertEqual(
+            [a.event.date
+             for a in persons.fetch_asserts_subset(date_to="1801")],
+            ["1750", "between 1800 and 1810"])
@@ -0,0 +1,42 @@
+from geneaprove.models.persona import Duplicate_Candidate
+from geneaprove.models.event import Event_Type_Role
+from geneaprove.models.place import Place
+from geneaprove.sql import duplicates, summary
+from .base import PersonaTestCase
+
+
+class TestDuplicates(PersonaTestCase):
+
+    def test_duplicates(self):
+        """
+        Persons with similar names and events are found as duplicates
+        """
+        ids = self.create_persons(4)
+        paris = Place.objects.create(name="Paris")
+        for p, name, date in zip(
+                ids,
+                ("John /Smith/", "Jon /Smyth/", "John /Jones/",
+                 "John /Smith/"),
+                ("1900-01-02", "1900-01-02", "1900-01-02", "1800")):
+            self.add_name(p, ("SURN", name))
+            self.add_event(
+                date, (p, Event_Type_Role.PK_principal), place=paris)
+        summary.rebuild_summary()
+
+        smith, smyth, jones, smith1800 = ids
+
+        # Jones has a different surname, and is never compared
+        self.assertEqual(
+            duplicates.candidate_pairs(duplicates.blocking_keys()),
+            {(smith, smyth), (smith, smith1800), (smyth, smith1800)})
+
+        data = duplicates.person_data([smith, smyth, smith1800])
+        self.assertGreater(
+            duplicates.score(data[smith], data[smyth]),
+            duplicates.score(data[smith], data[smith1800]))
+
+        self.assertEqual(duplicates.find_duplicates(min_score=50), 1)
+        self.assertEqual(
+            list(Duplicate_Candidate.objects.values_list(
+                'person1_id', 'person2_id')),
+            [(smith, smyth)])
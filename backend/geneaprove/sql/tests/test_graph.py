@@ -0,0 +1,181 @@
+import django.db
+from django.core.signals import request_finished, request_started
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from geneaprove.models.event import Event_Type_Role
+from geneaprove.models.theme.checks import Check_Exact
+from geneaprove.models.theme.rules import Implex
+from geneaprove.sql.graph import Genealogy_Graph
+from geneaprove.sql.personas import PersonSet, Relationship
+from geneaprove.sql import ancestry, graph
+from .base import PersonaTestCase
+
+
+class TestGraph(PersonaTestCase):
+
+    @override_settings(GENEAPROVE_GRAPH_CACHE=True)
+    def test_graph_cache(self):
+        """
+        The in-memory graph is reloaded when parents change
+        """
+        self.check_implex()
+
+    def test_backends(self):
+        """
+        The in-memory graph, the ancestry index and the parent_child table
+        find the same folks and the same implex.
+
+                ggf
+                 |
+           gf1   gf2   gm
+             \  /   \  /
+            father  mother
+                \    /
+                 child
+        """
+        child, father, mother, gf1, gf2, gm, ggf = self.create_persons(7)
+        self.add_birth(child, father=father, mother=mother)
+        self.add_birth(father, father=gf1, mother=gf2)
+        self.add_birth(mother, father=gf2, mother=gm)
+        self.add_birth(gf2, father=ggf)
+
+        def compute():
+            s = PersonSet()
+            implex = Implex(ref=child, count=Check_Exact(2))
+            precomputed = {}
+            implex.precompute(s, child, precomputed)
+            return (
+                dict(precomputed[implex.id]),
+                s.count_folks(Relationship.DESCENDANTS, ggf),
+                sorted(s.get_folks(Relationship.ANCESTORS, child)),
+                sorted(s.get_folks(Relationship.ANCESTORS, child, skip=1)),
+                sorted(s.get_folks(
+                    Relationship.ANCESTORS, child, max_depth=2)),
+                sorted(s.get_folks(Relationship.DESCENDANTS, ggf)),
+            )
+
+        with override_settings(
+                GENEAPROVE_ANCESTRY_INDEX=False,
+                GENEAPROVE_GRAPH_CACHE=False):
+            expected = compute()
+
+        self.assertEqual(
+            expected[0],
+            {father: 1, mother: 1, gf1: 1, gf2: 2, gm: 1, ggf: 2})
+        self.assertEqual(expected[1], {gf2: 1, father: 1, mother: 1,
+                                       child: 2})
+
+        with override_settings(
+                GENEAPROVE_ANCESTRY_INDEX=True,
+                GENEAPROVE_GRAPH_CACHE=False):
+            ancestry.rebuild_ancestry()
+            self.assertEqual(compute(), expected)
+
+        with override_settings(GENEAPROVE_GRAPH_CACHE=True):
+            graph.changed()    # make sure the graph is reloaded
+            self.assertEqual(compute(), expected)
+
+    @override_settings(GENEAPROVE_GRAPH_CACHE=True)
+    def test_version(self):
+        """
+        The graph is only reloaded when relationships change
+        """
+        def version():
+            with django.db.connection.cursor() as cur:
+                cur.execute("SELECT graph_version FROM config")
+                return cur.fetchone()[0]
+
+        child, father, mother = self.create_persons(3)
+        self.add_birth(child, father=father)
+        v = version()
+
+        # Not a change in the relationships
+        self.add_event("1900", (child, Event_Type_Role.PK_principal))
+        self.assertEqual(version(), v)
+
+        self.add_birth(father, mother=child)
+        self.assertNotEqual(version(), v)
+
+        # The version is not maintained when the graph is not in memory
+        v = version()
+        with override_settings(GENEAPROVE_GRAPH_CACHE=False):
+            self.add_birth(mother, father=child)
+        self.assertEqual(version(), v)
+
+    @override_settings(GENEAPROVE_GRAPH_CACHE=True)
+    def test_request(self):
+        """
+        The version of the graph is checked once per request
+        """
+        child, father, mother = self.create_persons(3)
+        self.add_birth(child, father=father)
+
+        def count_checks():
+            with CaptureQueriesContext(django.db.connection) as queries:
+                g = graph.get_graph()
+                graph.get_graph()
+            return g, sum('graph_version' in q['sql'] for q in queries)
+
+        self.assertEqual(count_checks()[1], 2)
+
+        request_started.send(sender=self.__class__)
+        try:
+            g, checks = count_checks()
+            self.assertEqual(checks, 1)
+            self.assertEqual(g.parents(child), [father])
+
+            # Changes done during the request are seen
+            self.add_birth(child, mother=mother)
+            self.assertEqual(
+                graph.get_graph().parents(child), [father, mother])
+        finally:
+            request_finished.send(sender=self.__class__)
+
+        self.assertEqual(count_checks()[1], 2)
+
+    def test_overlay(self):
+        """
+        Patches are merged into the arrays when there are too many of them
+        """
+        g = Genealogy_Graph.from_edges([(1, 2), (1, 3), (2, 4)])
+        previous = graph.MAX_OVERLAY_SIZE
+        graph.MAX_OVERLAY_SIZE = 4
+        try:
+            g2 = g.patched({2}, [(1, 2)], version=1)
+            self.assertEqual(len(g2._parents_overlay), 2)
+            g3 = g2.patched({5}, [(5, 3)], version=2)
+            self.assertEqual(g3._parents_overlay, {})
+            self.assertEqual(g3._children_overlay, {})
+        finally:
+            graph.MAX_OVERLAY_SIZE = previous
+
+        self.assertEqual(g3.version, 2)
+        self.assertEqual(g3.edges(), [(1, 2), (1, 3), (5, 3)])
+        self.assertEqual(g3.children(3), [1, 5])
+        self.assertEqual(g3.parents(2), [])
+
+    def test_graph(self):
+        g = Genealogy_Graph.from_edges(
+            [(1, 2), (1, 3), (2, 4), (3, 4), (4, 5), (5, 4)])
+        self.assertEqual(g.parents(1), [2, 3])
+        self.assertEqual(g.children(4), [2, 3, 5])
+        self.assertEqual(g.parents(10), [])
+        self.assertEqual(
+            g.generations(1, ancestors=True),
+            {1: 0, 2: 1, 3: 1, 4: 2, 5: 3})
+        self.assertEqual(
+            g.generations(5, ancestors=False, max_depth=1), {5: 0, 4: 1})
+        self.assertEqual(
+            g.path_counts(1, ancestors=True),
+            {2: 1, 3: 1})   # 4 and 5 are a cycle
+
+        # Replace the parents of 3 and the children of 5
+        g2 = g.patched({3, 5}, [(1, 3), (3, 6), (7, 5)], version=1)
+        self.assertEqual(g2.parents(3), [6])
+        self.assertEqual(g2.children(4), [2])
+        self.assertEqual(g2.children(5), [7])
+        self.assertEqual(g2.parents(4), [])
+        self.assertEqual(g2.parents(7), [5])
+        self.assertEqual(g.parents(3), [4])    # unchanged
+        self.assertEqual(
+            g2.path_counts(1, ancestors=True), {2: 1, 3: 1, 4: 1, 6: 1})
@@ -1,64 +1,12 @@
-import django.test
 from geneaprove.models.persona import Persona
-from geneaprove.models.asserts import P2P, P2P_Type, P2C, P2E
-from geneaprove.models.surety import Surety_Scheme_Part
-from geneaprove.models.event import Event, Event_Type
-from geneaprove.models.characteristic import (
-    Characteristic, Characteristic_Part_Type, Characteristic_Part)
-from geneaprove.sql.personas import PersonSet
-
-
-class TestPersona(django.test.TestCase):
-
-    def __init__(self, *args):
-        super().__init__(*args)
-        self.default_surety = Surety_Scheme_Part.objects.get(name='normal')
-        self.surn = Characteristic_Part_Type.objects.get(gedcom="SURN")
-
-    def create_persona(self, name: str = None, birth: str = None) -> Persona:
-        p = Persona.objects.create()
-
-        if name is not None:
-            c = Characteristic.objects.create(name=f"surname of {name}")
-            Characteristic_Part.objects.create(
-                characteristic=c,
-                type=self.surn,
-                name=name,
-            )
-            P2C.objects.create(
-                person=p,
-                characteristic=c,
-                surety=self.default_surety,
-                disproved=False,
-            )
+from geneaprove.models.asserts import P2P, P2E
+from geneaprove.models.event import Event_Type, Event_Type_Role
+from geneaprove.sql.personas import PersonSet, Relationship
+from geneaprove.sql import summary
+from .base import PersonaTestCase
 
-        if birth is not None:
-            e = Event.objects.create(
-                name=f"birth of {name}",
-                type_id=Event_Type.PK_birth,
-                date=birth,
-            )
-            P2E.objects.create(
-                person=p,
-                event=e,
-                surety=self.default_surety,
-                disproved=False,
-            )
 
-        return p
-
-    def merge_personas(
-            self,
-            p1: Persona,
-            p2: Persona,
-            disproved: bool = False) -> None:
-        P2P.objects.create(
-            person1=p1,
-            person2=p2,
-            type_id=P2P_Type.sameAs,
-            disproved=disproved,
-            surety=self.default_surety,
-        )
+class TestPersona(PersonaTestCase):
 
     def test_high_personas(self):
         """
@@ -114,3 +62,157 @@ class TestPersona(django.test.TestCase):
 
         # If we have a cycle (Persona3 is also marked as sameAs with
         # persona0 for instance)
+
+    def test_main_ids(self):
+        """
+        main_id is updated when sameAs relationships are created, disproved
+        or deleted.
+        """
+        personas = [self.create_persona() for j in range(0, 4)]
+        ids = [p.id for p in personas]
+
+        def main_ids():
+            return [Persona.objects.get(id=id).main_id for id in ids]
+
+        self.merge_personas(personas[3], personas[2])
+        self.merge_personas(personas[1], personas[2])
+        self.assertEqual(
+            main_ids(), [None, ids[1], ids[1], ids[1]])
+
+        same = P2P.objects.get(person1=personas[1])
+        same.disproved = True
+        same.save()
+        self.assertEqual(
+            main_ids(), [None, ids[1], ids[2], ids[2]])
+
+        same.delete()
+        self.merge_personas(personas[0], personas[3])
+        self.assertEqual(
+            main_ids(), [ids[0], ids[1], ids[0], ids[0]])
+
+        # personas[2] is no longer part of the group
+        same = P2P.objects.get(person1=personas[3], person2=personas[2])
+        same.person2 = personas[1]
+        same.save()
+        self.assertEqual(
+            main_ids(), [ids[0], ids[0], ids[2], ids[0]])
+
+    def test_parent_child(self):
+        """
+        The parent_child table is updated when birth events or main_ids
+        change
+        """
+        other, child, father, mother = self.create_persons(4)
+        self.add_birth(child, father=father, mother=mother)
+
+        s = PersonSet()
+
+        def parents():
+            return {
+                f.main_id: sorted(f.folks)
+                for f in s.get_folks(Relationship.ANCESTORS, child)
+            }
+
+        self.assertEqual(
+            parents(), {child: [father, mother], father: [], mother: []})
+        self.assertEqual(
+            s.has_known_parent(), {child: '  '})
+
+        # The father is the same person as other, which becomes his main_id
+        self.merge_personas(
+            Persona.objects.get(id=father), Persona.objects.get(id=other))
+        self.assertEqual(
+            parents(), {child: [other, mother], mother: [], other: []})
+
+        P2E.objects.get(person_id=mother).delete()
+        self.assertEqual(parents(), {child: [other], other: []})
+
+        # The event is not a birth after all
+        birth = P2E.objects.get(person_id=child).event
+        birth.type_id = Event_Type.PK_death
+        birth.save()
+        self.assertEqual(parents(), {child: []})
+        birth.type_id = Event_Type.PK_birth
+        birth.save()
+        self.assertEqual(parents(), {child: [other], other: []})
+
+        # Actors of other events do not change the parents
+        calls = []
+        previous = PersonSet.update_parent_child
+        PersonSet.update_parent_child = calls.append
+        try:
+            event = self.add_event(None, (child, Event_Type_Role.PK_principal))
+            event.type_id = Event_Type.PK_death
+            event.save()
+            self.add_event(None, (mother, Event_Type_Role.PK_principal))
+            calls.clear()
+            p2e = P2E.objects.get(event=event)
+            p2e.person_id = mother
+            p2e.save()
+            p2e.delete()
+            self.assertEqual(calls, [])
+        finally:
+            PersonSet.update_parent_child = previous
+
+    def test_keyset(self):
+        """
+        Persons are paginated with a keyset on their sort name
+        """
+        ids = self.create_persons(5)
+        summary.update_summary(ids)
+
+        result = []
+        after = None
+        while True:
+            persons = PersonSet()
+            persons.add_ids(limit=2, after=after)
+            result.extend(persons.persons)
+            after = persons.after
+            if after is None:
+                break
+        self.assertEqual(result, ids)
+
+        # Some persons have no summary yet
+        others = self.create_persons(3)
+        self.add_name(others[1], ("SURN", "Smith"))
+        result = []
+        after = None
+        while True:
+            persons = PersonSet()
+            persons.add_ids(ids=ids[:2] + others, limit=2, after=after)
+            result.extend(persons.persons)
+            after = persons.after
+            if after is None:
+                break
+        self.assertEqual(result, ids[:2] + [others[0], others[2], others[1]])
+
+    def test_timeline(self):
+        """
+        The events of a family, sorted by date
+        """
+        child, father, other = self.create_persons(3)
+        self.add_birth(child, father=father, date="1900")
+        self.add_birth(father, date="1870")
+        self.add_birth(child, date="1950")
+        self.add_birth(father)
+        self.add_birth(other, date="1880")
+
+        def timeline(**kwargs):
+            result = []
+            after = None
+            while True:
+                s = PersonSet()
+                s.add_folks(child, Relationship.ANCESTORS)
+                after = s.fetch_timeline(after=after, limit=2, **kwargs)
+                result.extend((a.person_id, a.event.date) for a in s.asserts)
+                if after is None:
+                    break
+            return result
+
+        self.assertEqual(
+            timeline(),
+            [(father, "1870"), (child, "1900"), (father, "1900"),
+             (child, "1950")])
+        self.assertEqual(
+            timeline(date_from="1890", date_to="1920"),
+            [(child, "1900"), (father, "1900")])
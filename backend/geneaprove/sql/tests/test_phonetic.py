@@ -0,0 +1,32 @@
+from django.core.exceptions import SuspiciousOperation
+from geneaprove.sql.personas import PersonSet
+from geneaprove.sql import phonetic
+from .base import PersonaTestCase
+
+
+class TestPhonetic(PersonaTestCase):
+
+    def test_sounds_like(self):
+        """
+        Names are matched on their phonetic codes
+        """
+        emile, emma = self.create_persons(2)
+        self.add_name(emile, ("SURN", "Émile /Müller/"))
+        self.add_name(emma, ("SURN", "Emma /Miller/"))
+
+        def sounds_like(text, algorithm):
+            s = PersonSet()
+            s.add_ids(soundslike=text, algorithm=algorithm)
+            return set(s.persons)
+
+        self.assertEqual(sounds_like("Emil Mueller", "soundex"), {emile})
+        self.assertEqual(sounds_like("Muler", "daitch_mokotoff"),
+                         {emile, emma})
+        self.assertEqual(sounds_like("Ema Miler", "french"), {emma})
+        with self.assertRaises(SuspiciousOperation):
+            phonetic.match_subquery("unknown", "Smith")
+
+        # Words without a code are ignored
+        self.assertEqual(sounds_like("Ema h Miler", "french"), {emma})
+        self.assertIsNone(phonetic.match_subquery("french", "h"))
+        self.assertEqual(sounds_like("h", "french"), {emile, emma})
@@ -0,0 +1,66 @@
+import unittest
+from geneaprove.sql.graph import Genealogy_Graph
+from geneaprove.sql.relationship import describe, find_relationship
+
+
+class TestRelationship(unittest.TestCase):
+
+    def test_relationship(self):
+        """
+                 20     21
+                  \\    / \\
+                   10    11     53
+                   |     |     /  \\
+                   30    31   51  52
+                   |           \\  /
+                   40           50
+        """
+        g = Genealogy_Graph.from_edges(
+            [(10, 20), (10, 21), (11, 20), (11, 21), (30, 10), (31, 11),
+             (40, 30), (50, 51), (50, 52), (51, 53), (52, 53)])
+
+        def parents_of(ids):
+            return {m: g.parents(m) for m in ids}
+
+        def rel(id1, id2, **kwargs):
+            r = find_relationship(id1, id2, parents_of, **kwargs)
+            return (r["distance"],
+                    [(a.main_id, a.generations, describe(*a.generations))
+                     for a in r["ancestors"]],
+                    sorted(r["paths"]),
+                    r["path_count"])
+
+        self.assertEqual(
+            rel(10, 11),
+            (2, [(20, [1, 1], "sibling"), (21, [1, 1], "sibling")],
+             [[10, 20, 11], [10, 21, 11]], 2))
+        self.assertEqual(
+            rel(30, 31),
+            (4, [(20, [2, 2], "1st cousin"), (21, [2, 2], "1st cousin")],
+             [[30, 10, 20, 11, 31], [30, 10, 21, 11, 31]], 2))
+        self.assertEqual(
+            rel(40, 20),
+            (3, [(20, [3, 0], "great-grandparent")], [[40, 30, 10, 20]], 1))
+        self.assertEqual(
+            rel(40, 40), (0, [(40, [0, 0], "same person")], [[40]], 1))
+        self.assertEqual(
+            rel(50, 53),
+            (2, [(53, [2, 0], "grandparent")],
+             [[50, 51, 53], [50, 52, 53]], 2))
+        self.assertEqual(rel(40, 50), (None, [], [], 0))
+        self.assertEqual(rel(40, 20, max_depth=2), (None, [], [], 0))
+
+        r = find_relationship(30, 31, parents_of, max_paths=1)
+        self.assertEqual(len(r["paths"]), 1)
+        self.assertEqual(r["path_count"], 2)
+        self.assertTrue(r["truncated"])
+
+    def test_describe(self):
+        self.assertEqual(describe(0, 1), "child")
+        self.assertEqual(describe(0, 4), "2x great-grandchild")
+        self.assertEqual(describe(2, 1), "uncle/aunt")
+        self.assertEqual(describe(1, 3), "great-nephew/niece")
+        self.assertEqual(describe(3, 2), "1st cousin once removed")
+        self.assertEqual(describe(3, 3), "2nd cousin")
+        self.assertEqual(describe(12, 12), "11th cousin")
+        self.assertEqual(describe(4, 7), "3rd cousin 3 times removed")
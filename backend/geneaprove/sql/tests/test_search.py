@@ -0,0 +1,58 @@
+import django.db
+from geneaprove.models.persona import Person_Summary
+from geneaprove.models.place import Place
+from geneaprove.sql.personas import PersonSet
+from geneaprove.sql import search
+from .base import PersonaTestCase
+
+
+class TestSearch(PersonaTestCase):
+
+    def test_search(self):
+        """
+        Searching names matches the start of words, ignoring diacritics
+        """
+        emile, emma = self.create_persons(2)
+        self.add_name(emile, ("SURN", "Émile /Müller/"))
+        self.add_name(emma, ("SURN", "Emma /Miller/"))
+
+        def find(text):
+            s = PersonSet()
+            s.add_ids(namefilter=text)
+            return set(s.persons)
+
+        self.assertEqual(find("emile"), {emile})
+        self.assertEqual(find("EM"), {emile, emma})
+        self.assertEqual(find("mul emi"), {emile})
+        self.assertEqual(find("miller"), {emma})
+        self.assertEqual(
+            search.filter_names(
+                Person_Summary.objects.all(), 'person', 'mül', 'sort_name'
+            ).count(),
+            1)
+
+        # Text without words matches nothing, as with icontains
+        self.assertEqual(find("/"), set())
+        self.assertEqual(find("!!"), set())
+        self.assertEqual(
+            search.filter_names(
+                Person_Summary.objects.all(), 'person', '-', 'sort_name'
+            ).count(),
+            0)
+
+        # Same results without the search tables
+        name = django.db.connection.settings_dict['NAME']
+        previous = search.enabled()
+        search._enabled[name] = False
+        try:
+            self.assertEqual(find("/"), set())
+            self.assertEqual(find("mül"), {emile})
+        finally:
+            search._enabled[name] = previous
+
+        place = Place.objects.create(name="Besançon")
+        search.update_places([place.id])
+        self.assertEqual(
+            list(search.filter_names(
+                Place.objects.all(), 'place', 'besanc', 'name')),
+            [place])
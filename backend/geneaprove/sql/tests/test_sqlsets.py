@@ -0,0 +1,93 @@
+import django.db
+import django.test
+import unittest
+from django.core.exceptions import SuspiciousOperation
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from geneaprove.models.persona import Persona
+from geneaprove.models.place import Place
+from geneaprove.sql.sqlsets import SQLSet, CHUNK_SIZE
+
+
+class TestSQLSet(django.test.TestCase):
+
+    def test_sqlin(self):
+        """
+        Long lists of ids are sent in a single query when the database
+        supports it, and in chunks otherwise
+        """
+        ids = sorted(
+            Persona.objects.create().id for j in range(0, CHUNK_SIZE + 10))
+        s = SQLSet()
+
+        def fetch():
+            querysets = list(s.sqlin(Persona.objects.all(), id__in=ids))
+            return (len(querysets),
+                    sorted(p.id for qs in querysets for p in qs))
+
+        self.assertEqual(fetch(), (1, ids))
+
+        previous = SQLSet._has_json_each
+        SQLSet._has_json_each = False
+        try:
+            self.assertEqual(fetch(), (2, ids))
+        finally:
+            SQLSet._has_json_each = previous
+
+        self.assertEqual(list(s.sqlin(Persona.objects.all(), id__in=[])), [])
+
+        # An empty list gives a valid subquery, whatever the database
+        previous = SQLSet.ENGINE
+        SQLSet.ENGINE = 'django.db.backends.postgresql'
+        try:
+            subquery = s.values_subquery([])
+        finally:
+            SQLSet.ENGINE = previous
+        for sql in (subquery, s.values_subquery([])):
+            self.assertEqual(
+                list(Persona.objects.filter(id__in=RawSQL(*sql))), [])
+
+    def test_keyset(self):
+        """
+        Keyset pagination returns the same rows as limit/offset
+        """
+        for name in ("b", "A", "a", "c", "B"):
+            Place.objects.create(name=name)
+        places = Place.objects.annotate(sort_name=Lower('name'))
+        expected = list(
+            places.order_by('sort_name', 'id').values_list('id', flat=True))
+
+        s = SQLSet()
+        result = []
+        after = None
+        while True:
+            rows, after = s.keyset(
+                places, ('sort_name', 'id'), after=after, limit=2)
+            result.extend(p.id for p in rows)
+            if after is None:
+                break
+        self.assertEqual(result, expected)
+
+        with self.assertRaises(SuspiciousOperation):
+            s.keyset(places, ('sort_name', 'id'), after='foo', limit=2)
+        for limit in (0, -1, '0', 'foo'):
+            with self.assertRaises(SuspiciousOperation, msg=repr(limit)):
+                s.keyset(places, ('sort_name', 'id'), limit=limit)
+        self.assertEqual(
+            len(s.keyset(places, ('sort_name', 'id'), limit='1')[0]), 1)
+
+    @unittest.skipUnless(
+        django.db.connection.vendor == 'sqlite', 'reads sqlite_master')
+    def test_sort_indexes(self):
+        """
+        The indexes used to sort lists survive the migrations that rebuild
+        their tables
+        """
+        with django.db.connection.cursor() as cur:
+            cur.execute(
+                "SELECT name FROM sqlite_master WHERE type='index' "
+                "AND name IN ('place_sort', 'source_sort', "
+                "'person_summary_sort')")
+            self.assertEqual(
+                sorted(row[0] for row in cur.fetchall()),
+                ['person_summary_sort', 'place_sort', 'source_sort'])
@@ -0,0 +1,92 @@
+from geneaprove.models.persona import Persona, Person_Summary
+from geneaprove.models.characteristic import Characteristic_Part
+from geneaprove.sql.personas import PersonSet
+from .base import PersonaTestCase
+
+
+class TestSummary(PersonaTestCase):
+
+    def summary(self, main_id):
+        return Person_Summary.objects.filter(main_id=main_id).values(
+            'display_name', 'sex', 'birth_sort', 'has_father',
+            'has_mother').first()
+
+    def test_summary(self):
+        """
+        The person_summary table is updated when assertions change
+        """
+        child, father, other = self.create_persons(3)
+        for p in (child, other):
+            self.add_name(
+                p, ("SURN", "/Smith/"), ("GIVN", "John"), ("SEX", "M"))
+        birth = self.add_birth(child, father=father, date="1900")
+
+        self.assertEqual(
+            self.summary(child),
+            {'display_name': 'John Smith', 'sex': 'M',
+             'birth_sort': birth.date_sort, 'has_father': True,
+             'has_mother': False})
+        self.assertEqual(
+            self.summary(father),
+            {'display_name': '', 'sex': None, 'birth_sort': None,
+             'has_father': False, 'has_mother': False})
+
+        s = PersonSet()
+        s.add_ids(namefilter="SMITH")
+        self.assertEqual(list(s.persons), [child, other])
+        self.assertEqual(s.persons[child].display_name, 'John Smith')
+        self.assertEqual(s.persons[child].birthISODate, birth.date_sort)
+
+        # other is now part of child, and has no summary of its own
+        self.assertIsNotNone(self.summary(other))
+        self.merge_personas(
+            Persona.objects.get(id=other), Persona.objects.get(id=child))
+        self.assertIsNone(self.summary(other))
+        self.assertEqual(self.summary(child)['display_name'], 'John Smith')
+
+    def test_edits(self):
+        """
+        The person_summary table is updated when events and names are
+        modified
+        """
+        smith, jones = self.create_persons(2)
+        name = self.add_name(smith, ("SURN", "/Smith/"), ("GIVN", "John"))
+        self.add_name(jones, ("SURN", "/Jones/"))
+        birth = self.add_birth(smith, date="1900")
+
+        def persons():
+            s = PersonSet()
+            s.add_ids()
+            return {p.main_id: (p.display_name, p.birthISODate)
+                    for p in s.persons.values()}
+
+        self.assertEqual(
+            persons(),
+            {smith: ('John Smith', birth.date_sort), jones: ('Jones', None)})
+
+        birth.date = "1910"
+        birth.save()
+        self.assertEqual(
+            persons(),
+            {smith: ('John Smith', birth.date_sort), jones: ('Jones', None)})
+        self.assertEqual(self.summary(smith)['birth_sort'], birth.date_sort)
+
+        surname = name.parts.get(type__gedcom="SURN")
+        surname.name = "/Brown/"
+        surname.save()
+        self.assertEqual(
+            persons(),
+            {smith: ('John Brown', birth.date_sort), jones: ('Jones', None)})
+
+        s = PersonSet()
+        s.add_ids(namefilter="brown")
+        self.assertEqual(list(s.persons), [smith])
+
+        Characteristic_Part.objects.get(name="John").delete()
+        name.date = "1920"
+        name.save()
+        self.assertEqual(self.summary(smith)['display_name'], 'Brown')
+
+        birth.delete()
+        self.assertEqual(
+            persons(), {smith: ('Brown', None), jones: ('Jones', None)})
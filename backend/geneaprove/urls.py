@@ -11,15 +11,18 @@ from django.conf import settings
 import django.views
 from .views import events
 from .views import importers
+from .views import merge
 from .views import metadata
 from .views import pedigree
 from .views import persona
 from .views import places
 from .views import quilts
+from .views import relationship
 from .views import representation
 from .views import sources
 from .views import stats
 from .views import themelist
+from .views import timeline
 
 
 logger = logging.getLogger('geneaprove')
@@ -112,11 +115,18 @@ urlpatterns = [
         themelist.ThemeSave.as_view()
     ),
     path('data/pedigree/<int:id>', pedigree.PedigreeData.as_view()),
+    path(
+        'data/relationship/<int:id1>/<int:id2>',
+        relationship.RelationshipView.as_view()
+    ),
+    path('data/duplicates', merge.DuplicatesList.as_view()),
     path('data/suretySchemes', persona.SuretySchemesList.as_view()),
     path('data/event/<int:id>', events.EventDetailsView.as_view()),
     path('data/stats/<int:id>', stats.StatsView.as_view()),
+    path('data/timeline/<int:id>', timeline.TimelineView.as_view()),
     path('data/metadata', metadata.MetadataList.as_view()),
     path('data/import', importers.GedcomImport.as_view()),
+    path('data/import/<str:job>', importers.ImportJob.as_view()),
     path('data/citationModel/<int:model_id>', sources.CitationModel.as_view()),
     path('data/citationModels', sources.CitationModels.as_view()),
     re_path(
@@ -135,6 +145,4 @@ urlpatterns = [
     #   page); in this case it simply returns index.html and the GUI is in
     #   charge of showing the proper page.
     re_path(r'^.*$', static),
-
-    # url(r'^merge$', geneaprove.views.merge.view),
 ]
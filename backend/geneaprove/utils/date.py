@@ -29,7 +29,8 @@ import datetime
 import functools
 import re
 import time
-from typing import Any, Tuple, Dict, Optional, Union, overload
+from typing import (
+    Any, Tuple, Dict, List, NamedTuple, Optional, Sequence, Union, overload)
 
 __all__ = ["from_roman_literal", "to_roman_literal", "DateRange",
            "Calendar", "CalendarGregorian", "CalendarFrench",
@@ -1290,3 +1291,103 @@ class DateRange:
     def day_of_week(self) -> str:
         """Return the day of week for the start date"""
         return "" if self._from is None else self._from.day_of_week()
+
+
+# Maximum number of dates kept by parse_date()
+PARSE_CACHE_SIZE = 20000
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_date(text: str) -> DateRange:
+    """
+    Same as DateRange(text), but the most recently used dates are cached,
+    since files typically contain the same date strings many times.
+    The calendar is part of the text, so the latter is enough as a key.
+    The same DateRange is returned for the same text: none of its methods
+    modify it, and callers must not either.
+    parse_date.cache_info() reports the number of hits and misses.
+    """
+    return DateRange(text)
+
+
+# The most common formats in databases (ISO dates) and GEDCOM files
+# ("12 MAR 1765"), which parse_dates() handles without going through all
+# the regexps of DateRange.
+FAST_ISO_RE = re.compile(r"^(\d{4})-(\d\d)-(\d\d)$")
+FAST_GEDCOM_RE = re.compile(r"^(\d\d?) ([A-Za-z]+) (\d{4})$")
+
+
+class Parsed_Dates(NamedTuple):
+    """
+    The result of parse_dates(), with one entry per date in each list
+    """
+    sort_dates: List[Optional[str]]
+    earliest_julian_days: List[Optional[int]]
+    latest_julian_days: List[Optional[int]]
+    years: List[Optional[int]]
+
+
+def _fast_parse(text: str) -> Optional[Tuple[Optional[str], int, int, int]]:
+    """
+    Parse the simple formats, with the same result as DateRange(text).
+    Returns None for other formats.
+    """
+    m = FAST_ISO_RE.match(text)
+    if m:
+        year, month, day = int(m.group(1)), int(m.group(2)), int(m.group(3))
+    else:
+        m = FAST_GEDCOM_RE.match(text)
+        if m is None:
+            return None
+        month = MONTH_NAMES.get(m.group(2).lower())
+        if month is None:
+            return None
+        year, day = int(m.group(3)), int(m.group(1))
+
+    # Might return a julian date, for old dates
+    jd, _, _, _, calendar = CalendarGregorian().from_components(
+        year, month, day)
+    return (
+        CalendarGregorian().date_unicode(jd),
+        jd,
+        jd,
+        calendar.components(jd)[0],
+    )
+
+
+def parse_dates(texts: Sequence[Optional[str]]) -> Parsed_Dates:
+    """
+    Parse a lot of dates at once, and return their sort dates, julian days
+    and years (None for dates that do not have them).
+    This is faster than parsing each date with DateRange: each distinct
+    text is parsed once, and the usual formats do not use regexps, other
+    than to recognize them. Other dates go through parse_date().
+    """
+    parsed: Dict[
+        Optional[str],
+        Tuple[Optional[str], Optional[int], Optional[int], Optional[int]],
+    ] = {}
+    for text in texts:
+        if text not in parsed:
+            r = None if text is None else _fast_parse(text.strip())
+            if r is None:
+                d = parse_date(text or "")
+                sort_date = d.sort_date()
+                if sort_date is None:
+                    # The julian days of invalid dates are meaningless
+                    r = (None, None, None, d.year())
+                else:
+                    r = (sort_date,
+                         d.earliest_julian_day,
+                         d.latest_julian_day,
+                         d.year())
+            parsed[text] = r
+
+    result = Parsed_Dates([], [], [], [])
+    for text in texts:
+        sort_date, earliest, latest, year = parsed[text]
+        result.sort_dates.append(sort_date)
+        result.earliest_julian_days.append(earliest)
+        result.latest_julian_days.append(latest)
+        result.years.append(year)
+    return result
@@ -4,11 +4,16 @@ It parses a GEDCOM file, and creates a tree in memory corresponding
 to the GEDCOM file, without doing any interpretation of this tree.
 
 Example of use:
-    ged = Gedcom().parse("myfile.ged")
+    ged = parse_gedcom("myfile.ged")
 
-The resulting data structure is a GedcomFile, which provides subprograms
+The resulting data structure is a GedcomRecord, which provides subprograms
 to access the various fields.
 
+For very large files, the toplevel records can also be processed one at a
+time, so that memory usage does not depend on the size of the file:
+    for record in iter_gedcom("myfile.ged"):
+        ...
+
 This package provides minimal error handling: it checks that tags occur as
 many times as needed in the standard, and not more. Otherwise an error is
 raised. This check is based on the Gedcom 5.5.1 grammar
@@ -21,24 +26,36 @@ Performance:
    http://famousfamilytrees.blogspot.se/2008/07/species-family-trees.html
       42.78s
 
+   Use "./manage.py benchmark" to measure the lexical parser, the grammar
+   and the import on synthetic files (see generator.py), and to compare
+   with a report from a previous release.
+
 """
 
 import logging
 import sys
 import time
-from typing import Optional, BinaryIO, Union
+from typing import Optional, BinaryIO, Callable, Union, Iterator
 from .file import File
 from .lexical import Lexical
 from .grammar import FILE
 from .records import GedcomRecord
+from .parallel import parse_gedcom_parallel
 
 
 logger = logging.getLogger('geneaprove.gedcom')
 
 
+def _print_warning(filename: str, line: int, msg: str) -> None:
+    print(f"{filename}:{line} {msg}")
+
+
 def parse_gedcom(
         filename: Union[BinaryIO, str],
-        print_warning=lambda m: print(m),
+        print_warning: Callable[[str, int, str], None] = _print_warning,
+        compact: bool = False,
+        processes: int = 1,
+        progress: Optional[Callable[[int, int], None]] = None,
         ) -> Optional[GedcomRecord]:
     """Parse the specified GEDCOM file, check its syntax, and return a
        GedcomFile instance.
@@ -46,12 +63,66 @@ def parse_gedcom(
        :param filename:
            Either the name of a file, or an instance of a class
            compatible with file.
+       :param compact:
+           If true, the records are stored in a GedcomTree, which needs a
+           lot less memory for large files.
+       :param processes:
+           If greater than 1, large files are split and parsed in that many
+           processes. The result is then always compact.
+       :param progress:
+           Called regularly with the number of bytes parsed so far, and the
+           size of the file. This is not called when the file is parsed in
+           several processes.
     """
     start = time.time()
-    result = FILE.parse(Lexical(File(filename), print_warning=print_warning))
+    if processes > 1:
+        result = parse_gedcom_parallel(
+            filename,
+            print_warning=print_warning,
+            processes=processes,
+            sequential=lambda f: parse_gedcom(
+                f, print_warning=print_warning, compact=True,
+                progress=progress),
+        )
+    else:
+        f = File(filename)
+        try:
+            result = FILE.parse(
+                Lexical(f, print_warning=print_warning, progress=progress),
+                compact=compact)
+        finally:
+            f.close()
     logger.info(f'Parsed in {(time.time() - start)}s')
     return result
 
 
+def iter_gedcom(
+        filename: Union[BinaryIO, str],
+        print_warning: Callable[[str, int, str], None] = _print_warning,
+        compact: bool = False,
+        ) -> Iterator[GedcomRecord]:
+    """Parse the specified GEDCOM file, and return its level-0 records
+       (HEAD, INDI, FAM, SOUR,...) one at a time, in file order.
+       Each record is fully validated against the grammar before it is
+       returned, and is not referenced by the parser afterwards.
+       Raise Invalid_Gedcom in case of error. Errors on the file as a whole
+       (for instance a missing TRLR) are only detected once the last record
+       has been returned.
+       :param filename:
+           Either the name of a file, or an instance of a class
+           compatible with file.
+       :param compact:
+           If true, each record is stored in its own GedcomTree.
+    """
+    f = File(filename)
+    try:
+        yield from FILE.iter_records(
+            Lexical(f, print_warning=print_warning), compact=compact)
+    finally:
+        f.close()
+
+
 if __name__ == '__main__':
-    parse_gedcom(sys.argv[1])
+    # Check the syntax of the file, without keeping it in memory
+    for _ in iter_gedcom(sys.argv[1]):
+        pass
@@ -1,6 +1,6 @@
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterator, Tuple, Set
 from .lexical import Lexical, Lexical_Line
-from .records import GedcomRecord
+from .records import GedcomRecord, GedcomTree
 
 
 unlimited = -1
@@ -57,10 +57,28 @@ class F:
         else:
             self.children = {c.tag: c for c in children}
 
-    def parse(self, lexical: Lexical) -> Optional[GedcomRecord]:
+        self._tables: Optional["Grammar_Tables"] = None
+
+    @property
+    def tables(self) -> "Grammar_Tables":
+        """
+        The grammar rooted at self, compiled into transition tables. This is
+        only computed once.
+        """
+        if self._tables is None:
+            self._tables = Grammar_Tables(self)
+        return self._tables
+
+    def parse(
+            self,
+            lexical: Lexical,
+            compact: bool = False,
+            ) -> Optional[GedcomRecord]:
         """
         Read current line from lexical parser, and process it.
         This doesn't modify self, and is fully reentrant
+        :param compact: if true, the records are stored in a GedcomTree,
+           which uses a lot less memory.
         """
 
         if self.tag:
@@ -77,19 +95,143 @@ class F:
                 level=-1,
             )
 
-        tags: Dict[str, int] = {}  # tag -> number of times children were seen
-        val = p.value
-        has_xref = False
+        tables = self.tables
+        val, has_xref = tables.check_value(lexical, tables.ROOT, p)
+
+        if compact:
+            tree = GedcomTree()
+            root = tree.append(p.linenum, p.tag, p.xref_id, val)
+            for _ in tables.iter_children(lexical, p, has_xref, tree=tree):
+                pass
+            tree.close(root)
+            tree.finish()
+            return tree.record(root)
+
+        r = GedcomRecord(
+            id=p.xref_id,
+            line=p.linenum,
+            tag=p.tag,
+            value=val,
+        )
+        r.fields.extend(tables.iter_children(lexical, p, has_xref))
+        return r
+
+    def iter_records(
+            self,
+            lexical: Lexical,
+            compact: bool = False,
+            ) -> Iterator[GedcomRecord]:
+        """
+        Similar to parse, for the toplevel FILE only: rather than build the
+        whole tree in memory, this returns the level-0 records one by one,
+        as soon as they have been parsed and validated. The caller can
+        discard them once processed.
+        The check for missing records (HEAD, TRLR,...) is done once the whole
+        file has been read.
+        :param compact: if true, each record is stored in its own GedcomTree.
+        """
+        assert not self.tag, "only valid for the toplevel FILE"
+        p = Lexical_Line(
+            linenum=0,
+            xref_id=None,
+            value='',
+            tag='',
+            level=-1,
+        )
+        yield from self.tables.iter_children(
+            lexical, p, has_xref=False,
+            tree=GedcomTree() if compact else None,
+            streaming=True,
+        )
+
+
+# How the value of a field is checked, see F.text
+TEXT_NONE = 0    # no value expected
+TEXT_Y = 1       # "Y" or no value
+TEXT_ANY = 2     # any value
+TEXT_XREF = 3    # xref to another record, or inline value
+
+
+class Grammar_Tables:
+    """
+    A grammar compiled into flat tables, so that parsing does not need
+    recursion and does as little work as possible for each line.
+    Each F in the grammar becomes a state (an index in the various lists
+    below). Transitions from a parent to its children are stored in a
+    single dict, indexed by (parent state, tag).
+    """
+
+    ROOT = 0   # state for the root of the grammar
 
-        if self.text is None:
+    def __init__(self, root: F):
+        self.transitions: Dict[Tuple[int, str], int] = {}
+        self.tag: List[str] = []
+        self.text: List[int] = []
+        self.max: List[int] = []
+
+        # For each state, the children that must be counted (those with a
+        # minimal or maximal number of occurrences).
+        self.counted: List[Set[str]] = []
+
+        # For each state, the children that must occur a minimal number of
+        # times, in the order they were declared in the grammar.
+        self.required: List[List[Tuple[str, int]]] = []
+
+        states: Dict[int, int] = {}   # id(F) -> state
+        todo: List[F] = [root]
+        self._add_state(root)
+        states[id(root)] = self.ROOT
+
+        while todo:
+            f = todo.pop()
+            state = states[id(f)]
+            for c in (f.children or {}).values():
+                if id(c) not in states:
+                    states[id(c)] = self._add_state(c)
+                    todo.append(c)
+                self.transitions[(state, c.tag)] = states[id(c)]
+                if c.min > 0 or c.max != unlimited:
+                    self.counted[state].add(c.tag)
+                if c.min > 0:
+                    self.required[state].append((c.tag, c.min))
+
+    def _add_state(self, f: F) -> int:
+        self.tag.append(f.tag)
+        self.text.append(
+            TEXT_NONE if f.text is None
+            else TEXT_Y if f.text == "Y"
+            else TEXT_ANY if f.text == ""
+            else TEXT_XREF)
+        self.max.append(f.max)
+        self.counted.append(set())
+        self.required.append([])
+        return len(self.tag) - 1
+
+    def check_value(
+            self,
+            lexical: Lexical,
+            state: int,
+            p: Lexical_Line,
+            ) -> Tuple[str, bool]:
+        """
+        Check the value of the line `p`, which is parsed with the given
+        state.
+        :return: the value to store in the record, and whether the value is
+           an xref.
+        """
+        text = self.text[state]
+        if text == TEXT_ANY:
+            return p.value, False
+        elif text == TEXT_XREF:
+            return p.value, p.value != ''
+        elif text == TEXT_NONE:
             if p.value:
                 lexical.warning(
                     f"Unexpected text value after {p.tag}",
                     line=p.linenum,
                 )
-            val = ''
-
-        elif self.text == "Y":
+            return '', False
+        else:
             # Gedcom standard says value must be "Y", but PAF also uses "N".
             # The tag should simply not be there in this case
             if p.value and p.value not in ("Y", "N"):
@@ -97,85 +239,165 @@ class F:
                     f"Unexpected text value after {p.tag}, expected 'Y'",
                     line=p.linenum,
                 )
+            return p.value, False
 
-        elif self.text == "":
-            pass   # allow any text
+    def _check_children(
+            self,
+            lexical: Lexical,
+            state: int,
+            p: Lexical_Line,
+            counts: Optional[Dict[str, int]],
+            ) -> None:
+        """
+        We have parsed all children of p, make sure we are not missing any
+        """
+        for ctag, cmin in self.required[state]:
+            seen = counts.get(ctag, 0) if counts else 0
+            if seen < cmin:
+                ptag = p.tag if p.tag else "file"
+                count = cmin - seen
+                if ptag[0] != "_":
+                    lexical.fatal_error(
+                        f'Missing {count} occurrence of {ctag} in {ptag}',
+                        line=p.linenum,
+                    )
+                else:
+                    lexical.fatal_error(
+                        f'Skipping {ptag}, missing {count}'
+                        f' occurrence of {ctag}',
+                        line=p.linenum,
+                    )
 
-        else:
-            has_xref = p.value != ''
+    def iter_children(
+            self,
+            lexical: Lexical,
+            p: Lexical_Line,
+            has_xref: bool,
+            state: int = ROOT,
+            tree: Optional[GedcomTree] = None,
+            streaming: bool = False,
+            counts: Optional[Dict[str, int]] = None,
+            ) -> Iterator[GedcomRecord]:
+        """
+        Parse all children of `p` (which has already been consumed), and
+        return those that should be added to its fields, as soon as they
+        have been fully parsed and checked.
+        Nested records are handled via an explicit stack of frames, each
+        of which is a list:
+            [state, record, line, level, has_xref, counts, keep]
+        where counts is the number of occurrences of each counted child
+        (only created when needed), and keep is False for records that are
+        parsed but should be discarded.
 
-        r = GedcomRecord(
-            id=p.xref_id,
-            line=p.linenum,
-            tag=p.tag,
-            value=val,
-        )
+        :param tree: if specified, records are added to this tree, and
+           record in the frames is their index in the tree. Otherwise, a
+           GedcomRecord is created for each record.
+        :param streaming: if true (and a tree is specified), each of the
+           returned records is stored in its own tree, so that it can be
+           freed independently of the others.
+        :param counts: if specified, it is updated with the number of
+           occurrences of the children of p (for those children that have
+           a minimal or maximal number of occurrences).
+        """
+        transitions = self.transitions
+        counted = self.counted
+        maxes = self.max
+        check_value = self.check_value
+
+        root_level = p.level
+        stack: List[list] = [
+            [state, None, p, root_level, has_xref, counts, True]]
+        skip_level: Optional[int] = None   # skip lines nested deeper
 
         while True:
-            peeked = lexical.peek()
-            assert peeked is not None
-            if peeked.level <= p.level:
+            line = lexical.peek()
+            assert line is not None
+            level = line.level
+
+            if skip_level is not None:
+                if level > skip_level:
+                    lexical.consume()
+                    continue
+                skip_level = None
+
+            # Close all records that are complete
+            while len(stack) > 1 and stack[-1][3] >= level:
+                frame = stack.pop()
+                if not frame[4]:
+                    self._check_children(lexical, frame[0], frame[2], frame[5])
+                if tree is None:
+                    if len(stack) == 1 and frame[6]:
+                        yield frame[1]
+                else:
+                    tree.close(frame[1])
+                    if not frame[6]:
+                        tree.truncate(frame[1])
+                    elif len(stack) == 1:
+                        if streaming:
+                            tree.finish()
+                            yield tree.record(frame[1])
+                            tree = GedcomTree()
+                        else:
+                            yield tree.record(frame[1])
+
+            if level <= root_level:
                 break
 
-            cdescr = (
-                None
-                if self.children is None
-                else self.children.get(peeked.tag, None)
-            )
-            count = tags[peeked.tag] = tags.setdefault(peeked.tag, 0) + 1
-            reflevel = peeked.level
+            parent = stack[-1]
+            pstate = parent[0]
+            tag = line.tag
+            child = transitions.get((pstate, tag))
+            keep = True
 
-            if cdescr is None:
-                if peeked.tag[0] == '_':
+            if tag in counted[pstate]:
+                counts = parent[5]
+                if counts is None:
+                    counts = parent[5] = {}
+                count = counts[tag] = counts.get(tag, 0) + 1
+                if maxes[child] != unlimited and maxes[child] < count:
+                    lexical.warning(
+                        f'Too many {tag} in {parent[2].tag} (skipped)',
+                        line=line.linenum,
+                    )
+                    keep = False
+
+            if child is None:
+                if tag[0] == '_':
                     # A custom tag is allowed, and should accept anything
                     # ??? Wrong, the warning should be displayed elsewhere
                     lexical.warning(
-                        f"Custom tag ignored: {peeked.tag}",
-                        line=peeked.linenum)
+                        f"Custom tag ignored: {tag}",
+                        line=line.linenum)
                 else:
                     lexical.fatal_error(
-                        f"Unexpected tag: {self.tag or 'root'} > {peeked.tag}",
-                        line=peeked.linenum,
+                        f"Unexpected tag: {self.tag[pstate] or 'root'}"
+                        f" > {tag}",
+                        line=line.linenum,
                     )
 
                 # skip this record
-                while True:
-                    lexical.consume()
-                    peeked = lexical.peek()
-                    assert peeked is not None
-                    if peeked.level <= reflevel:
-                        break
+                lexical.consume()
+                skip_level = level
+                continue
 
+            lexical.consume()
+            val, xref = check_value(lexical, child, line)
+            if tree is None:
+                r = GedcomRecord(
+                    id=line.xref_id,
+                    line=line.linenum,
+                    tag=tag,
+                    value=val,
+                )
+                if keep and len(stack) > 1:
+                    parent[1].fields.append(r)
+                stack.append([child, r, line, level, xref, None, keep])
             else:
-                if cdescr.max != unlimited and cdescr.max < count:
-                    lexical.warning(
-                        f'Too many {peeked.tag} in {p.tag} (skipped)',
-                        line=peeked.linenum,
-                    )
-                    c = cdescr.parse(lexical)  # read until end of child record
-                else:
-                    c = cdescr.parse(lexical)  # read until end of child record
-                    if c is not None:
-                        r.fields.append(c)
-
-        # We have parsed all children, make sure we are not missing any
-
-        if self.children is not None and not has_xref:
-            # Not an xref, check we have the right children
-            for ctag, cdescr in self.children.items():
-                if tags.get(ctag, 0) < cdescr.min:
-                    ptag = p.tag if p.tag else "file"
-                    count = cdescr.min - tags.get(ctag, 0)
-                    if ptag[0] != "_":
-                        lexical.fatal_error(
-                            f'Missing {count} occurrence of {ctag} in {ptag}',
-                            line=p.linenum,
-                        )
-                    else:
-                        lexical.fatal_error(
-                            f'Skipping {ptag}, missing {count}'
-                            f' occurrence of {ctag}',
-                            line=p.linenum,
-                        )
+                stack.append([
+                    child,
+                    tree.append(line.linenum, tag, line.xref_id, val),
+                    line, level, xref, None, keep])
 
-        return r
+        frame = stack.pop()
+        if not frame[4]:
+            self._check_children(lexical, frame[0], frame[2], frame[5])
@@ -1,3 +1,4 @@
+import mmap
 from typing import Optional, BinaryIO, Union
 
 
@@ -6,42 +7,162 @@ class File:
     Represents a gedcom file to be imported.
     The filename could be either the path to a file on the disk (for instance
     when running from 'manage.py'), or actual binary data uploaded by the user.
+
+    Files on the disk are memory-mapped by default, so that we do not need to
+    read the whole file in memory first. Line terminators are found with
+    bulk searches in the buffer rather than by looking at each byte in turn.
+
+    It is possible to only read part of the file, between the `start` and
+    `end` offsets, which should be at the beginning of lines.
     """
 
-    def __init__(self, filename: Union[str, BinaryIO]):
+    def __init__(
+            self,
+            filename: Union[str, BinaryIO],
+            use_mmap: bool = True,
+            start: int = 0,
+            end: int = None,
+            ):
+        self.buffer: Union[bytes, mmap.mmap] = b''
+        self._mmap: Optional[mmap.mmap] = None
+
         if isinstance(filename, str):
             # Do not assume a specific encoding, so read as bytes
             with open(filename, "rb") as f:
-                self.buffer: bytes = f.read()
+                if use_mmap:
+                    try:
+                        self._mmap = mmap.mmap(
+                            f.fileno(), 0, access=mmap.ACCESS_READ)
+                        self.buffer = self._mmap
+                    except (ValueError, OSError):
+                        # Empty files cannot be mapped
+                        self.buffer = f.read()
+                else:
+                    self.buffer = f.read()
             self.name = filename
         else:
             self.buffer = filename.read()
             self.name = '<stdin>'
 
-        self.pos: Optional[int] = 0
+        self.pos: Optional[int] = start
+        self.size = len(self.buffer) if end is None else end
+
+        # Position of the next \n and \r in the buffer, at or after self.pos.
+        # They are only searched again once we have moved past them, so that
+        # a file using only one kind of terminator is scanned only once.
+        self._next_lf = -1
+        self._next_cr = -1
+
+    def close(self) -> None:
+        """
+        Release the memory mapping, if any
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self.buffer = b''
+        self.size = 0
+        self.pos = None
+
+    def utf16_encoding(self) -> Optional[str]:
+        """
+        The codec to use if the rest of the file is encoded in UTF-16 (with
+        or without a byte order mark), None otherwise.
+        """
+        p = self.pos
+        if p is None:
+            return None
+        head = self.buffer[p:p + 2]
+        if head in (b'\xff\xfe', b'\xfe\xff'):
+            return 'utf-16'     # the byte order mark is removed
+        elif head[1:2] == b'\x00' and head[0:1] != b'\x00':
+            return 'utf-16-le'
+        elif head[0:1] == b'\x00' and head[1:2] != b'\x00':
+            return 'utf-16-be'
+        return None
+
+    def transcode(self, encoding: str) -> None:
+        """
+        Decode the rest of the file, and store it as UTF-8 instead, so that
+        lines are terminated by single bytes.
+        """
+        p = self.pos
+        if p is None:
+            return
+        text = bytes(self.buffer[p:self.size]).decode(encoding, "replace")
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self.buffer = text.encode('utf-8')
+        self.size = len(self.buffer)
+        self.seek(0)
+
+    def seek(self, pos: int) -> None:
+        """
+        Move to a new position, which must be at the beginning of a line
+        """
+        self.pos = pos
+        self._next_lf = -1
+        self._next_cr = -1
+
+    def read_lines(self, size: int) -> bytes:
+        """
+        Return the next lines, including their terminators: at least `size`
+        bytes (or up to the end of the file), extended to the end of a line.
+        """
+        p = self.pos
+        if p is None or p >= self.size:
+            return b''
+
+        buffer = self.buffer
+        end = min(p + size, self.size)
+        if end < self.size:
+            lf = buffer.find(b'\n', end - 1, self.size)
+            cr = buffer.find(b'\r', end - 1, self.size)
+            if lf < 0 and cr < 0:
+                end = self.size
+            elif cr < 0 or (0 <= lf < cr):
+                end = lf + 1
+            else:
+                end = cr + 1
+                if end < self.size and buffer[end:end + 1] == b"\n":
+                    end += 1
+
+        self.pos = end
+        return buffer[p:end]
 
     def readline(self) -> Optional[bytes]:
         """
         Return the next line, omitting the \n, \r or \r\n terminator
         """
         p = self.pos
-        if p is None or p >= len(self.buffer):
+        if p is None or p >= self.size:
             return None
 
-        while True:
-            c = self.buffer[p]
-            if c == 10:
-                result = self.buffer[self.pos:p]
-                self.pos = p + 1
-                return result
-            elif c == 13:
-                result = self.buffer[self.pos:p]
-                self.pos = p + 1
-                if self.pos < len(self.buffer) and self.buffer[self.pos] == 10:
-                    self.pos += 1
-                return result
-            p += 1
-            if p >= len(self.buffer):
-                result = self.buffer[self.pos:]
-                self.pos = None
-                return result
+        if self._next_lf != -2 and self._next_lf < p:
+            self._next_lf = self.buffer.find(b'\n', p, self.size)
+            if self._next_lf == -1:
+                self._next_lf = -2    # no more \n in the file
+        if self._next_cr != -2 and self._next_cr < p:
+            self._next_cr = self.buffer.find(b'\r', p, self.size)
+            if self._next_cr == -1:
+                self._next_cr = -2    # no more \r in the file
+
+        lf = self._next_lf
+        cr = self._next_cr
+
+        if lf < 0 and cr < 0:
+            result = self.buffer[p:self.size]
+            self.pos = None
+            return result
+
+        if cr < 0 or (0 <= lf < cr):
+            result = self.buffer[p:lf]
+            self.pos = lf + 1
+            return result
+
+        result = self.buffer[p:cr]
+        self.pos = cr + 1
+        if lf == self.pos:
+            self.pos += 1
+        return result
@@ -0,0 +1,226 @@
+"""
+Generates synthetic GEDCOM files, for benchmarks and tests.
+
+The output only depends on the parameters (and the seed), so that timings
+obtained on different machines or different releases can be compared.
+
+Example of use:
+    with open("big.ged", "wb") as f:
+        generate_gedcom(f, individuals=100_000, cont_density=0.3)
+"""
+
+import random
+from typing import BinaryIO, Dict, List, Optional
+
+
+# Encodings that can be declared in HEAD.CHAR, and the python codec used to
+# write the file (see Lexical.set_encoding)
+ENCODINGS: Dict[str, str] = {
+    "UTF-8": "utf-8",
+    "ANSEL": "iso-8859-1",
+    "ANSI": "iso-8859-1",
+    "ASCII": "ascii",
+}
+
+_GIVEN = [
+    "Jean", "Marie", "Pierre", "Anne", "Louis", "Jeanne", "François",
+    "Marguerite", "Jacques", "Élisabeth", "Nicolas", "Catherine", "Hélène",
+    "Jérôme", "Agnès", "Joseph", "Françoise", "André", "Thérèse", "Paul",
+]
+_SURNAMES = [
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit",
+    "Durand", "Leroy", "Moreau", "Simon", "Laurent", "Lefèvre", "Michel",
+    "García", "Müller", "Schröder", "Nuñez", "Østergård", "Ågren",
+]
+_PLACES = [
+    "Paris, Île-de-France, France", "Lyon, Rhône, France",
+    "Bordeaux, Gironde, France", "Genève, Genève, Suisse",
+    "München, Bayern, Deutschland", "Sevilla, Andalucía, España",
+    "Québec, Québec, Canada", "Bruxelles, Bruxelles, Belgique",
+]
+_MONTHS = [
+    "JAN", "FEB", "MAR", "APR", "MAY", "JUN",
+    "JUL", "AUG", "SEP", "OCT", "NOV", "DEC",
+]
+_WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod"
+    " tempor incididunt ut labore et dolore magna aliqua registre paroisse"
+    " baptême mariage sépulture témoin acte"
+).split()
+
+
+class _Writer:
+    """
+    Accumulates the lines of the file
+    """
+
+    def __init__(self, rng: random.Random, cont_density: float):
+        self.lines: List[str] = []
+        self.rng = rng
+        self.cont_density = cont_density
+
+    def add(self, level: int, tag: str, value: str = '',
+            xref: Optional[str] = None) -> None:
+        self.lines.append(
+            f"{level} {xref} {tag}" if xref else f"{level} {tag}")
+        if value:
+            self.lines[-1] += f" {value}"
+
+    def text(self, level: int, tag: str, words: int) -> None:
+        """
+        A long text value, split on CONT and CONC lines depending on the
+        density of continuation lines.
+        """
+        rng = self.rng
+        self.add(level, tag, " ".join(rng.choices(_WORDS, k=words)))
+        while rng.random() < self.cont_density:
+            cont = "CONT" if rng.random() < 0.5 else "CONC"
+            self.add(
+                level + 1, cont,
+                " ".join(rng.choices(_WORDS, k=rng.randint(4, 12))))
+
+
+def _date(rng: random.Random, year: int) -> str:
+    return f"{rng.randint(1, 28)} {rng.choice(_MONTHS)} {year}"
+
+
+def generate_gedcom(
+        out: BinaryIO,
+        individuals: int = 1000,
+        families: Optional[int] = None,
+        sources: Optional[int] = None,
+        notes: Optional[int] = None,
+        objects: Optional[int] = None,
+        cont_density: float = 0.2,
+        encoding: str = "UTF-8",
+        seed: int = 0,
+        ) -> None:
+    """
+    Write a synthetic, but valid, GEDCOM file.
+    :param families: number of FAM records, defaults to half the number of
+       individuals.
+    :param sources: number of SOUR records, defaults to one for every 20
+       individuals.
+    :param notes: number of toplevel NOTE records, defaults to one for
+       every 10 individuals.
+    :param objects: number of toplevel OBJE records, defaults to one for
+       every 50 individuals.
+    :param cont_density: the probability that a text continues on one more
+       CONT or CONC line (so 0.5 means one continuation line on average).
+    :param encoding: one of ENCODINGS. Characters that cannot be
+       represented are replaced with '?'.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported encoding {encoding}")
+
+    rng = random.Random(seed)
+    w = _Writer(rng, cont_density)
+
+    families = individuals // 2 if families is None else families
+    sources = max(1, individuals // 20) if sources is None else sources
+    notes = individuals // 10 if notes is None else notes
+    objects = individuals // 50 if objects is None else objects
+
+    w.add(0, "HEAD")
+    w.add(1, "SOUR", "GENEAPROVE_BENCHMARK")
+    w.add(2, "NAME", "Synthetic data")
+    w.add(1, "DATE", "1 JAN 2020")
+    w.add(1, "SUBM", "@SUBM1@")
+    w.add(1, "GEDC")
+    w.add(2, "VERS", "5.5.1")
+    w.add(2, "FORM", "LINEAGE-LINKED")
+    w.add(1, "CHAR", encoding)
+    w.add(0, "SUBM", xref="@SUBM1@")
+    w.add(1, "NAME", "Benchmark")
+
+    # Each individual is either a spouse or a child in a random family.
+    # Birth years increase with the individual's id.
+    fams: List[List[int]] = [[] for _ in range(families)]   # children
+    husb: List[Optional[int]] = [None] * families
+    wife: List[Optional[int]] = [None] * families
+    famc: List[Optional[int]] = [None] * individuals
+    fams_of: List[List[int]] = [[] for _ in range(individuals)]
+    birth: List[int] = [0] * individuals
+
+    for i in range(individuals):
+        birth[i] = 1600 + (i * 300) // max(1, individuals)
+    if families:
+        for i in range(individuals):
+            f = rng.randrange(families)
+            if i % 3 == 0 and husb[f] is None:
+                husb[f] = i
+                fams_of[i].append(f)
+            elif i % 3 == 1 and wife[f] is None:
+                wife[f] = i
+                fams_of[i].append(f)
+            else:
+                fams[f].append(i)
+                famc[i] = f
+
+    for i in range(individuals):
+        w.add(0, "INDI", xref=f"@I{i + 1}@")
+        w.add(1, "NAME",
+              f"{rng.choice(_GIVEN)} /{rng.choice(_SURNAMES)}/")
+        w.add(1, "SEX", "M" if i % 3 == 0 else "F" if i % 3 == 1 else
+              rng.choice("MF"))
+        w.add(1, "BIRT")
+        w.add(2, "DATE", _date(rng, birth[i]))
+        w.add(2, "PLAC", rng.choice(_PLACES))
+        if sources and rng.random() < 0.5:
+            w.add(2, "SOUR", f"@S{rng.randrange(sources) + 1}@")
+            w.add(3, "PAGE", f"folio {rng.randint(1, 500)}")
+        if rng.random() < 0.6:
+            w.add(1, "DEAT")
+            w.add(2, "DATE", _date(rng, birth[i] + rng.randint(0, 90)))
+            w.add(2, "PLAC", rng.choice(_PLACES))
+        if rng.random() < 0.3:
+            w.add(1, "OCCU", rng.choice(_WORDS))
+        if rng.random() < 0.3:
+            w.text(1, "NOTE", rng.randint(5, 20))
+        if notes and rng.random() < 0.2:
+            w.add(1, "NOTE", f"@N{rng.randrange(notes) + 1}@")
+        if objects and rng.random() < 0.1:
+            w.add(1, "OBJE", f"@O{rng.randrange(objects) + 1}@")
+        if famc[i] is not None:
+            w.add(1, "FAMC", f"@F{famc[i] + 1}@")
+        for f in fams_of[i]:
+            w.add(1, "FAMS", f"@F{f + 1}@")
+
+    for f in range(families):
+        w.add(0, "FAM", xref=f"@F{f + 1}@")
+        if husb[f] is not None:
+            w.add(1, "HUSB", f"@I{husb[f] + 1}@")
+        if wife[f] is not None:
+            w.add(1, "WIFE", f"@I{wife[f] + 1}@")
+        for c in fams[f]:
+            w.add(1, "CHIL", f"@I{c + 1}@")
+        if rng.random() < 0.7:
+            w.add(1, "MARR")
+            w.add(2, "DATE", _date(rng, 1620 + (f * 300) // families))
+            w.add(2, "PLAC", rng.choice(_PLACES))
+
+    for s in range(sources):
+        w.add(0, "SOUR", xref=f"@S{s + 1}@")
+        w.add(1, "TITL", f"Registre paroissial {s + 1}")
+        w.add(1, "AUTH", rng.choice(_SURNAMES))
+        w.add(1, "PUBL", rng.choice(_PLACES))
+        if rng.random() < 0.5:
+            w.text(1, "NOTE", rng.randint(10, 30))
+
+    for n in range(notes):
+        w.add(0, "NOTE", " ".join(rng.choices(_WORDS, k=rng.randint(5, 20))),
+              xref=f"@N{n + 1}@")
+        while rng.random() < cont_density:
+            w.add(1, "CONT" if rng.random() < 0.5 else "CONC",
+                  " ".join(rng.choices(_WORDS, k=rng.randint(4, 12))))
+
+    for o in range(objects):
+        w.add(0, "OBJE", xref=f"@O{o + 1}@")
+        w.add(1, "FILE", f"media/image{o + 1}.jpg")
+        w.add(2, "FORM", "jpg")
+        w.add(2, "TITL", f"Image {o + 1}")
+
+    w.add(0, "TRLR")
+
+    out.write(
+        ("\n".join(w.lines) + "\n").encode(ENCODINGS[encoding], "replace"))
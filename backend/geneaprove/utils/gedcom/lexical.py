@@ -1,8 +1,23 @@
-from typing import Optional, Callable, NoReturn
+import re
+from typing import Optional, Callable, NoReturn, List, Tuple, Iterator
 from .exceptions import Invalid_Gedcom
 from .file import File
 
 
+# Lines are decoded and split in blocks of roughly this size
+BLOCK_SIZE = 1024 * 1024
+
+# Characters other than \r and \n that str.splitlines() considers as line
+# terminators, but not File.readline()
+_OTHER_EOL = re.compile(r'[\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+
+_EOL = re.compile('\r\n|\r|\n')
+_EOL_BYTES = re.compile(rb'\r\n|\r|\n')
+
+# (level, tag, xref_id, value) for one line of the file
+Line_Tokens = Tuple[int, str, Optional[str], str]
+
+
 class Lexical_Line:
     __slots__ = ("linenum", "level", "tag", "xref_id", "value")
 
@@ -25,47 +40,76 @@ class Lexical:
     """
     Return lines of the GEDCOM file, taking care of concatenation when
     needed, and potentially skipping levels
+
+    Lines are decoded and split in blocks (see BLOCK_SIZE), rather than one
+    at a time. When a CHAR line is found, the rest of the block is decoded
+    again with the new encoding.
     """
 
     def __init__(
             self,
             stream: File,
             print_warning: Callable[[str, int, str], None],
+            line: int = 0,
+            charset: Optional[str] = None,
+            progress: Optional[Callable[[int, int], None]] = None,
             ):
         """
         Lexical parser for a GEDCOM file. This returns lines one by one,
         after splitting them into components. This automatically groups
         continuation lines as appropriate
+        :param line: the number of lines before the start of the stream,
+           when only part of the file is parsed. In this case, the stream
+           does not need to start with the HEAD.
+        :param charset: the CHAR from the HEAD, when only part of the file
+           is parsed.
+        :param progress: called after each block of lines has been read,
+           with the offset in the file and the size of the file.
         """
         self.file = stream
+        self.progress = progress
         self.level = 0     # Level of the current line
-        self.line = 0      # Current line
+        self.line = line   # Current line
         self.print_warning = print_warning
 
+        self.charset: Optional[str] = None   # as found in the HEAD.CHAR
         self.encoding = 'iso_8859_1'
         self.decode = self.decode_any
 
+        # UTF-16 files are converted to UTF-8 before parsing
+        self.utf16 = False
+        if self.line == 0:
+            utf16 = self.file.utf16_encoding()
+            if utf16 is not None:
+                self.file.transcode(utf16)
+                self.utf16 = True
+                self.encoding = 'utf-8'
+
+        if charset is not None:
+            self.set_encoding(charset)
+
         line = self.file.readline()
         assert line is not None
 
-        if self.line == 1 and line[0: 3] == b"\xEF\xBB\xBF":
+        if self.line == 0 and line[0: 3] == b"\xEF\xBB\xBF":
             self.encoding = 'utf-8'
             line = line[3:]
 
         # current line, after resolving CONT and CONC
         self.current: Optional[Lexical_Line] = None
 
-        self.prefetch = self._parse_line(line)
-        if (
-                self.prefetch is None
-                or self.prefetch.level != 0
-                or self.prefetch.tag != 'HEAD'
+        first = self._parse_line(line)
+        if self.line == 1 and (
+                first is None
+                or first[0] != 0
+                or first[1] != 'HEAD'
            ):
             self.fatal_error(
                 "Invalid gedcom file, first line must be '0 HEAD'"
                 f" got {line!r}",
             )
 
+        self._next = self._iter_lines(first).__next__
         self._readline()
 
     def decode_heredis_ansi(self, value: bytes) -> str:
@@ -87,6 +131,7 @@ class Lexical:
         """
         Set the encoding of the source
         """
+        self.charset = encoding
         if encoding == "ANSEL":
             self.encoding = "iso-8859-1"
             self.decode = self.decode_any
@@ -95,7 +140,7 @@ class Lexical:
             self.encoding = "heredis-ansi"
             self.decode = self.decode_heredis_ansi
         elif encoding == "UNICODE":
-            self.encoding = "utf-16"
+            self.encoding = "utf-8" if self.utf16 else "utf-16"
             self.decode = self.decode_any
         elif encoding == "UTF-8":
             self.encoding = "utf-8"
@@ -106,20 +151,10 @@ class Lexical:
         else:
             self.fatal_error(f'Unknown encoding {encoding}')
 
-    def _parse_line(self, raw_line: Optional[bytes]) -> Optional[Lexical_Line]:
+    def _tokens(self, g: List[str], line: str) -> Line_Tokens:
         """
-        Parse one line into its components
+        Check the first three fields of a line, and return its components
         """
-        self.line += 1
-        if not raw_line:
-            return None
-
-        # The standard limits the length of lines, but some software ignore
-        # that, like Reunion on OSX for instance (#20)
-        # The call to split gets rid of leading and trailing whitespaces
-
-        line = self.decode(raw_line).split('\n')[0]
-        g = line.split(None, 2)   # Extract first three fields
         if len(g) < 2:
             self.fatal_error(f"Invalid line '{line}'")
 
@@ -127,31 +162,163 @@ class Lexical:
             # "1 @I0001@ INDI"
             # "1 @N0001@ NOTE value"
             tag_and_val = g[2].split(None, 1)
-            r = Lexical_Line(
-                linenum=self.line,
-                level=int(g[0]),
-                tag=tag_and_val[0],
-                xref_id=g[1],
-                value=tag_and_val[1] if len(tag_and_val) == 2 else '',
+            return (
+                int(g[0]),
+                tag_and_val[0].upper(),
+                g[1],
+                tag_and_val[1] if len(tag_and_val) == 2 else '',
             )
         else:
             # "2 RESI where"
-            r = Lexical_Line(
-                linenum=self.line,
-                level=int(g[0]),
-                tag=g[1],
-                xref_id=None,
-                value=g[2] if len(g) == 3 else '',
+            return (
+                int(g[0]),
+                g[1].upper(),
+                None,
+                g[2] if len(g) == 3 else '',
             )
 
+    def _parse_line(self, raw_line: Optional[bytes]) -> Optional[Line_Tokens]:
+        """
+        Parse one line into its components
+        """
+        self.line += 1
+        if not raw_line:
+            return None
+
+        # The standard limits the length of lines, but some software ignore
+        # that, like Reunion on OSX for instance (#20)
+        # The call to split gets rid of leading and trailing whitespaces
+
+        line = self.decode(raw_line).split('\n')[0]
+        r = self._tokens(line.split(None, 2), line)
+
         # ??? Should be handled in the importer itself. Here, we are not
         # checking that this is inside SUBM
 
-        if r.level == 1 and r.tag == "CHAR":
-            self.set_encoding(r.value)
+        if r[0] == 1 and r[1] == "CHAR":
+            self.set_encoding(r[3])
 
         return r
 
+    def _read_block(self) -> Tuple[int, bytes, List[str]]:
+        """
+        Read and decode the next block of lines.
+        An empty line is returned at the end of the file.
+        :return: the offset of the block in the file, the block itself, and
+           its lines.
+        """
+        start = self.file.pos
+        if self.progress is not None:
+            self.progress(
+                self.file.size if start is None else start, self.file.size)
+
+        if self.encoding == 'utf-16':
+            # Line terminators are not single bytes, so decode each line
+            # on its own.
+            raw = self.file.readline()
+            if not raw:
+                return start, b'', ['']
+            line = self.decode(raw).split('\n')[0]
+            if not line:
+                self.fatal_error("Invalid line ''", line=self.line + 1)
+            return start, raw, [line]
+
+        block = self.file.read_lines(BLOCK_SIZE)
+        if not block:
+            return start, block, ['']
+
+        text = self.decode(block)
+        if _OTHER_EOL.search(text) is None:
+            return start, block, text.splitlines()
+
+        lines = _EOL.split(text)
+        if lines[-1] == '':
+            lines.pop()   # after the last terminator
+        return start, block, lines
+
+    def _iter_lines(
+            self,
+            current: Optional[Line_Tokens],
+            ) -> Iterator[Lexical_Line]:
+        """
+        Return the logical lines, after resolving CONT and CONC.
+        As before, we read one line ahead: a logical line is returned once
+        the first line of the next one has been parsed, so errors are
+        reported at the same time.
+        :param current: the first line of the file
+        """
+        line = self.line           # number of lines read so far
+        current_line = line        # line number for current
+        values: List[str] = []     # value of current, if continued
+
+        while current is not None:
+            start, block, lines = self._read_block()
+
+            first_line = line
+            for text in lines:
+                line += 1
+                self.line = line
+                g = text.split(None, 2)
+
+                if len(g) >= 2 and g[1][0] != '@':
+                    # "2 RESI where"
+                    level = int(g[0])
+                    tag = g[1].upper()
+                    xref = None
+                    value = g[2] if len(g) == 3 else ''
+                elif not text:
+                    # An empty line is the end of the file
+                    yield Lexical_Line(
+                        linenum=current_line,
+                        level=current[0],
+                        tag=current[1],
+                        xref_id=current[2],
+                        value=''.join(values) if values else current[3],
+                    )
+                    return
+                else:
+                    level, tag, xref, value = self._tokens(g, text)
+
+                if tag == "CONT":
+                    if not values:
+                        values.append(current[3])
+                    values.append("\n")
+                    values.append(value)
+                    continue
+                elif tag == "CONC":
+                    if not values:
+                        values.append(current[3])
+                    values.append(value)
+                    continue
+
+                # ??? Should be handled in the importer itself. Here, we are
+                # not checking that this is inside SUBM
+
+                reread = level == 1 and tag == "CHAR"
+                if reread:
+                    self.set_encoding(value)
+
+                yield Lexical_Line(
+                    linenum=current_line,
+                    level=current[0],
+                    tag=current[1],
+                    xref_id=current[2],
+                    value=''.join(values) if values else current[3],
+                )
+                current = (level, tag, xref, value)
+                current_line = line
+                values = []
+
+                if reread:
+                    # The rest of the block must be decoded again
+                    count = line - first_line   # lines read in this block
+                    if count < len(lines):
+                        pos = 0
+                        for _ in range(count):
+                            pos = _EOL_BYTES.search(block, pos).end()
+                        self.file.seek(start + pos)
+                    break
+
     def peek(self) -> Optional[Lexical_Line]:
         return self.current
 
@@ -161,7 +328,9 @@ class Lexical:
         return c
 
     def _readline(self) -> None:
-        if not self.prefetch:
+        try:
+            self.current = self._next()
+        except StopIteration:
             self.current = Lexical_Line(
                 linenum=self.line + 1,
                 level=-1,
@@ -169,28 +338,3 @@ class Lexical:
                 xref_id=None,
                 value='',
             )
-            return
-
-        result = self.prefetch
-        value = result.value
-        self.prefetch = self._parse_line(self.file.readline())
-
-        while self.prefetch:
-            if self.prefetch.tag == "CONT":
-                value += "\n"
-                value += self.prefetch.value
-            elif self.prefetch.tag == "CONC":
-                value += self.prefetch.value
-            else:
-                break
-
-            self.prefetch = self._parse_line(self.file.readline())
-
-        # It seems that tags are case insensitive
-        self.current = Lexical_Line(
-            linenum=result.linenum,
-            level=result.level,
-            tag=result.tag,
-            xref_id=result.xref_id,
-            value=value,
-        )
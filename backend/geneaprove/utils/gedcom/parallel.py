@@ -0,0 +1,290 @@
+"""
+Parse a GEDCOM file using several processes.
+
+The file is split into chunks on level-0 boundaries (a line that starts with
+"0 "), once the HEAD has been parsed and the encoding of the file is known.
+Each chunk of toplevel records is then parsed in its own process, into a
+compact GedcomTree, and the trees are merged in file order.
+
+This is only used for files for which the result is known to be the same
+as when parsing sequentially. Otherwise (empty lines, UNICODE encoding,
+duplicate HEAD or TRLR,...) we fall back on the sequential parser.
+"""
+
+import concurrent.futures
+import io
+import logging
+import mmap
+import re
+from typing import (
+    Optional, BinaryIO, Union, List, Tuple, Dict, Callable, NamedTuple)
+from .exceptions import Invalid_Gedcom
+from .file import File
+from .grammar import FILE
+from .lexical import Lexical, Lexical_Line
+from .records import GedcomRecord, GedcomTree
+
+
+logger = logging.getLogger('geneaprove.gedcom')
+
+# Files smaller than this are always parsed sequentially
+MIN_PARALLEL_SIZE = 1024 * 1024
+
+# The beginning of a level-0 line
+_LEVEL0 = re.compile(rb'[\r\n]0 ')
+
+# Number of chunks per process, so that processes that finish early can
+# take on more work.
+CHUNKS_PER_PROCESS = 4
+
+
+class Chunk_Result(NamedTuple):
+    tree: Optional[GedcomTree]
+    counts: Dict[str, int]     # occurrences of toplevel records, see F.min
+    warnings: List[Tuple[int, str]]
+    error: Optional[str]       # an Invalid_Gedcom message
+    exception: Optional[Exception]   # any other exception
+    line: int                  # last line read by the lexical parser
+    charset: Optional[str]     # encoding in effect at the end of the chunk
+
+
+def _parse_chunk(
+        source: Union[str, bytes],
+        start: int,
+        end: Optional[int],
+        line: int,
+        charset: Optional[str],
+        ) -> Chunk_Result:
+    """
+    Parse all toplevel records between the offsets `start` and `end`.
+    This is run in a separate process.
+    :param source: either the name of the file, or the contents of the
+       chunk (in which case start and end are ignored).
+    :param line: number of lines before `start`.
+    """
+    warnings: List[Tuple[int, str]] = []
+
+    def pw(filename: str, line: int, msg: str) -> None:
+        warnings.append((line, msg))
+
+    f = (
+        File(source, start=start, end=end)
+        if isinstance(source, str)
+        else File(io.BytesIO(source))
+    )
+    counts: Dict[str, int] = {}
+    tree = GedcomTree()
+    lexical: Optional[Lexical] = None
+
+    try:
+        lexical = Lexical(f, print_warning=pw, line=line, charset=charset)
+        p = Lexical_Line(
+            linenum=0, xref_id=None, value='', tag='', level=-1)
+        root = tree.append(p.linenum, p.tag, p.xref_id, p.value)
+
+        # The check for missing toplevel records is done on the whole file
+        # when merging chunks, so we pretend the root is an xref here.
+        for _ in FILE.tables.iter_children(
+                lexical, p, has_xref=True, tree=tree, counts=counts):
+            pass
+
+        tree.close(root)
+        tree.finish()
+        return Chunk_Result(
+            tree, counts, warnings, None, None, lexical.line,
+            lexical.charset)
+
+    except Invalid_Gedcom as e:
+        return Chunk_Result(
+            None, counts, warnings, e.msg, None,
+            lexical.line if lexical else line,
+            lexical.charset if lexical else charset)
+
+    except Exception as e:
+        # Report it in the parent process, in file order
+        return Chunk_Result(
+            None, counts, warnings, None, e,
+            lexical.line if lexical else line,
+            lexical.charset if lexical else charset)
+
+    finally:
+        f.close()
+
+
+def _next_record(
+        buffer: Union[bytes, mmap.mmap],
+        start: int,
+        ) -> int:
+    """
+    The offset of the first level-0 line after `start`, or the size of the
+    buffer.
+    Continuation lines are always merged with the previous line, whatever
+    their level, so they are never the start of a record.
+    """
+    pos = start
+    while True:
+        m = _LEVEL0.search(buffer, pos)
+        if m is None:
+            return len(buffer)
+        g = re.split(rb'[\r\n]', buffer[m.end():m.end() + 100])[0].split()
+        if g and g[0][:1] == b'@' and len(g) > 1:
+            g = g[1:]
+        if not g or g[0].upper() not in (b'CONT', b'CONC'):
+            return m.start() + 1
+        pos = m.end()
+
+
+def _boundaries(
+        buffer: Union[bytes, mmap.mmap],
+        start: int,
+        count: int,
+        ) -> List[int]:
+    """
+    Split the buffer, after `start`, into at most `count` chunks of roughly
+    equal size, each of which starts on a level-0 line.
+    :return: the offsets of the beginning of each chunk, followed by the
+       size of the buffer.
+    """
+    size = len(buffer)
+    result = [start]
+    step = max(1, (size - start) // count)
+
+    for k in range(1, count):
+        p = _next_record(buffer, max(start + k * step, result[-1]))
+        if p >= size:
+            break
+        if p != result[-1]:
+            result.append(p)
+
+    if result[-1] != size:
+        result.append(size)
+    return result
+
+
+def _count_lines(
+        buffer: Union[bytes, mmap.mmap],
+        start: int,
+        end: int,
+        ) -> int:
+    """
+    Number of lines between the two offsets, which are at the beginning of
+    lines.
+    """
+    data = buffer[start:end]   # mmap has no count()
+    return data.count(b'\n') + data.count(b'\r') - data.count(b'\r\n')
+
+
+def parse_gedcom_parallel(
+        filename: Union[BinaryIO, str],
+        print_warning: Callable[[str, int, str], None],
+        processes: int,
+        sequential: Callable[[Union[BinaryIO, str]], Optional[GedcomRecord]],
+        ) -> Optional[GedcomRecord]:
+    """
+    Parse the file with several processes, and return a compact tree.
+    Warnings are reported in file order once all chunks have been parsed.
+    :param sequential: called to parse the file when it cannot be split.
+    """
+    f = File(filename)
+    buffer = f.buffer
+
+    # Streams were read into memory: keep that buffer (closing the file
+    # does not release it). Only the chunks are copied for the processes.
+    source: Union[str, bytes, mmap.mmap] = (
+        filename if isinstance(filename, str) else buffer)
+
+    # Empty lines are considered as the end of the file by the lexical
+    # parser, so we must parse sequentially to get the same result.
+    # UNICODE files do not use single byte line terminators.
+    if (
+            f.size < MIN_PARALLEL_SIZE
+            or buffer.find(b'\n\n') != -1
+            or buffer.find(b'\n\r') != -1
+            or buffer.find(b'\r\r') != -1
+            or buffer.find(b'\x00') != -1
+    ):
+        f.close()
+        return sequential(
+            filename if isinstance(filename, str) else io.BytesIO(source))
+
+    # The HEAD is parsed first, to find out the encoding
+
+    offsets = [0] + _boundaries(
+        buffer, _next_record(buffer, 0), processes * CHUNKS_PER_PROCESS)
+    lines = [0]
+    for k in range(1, len(offsets) - 1):
+        lines.append(
+            lines[-1] + _count_lines(buffer, offsets[k - 1], offsets[k]))
+    f.close()
+
+    def chunk(k: int) -> Union[str, bytes]:
+        if isinstance(source, str):
+            return source
+        return source[offsets[k]:offsets[k + 1]]
+
+    head = _parse_chunk(chunk(0), offsets[0], offsets[1], 0, None)
+    results = [head]
+
+    if head.error is None and len(offsets) > 2:
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            results.extend(executor.map(
+                _parse_chunk,
+                [chunk(k) for k in range(1, len(offsets) - 1)],
+                offsets[1:-1],
+                offsets[2:],
+                lines[1:],
+                [head.charset] * (len(offsets) - 2),
+            ))
+
+    # If there were errors, we parse again sequentially: the lexical parser
+    # reads ahead, so errors near the boundaries of chunks might otherwise
+    # be reported in a different order.
+    # Likewise if some toplevel records appear too many times, since the
+    # warnings depend on the order of chunks.
+
+    tables = FILE.tables
+    counts: Dict[str, int] = {}
+    for r in results:
+        if (
+                r.error is not None
+                or r.exception is not None
+                or r.charset != head.charset
+        ):
+            logger.info('Errors while parsing chunks, parsing sequentially')
+            return sequential(
+                filename if isinstance(filename, str) else io.BytesIO(source))
+
+        for tag, count in r.counts.items():
+            counts[tag] = counts.get(tag, 0) + count
+            child = tables.transitions[(tables.ROOT, tag)]
+            if 0 <= tables.max[child] < counts[tag]:
+                logger.info('Duplicate toplevel %s, parsing sequentially', tag)
+                return sequential(
+                    filename if isinstance(filename, str)
+                    else io.BytesIO(source))
+
+    # Report warnings in file order
+
+    name = filename if isinstance(filename, str) else '<stdin>'
+    for r in results:
+        for line, msg in r.warnings:
+            print_warning(name, line, msg)
+
+    # Check for missing toplevel records (HEAD, TRLR,...)
+
+    for ctag, cmin in tables.required[tables.ROOT]:
+        if counts.get(ctag, 0) < cmin:
+            raise Invalid_Gedcom(
+                f'{name}:{results[-1].line}'
+                f' Missing {cmin - counts.get(ctag, 0)}'
+                f' occurrence of {ctag} in file')
+
+    # Merge all trees, in file order
+
+    tree = results[0].tree
+    assert tree is not None
+    for r in results[1:]:
+        assert r.tree is not None
+        tree.extend(r.tree)
+    tree.close(0)
+    return tree.record(0)
@@ -1,4 +1,5 @@
-from typing import List, Optional, Generator, Tuple
+import array
+from typing import List, Optional, Generator, Tuple, Dict
 
 
 class GedcomRecord:
@@ -6,7 +7,7 @@ class GedcomRecord:
     Result of parsing one block of gedcom.
     """
 
-    __slot__ = [
+    __slots__ = [
         "line", "tag", "__value", "fields", "xref", "id", "__value_imported",
     ]
 
@@ -65,3 +66,244 @@ class GedcomRecord:
         if self.__value and self.__value[0] == '@':
             return self.value    # and mark as imported
         return None
+
+
+# Tags are interned for the whole process, so that trees only need to store
+# a small integer for each record.
+_tags: List[str] = []
+_tag_ids: Dict[str, int] = {}
+
+
+def tag_id(tag: str) -> int:
+    """
+    The unique id for the tag
+    """
+    t = _tag_ids.get(tag)
+    if t is None:
+        t = _tag_ids[tag] = len(_tags)
+        _tags.append(tag)
+    return t
+
+
+class GedcomTree:
+    """
+    A compact representation for a tree of gedcom records.
+    Rather than one GedcomRecord (and its list of fields) per line of the
+    file, records are stored in a few parallel arrays, in the order they
+    appear in the file (so the children of a record immediately follow it).
+    GedcomRecordView provides the usual GedcomRecord API on top of it.
+
+    Records are added with append() and close(). Once all records have been
+    added, finish() must be called before values can be read.
+    """
+
+    __slots__ = (
+        "lines", "ends", "tags", "value_offsets", "values", "ids",
+        "imported", "_pending", "_size",
+    )
+
+    def __init__(self):
+        self.lines = array.array('I')          # line number in the file
+        self.ends = array.array('I')           # index after last descendant
+        self.tags = array.array('H')           # see tag_id()
+        self.value_offsets = array.array('I')  # start of value in values
+        self.values = ''                       # all values, concatenated
+        self.ids: Dict[int, str] = {}          # xref id, for a few records
+        self.imported = bytearray()            # whether value was read
+
+        self._pending: List[str] = []   # values not added to self.values yet
+        self._size = 0                  # total length of values
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __getstate__(self) -> Tuple:
+        # Tag ids are only valid in the current process, so send the tag
+        # names along when the tree is pickled.
+        self.finish()
+        return (
+            self.lines, self.ends, self.tags, self.value_offsets,
+            self.values, self.ids, self.imported, self._size, list(_tags))
+
+    def __setstate__(self, state: Tuple) -> None:
+        (self.lines, self.ends, tags, self.value_offsets, self.values,
+         self.ids, self.imported, self._size, names) = state
+        self._pending = []
+        ids = [tag_id(n) for n in names]
+        self.tags = array.array('H', (ids[t] for t in tags))
+
+    def append(
+            self,
+            line: int,
+            tag: str,
+            id: Optional[str],
+            value: str,
+            ) -> int:
+        """
+        Add a new record, as the last child of the last record that hasn't
+        been closed yet.
+        :return: the index of the new record
+        """
+        index = len(self.lines)
+        self.lines.append(line)
+        self.ends.append(index + 1)
+        self.tags.append(tag_id(tag))
+        self.value_offsets.append(self._size)
+        self.imported.append(0)
+        if id is not None:
+            self.ids[index] = id
+        if value:
+            self._pending.append(value)
+            self._size += len(value)
+        return index
+
+    def close(self, index: int) -> None:
+        """
+        All children of the record have been added
+        """
+        self.ends[index] = len(self.lines)
+
+    def truncate(self, index: int) -> None:
+        """
+        Remove the record and all records after it. This is only valid
+        before finish() has been called.
+        """
+        size = self.value_offsets[index]
+        while self._size > size:
+            self._size -= len(self._pending.pop())
+        del self.lines[index:]
+        del self.ends[index:]
+        del self.tags[index:]
+        del self.value_offsets[index:]
+        del self.imported[index:]
+        for i in [i for i in self.ids if i >= index]:
+            del self.ids[i]
+
+    def finish(self) -> None:
+        """
+        All records have been added
+        """
+        self.values += ''.join(self._pending)
+        self._pending = []
+
+    def extend(self, other: "GedcomTree") -> None:
+        """
+        Add all children of the root of `other` (at index 0) as children of
+        the last record that hasn't been closed yet in self.
+        Both trees must have been finished.
+        """
+        delta = len(self.lines) - 1
+        size = len(self.values)
+        self.lines.extend(other.lines[1:])
+        self.ends.extend(array.array('I', (e + delta for e in other.ends[1:])))
+        self.tags.extend(other.tags[1:])
+        self.value_offsets.extend(array.array(
+            'I', (v + size for v in other.value_offsets[1:])))
+        self.imported.extend(other.imported[1:])
+        self.ids.update((i + delta, id) for i, id in other.ids.items())
+        self.values += other.values
+        self._size = len(self.values)
+
+    def value(self, index: int) -> str:
+        """
+        The value of a record, without marking it as imported
+        """
+        start = self.value_offsets[index]
+        end = (
+            self.value_offsets[index + 1]
+            if index + 1 < len(self.value_offsets)
+            else self._size
+        )
+        return self.values[start:end]
+
+    def record(self, index: int) -> "GedcomRecordView":
+        return GedcomRecordView(self, index)
+
+    def children(self, index: int) -> List["GedcomRecordView"]:
+        result = []
+        ends = self.ends
+        c = index + 1
+        end = ends[index]
+        while c < end:
+            result.append(GedcomRecordView(self, c))
+            c = ends[c]
+        return result
+
+
+class GedcomRecordView(GedcomRecord):
+    """
+    A record stored in a GedcomTree.
+    These are lightweight objects, created on demand, which store no data
+    themselves.
+    """
+
+    __slots__ = ["_tree", "_index"]
+
+    def __init__(self, tree: GedcomTree, index: int):
+        # Do not call inherited constructor, all data is in the tree
+        self._tree = tree
+        self._index = index
+
+    @property   # type: ignore
+    def line(self) -> int:
+        return self._tree.lines[self._index]
+
+    @property   # type: ignore
+    def tag(self) -> str:
+        return _tags[self._tree.tags[self._index]]
+
+    @property   # type: ignore
+    def id(self) -> Optional[str]:
+        return self._tree.ids.get(self._index)
+
+    @property   # type: ignore
+    def xref(self) -> None:
+        return None
+
+    @property   # type: ignore
+    def fields(self) -> List["GedcomRecordView"]:
+        return self._tree.children(self._index)
+
+    @property
+    def value(self) -> str:
+        self._tree.imported[self._index] = 1
+        return self._tree.value(self._index)
+
+    def report_not_imported(
+            self,
+            prefix: str = "",
+            ) -> Generator[Tuple["GedcomRecord", str], None, None]:
+        """
+        Report all unimported fields
+        """
+        tree = self._tree
+        ends = tree.ends
+        imported = tree.imported
+
+        # The prefix to use for the children of each open ancestor
+        stack: List[Tuple[int, str]] = []   # (end of ancestor, prefix)
+
+        for index in range(self._index, ends[self._index]):
+            while stack and stack[-1][0] <= index:
+                stack.pop()
+            pr = stack[-1][1] if stack else prefix
+            tag = _tags[tree.tags[index]]
+
+            if not imported[index]:
+                value = tree.value(index)
+                if value:
+                    yield (
+                        GedcomRecordView(tree, index),
+                        f"{pr}{tag} ({value})",
+                    )
+
+            stack.append((ends[index], f"{pr}{tag}." if tag else pr))
+
+    def as_xref(self) -> Optional[str]:
+        """
+        Report the ID of the object that self points to, or None.
+        """
+        v = self._tree.value(self._index)
+        if v and v[0] == '@':
+            return self.value    # and mark as imported
+        return None
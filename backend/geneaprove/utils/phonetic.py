@@ -0,0 +1,251 @@
+"""
+Phonetic codes for names, so that spelling variants (Dupont and Dupond,
+Meyer and Maier,...) can be found when searching for a person.
+
+Three algorithms are available:
+  * soundex: the American Soundex, used for census indexes. It works best
+    for English names.
+  * daitch_mokotoff: better suited to Slavic, Germanic and Yiddish names.
+    A name can have several codes, when some letters can be pronounced in
+    different ways.
+  * french: the "Soundex2" adaptation of Soundex to French names (by
+    Frédéric Brouard).
+"""
+
+import re
+import unicodedata
+from typing import Callable, Dict, List, Set, Tuple
+
+# Letters that are not decomposed by unicodedata
+_SPECIAL_LETTERS = {
+    'ß': 'SS', 'Æ': 'AE', 'Œ': 'OE', 'Ø': 'O', 'Ł': 'L', 'Đ': 'D',
+    'Þ': 'TH',
+}
+
+
+def _letters(name: str) -> str:
+    """
+    The upper-cased name, without diacritics and non-letters
+    """
+    name = ''.join(
+        _SPECIAL_LETTERS.get(c, c) for c in name.upper())
+    name = unicodedata.normalize('NFKD', name)
+    return ''.join(c for c in name if 'A' <= c <= 'Z')
+
+
+def words(name: str) -> List[str]:
+    """
+    The words of a name (for instance a gedcom "John /Smith/" gives "John"
+    and "Smith"), which are coded independently.
+    """
+    return [w for w in re.split(r"[\s/,\-]+", name) if _letters(w)]
+
+
+#########
+# Soundex
+#########
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'),
+    **dict.fromkeys('CGJKQSXZ', '2'),
+    **dict.fromkeys('DT', '3'),
+    'L': '4',
+    **dict.fromkeys('MN', '5'),
+    'R': '6',
+}
+
+
+def soundex(name: str) -> Set[str]:
+    """
+    The American Soundex code of a word, for instance "R163" for Robert
+    """
+    letters = _letters(name)
+    if not letters:
+        return set()
+
+    result = letters[0]
+    last = _SOUNDEX_CODES.get(letters[0], '')
+    for c in letters[1:]:
+        code = _SOUNDEX_CODES.get(c, '')
+        if code and code != last:
+            result += code
+            if len(result) == 4:
+                break
+        if c not in 'HW':   # H and W do not separate identical codes
+            last = code
+    return {result.ljust(4, '0')}
+
+
+#################
+# Daitch-Mokotoff
+#################
+
+# For each sequence of letters, its code at the start of a name, before a
+# vowel, and in other cases. '' means the letters are not coded, '|'
+# separates alternatives.
+_DM_RULES: Dict[str, Tuple[str, str, str]] = {
+    'AI': ('0', '1', ''), 'AJ': ('0', '1', ''), 'AY': ('0', '1', ''),
+    'AU': ('0', '7', ''),
+    'A': ('0', '', ''),
+    'B': ('7', '7', '7'),
+    'CHS': ('5', '54', '54'),
+    'CH': ('5|4', '5|4', '5|4'),
+    'CK': ('5|45', '5|45', '5|45'),
+    'CSZ': ('4', '4', '4'), 'CZS': ('4', '4', '4'),
+    'CZ': ('4', '4', '4'), 'CS': ('4', '4', '4'),
+    'C': ('5|4', '5|4', '5|4'),
+    'DRZ': ('4', '4', '4'), 'DRS': ('4', '4', '4'),
+    'DSH': ('4', '4', '4'), 'DSZ': ('4', '4', '4'), 'DS': ('4', '4', '4'),
+    'DZH': ('4', '4', '4'), 'DZS': ('4', '4', '4'), 'DZ': ('4', '4', '4'),
+    'DT': ('3', '3', '3'), 'D': ('3', '3', '3'),
+    'EI': ('0', '1', ''), 'EJ': ('0', '1', ''), 'EY': ('0', '1', ''),
+    'EU': ('1', '1', ''),
+    'E': ('0', '', ''),
+    'FB': ('7', '7', '7'), 'F': ('7', '7', '7'),
+    'G': ('5', '5', '5'),
+    'H': ('5', '5', ''),
+    'IA': ('1', '', ''), 'IE': ('1', '', ''), 'IO': ('1', '', ''),
+    'IU': ('1', '', ''),
+    'I': ('0', '', ''),
+    'J': ('1|4', '|4', '|4'),
+    'KS': ('5', '54', '54'), 'KH': ('5', '5', '5'), 'K': ('5', '5', '5'),
+    'L': ('8', '8', '8'),
+    'MN': ('66', '66', '66'), 'M': ('6', '6', '6'),
+    'NM': ('66', '66', '66'), 'N': ('6', '6', '6'),
+    'OI': ('0', '1', ''), 'OJ': ('0', '1', ''), 'OY': ('0', '1', ''),
+    'O': ('0', '', ''),
+    'PF': ('7', '7', '7'), 'PH': ('7', '7', '7'), 'P': ('7', '7', '7'),
+    'Q': ('5', '5', '5'),
+    'RS': ('94|4', '94|4', '94|4'), 'RZ': ('94|4', '94|4', '94|4'),
+    'R': ('9', '9', '9'),
+    'SCHTSCH': ('2', '4', '4'), 'SCHTSH': ('2', '4', '4'),
+    'SCHTCH': ('2', '4', '4'), 'SCH': ('4', '4', '4'),
+    'SHTCH': ('2', '4', '4'), 'SHCH': ('2', '4', '4'),
+    'SHTSH': ('2', '4', '4'), 'SHT': ('2', '43', '43'),
+    'SHD': ('2', '43', '43'), 'SH': ('4', '4', '4'),
+    'STCH': ('2', '4', '4'), 'STSCH': ('2', '4', '4'),
+    'STRZ': ('2', '4', '4'), 'STRS': ('2', '4', '4'),
+    'STSH': ('2', '4', '4'), 'ST': ('2', '43', '43'),
+    'SC': ('2', '4', '4'),
+    'SZCZ': ('2', '4', '4'), 'SZCS': ('2', '4', '4'),
+    'SZT': ('2', '43', '43'), 'SZD': ('2', '43', '43'),
+    'SZ': ('4', '4', '4'),
+    'SD': ('2', '43', '43'),
+    'S': ('4', '4', '4'),
+    'TTSCH': ('4', '4', '4'), 'TTCH': ('4', '4', '4'),
+    'TTSZ': ('4', '4', '4'), 'TTS': ('4', '4', '4'), 'TTZ': ('4', '4', '4'),
+    'TCH': ('4', '4', '4'), 'TSCH': ('4', '4', '4'), 'TSH': ('4', '4', '4'),
+    'TRZ': ('4', '4', '4'), 'TRS': ('4', '4', '4'),
+    'TSZ': ('4', '4', '4'), 'TZS': ('4', '4', '4'),
+    'TS': ('4', '4', '4'), 'TC': ('4', '4', '4'), 'TZ': ('4', '4', '4'),
+    'TH': ('3', '3', '3'),
+    'T': ('3', '3', '3'),
+    'UI': ('0', '1', ''), 'UJ': ('0', '1', ''), 'UY': ('0', '1', ''),
+    'UE': ('0', '', ''),
+    'U': ('0', '', ''),
+    'V': ('7', '7', '7'),
+    'W': ('7', '7', '7'),
+    'X': ('5', '54', '54'),
+    'Y': ('1', '', ''),
+    'ZHDZH': ('2', '4', '4'), 'ZDZH': ('2', '4', '4'),
+    'ZDZ': ('2', '4', '4'), 'ZHD': ('2', '43', '43'),
+    'ZD': ('2', '43', '43'),
+    'ZSCH': ('4', '4', '4'), 'ZSH': ('4', '4', '4'),
+    'ZH': ('4', '4', '4'), 'ZS': ('4', '4', '4'),
+    'Z': ('4', '4', '4'),
+}
+_DM_LONGEST = max(len(k) for k in _DM_RULES)
+_DM_VOWELS = 'AEIOUY'
+
+
+def daitch_mokotoff(name: str) -> Set[str]:
+    """
+    The Daitch-Mokotoff codes of a word (six digits each), for instance
+    "619000" for Meyer and Maier.
+    """
+    letters = _letters(name)
+    if not letters:
+        return set()
+
+    # Each branch is the code so far and the last code emitted
+    branches: List[Tuple[str, str]] = [('', '')]
+    pos = 0
+    while pos < len(letters):
+        for size in range(min(_DM_LONGEST, len(letters) - pos), 0, -1):
+            rule = _DM_RULES.get(letters[pos:pos + size])
+            if rule is not None:
+                break
+        else:
+            pos += 1    # cannot happen, all letters have a rule
+            continue
+
+        if pos == 0:
+            alternatives = rule[0]
+        elif pos + size < len(letters) and letters[pos + size] in _DM_VOWELS:
+            alternatives = rule[1]
+        else:
+            alternatives = rule[2]
+        pos += size
+
+        # Identical adjacent codes are only kept once
+        branches = list({
+            (code if alt == last else code + alt, alt)
+            for code, last in branches
+            for alt in alternatives.split('|')
+        })
+
+    return {code[:6].ljust(6, '0') for code, _ in branches}
+
+
+#################
+# French Soundex2
+#################
+
+_FRENCH_START = (
+    ('GUI', 'KI'), ('GUE', 'KE'), ('GA', 'KA'), ('GO', 'KO'), ('GU', 'K'),
+    ('CA', 'KA'), ('CO', 'KO'), ('CU', 'KU'), ('Q', 'K'), ('CC', 'K'),
+    ('CK', 'K'),
+)
+_FRENCH_PREFIXES = (
+    ('MAC', 'MCC'), ('ASA', 'AZA'), ('KN', 'NN'), ('PF', 'FF'),
+    ('SCH', 'SSS'), ('PH', 'FF'),
+)
+
+
+def french(name: str) -> Set[str]:
+    """
+    The Soundex2 code of a word, for instance "DPN" for Dupont and Dupond.
+    """
+    letters = _letters(name)
+    if not letters:
+        return set()
+
+    for old, new in _FRENCH_START:
+        letters = letters.replace(old, new)
+    letters = letters[0] + re.sub('[EIOU]', 'A', letters[1:])
+    for old, new in _FRENCH_PREFIXES:
+        if letters.startswith(old):
+            letters = new + letters[len(old):]
+            break
+    letters = re.sub('(?<![CS])H', '', letters)
+    letters = re.sub('(?<!A)Y', '', letters)
+    letters = re.sub('[ADST]$', '', letters)
+    if letters:
+        letters = letters[0] + letters[1:].replace('A', '')
+    letters = re.sub(r'(.)\1+', r'\1', letters)
+    return {letters[:4]} if letters else set()
+
+
+ALGORITHMS: Dict[str, Callable[[str], Set[str]]] = {
+    'soundex': soundex,
+    'daitch_mokotoff': daitch_mokotoff,
+    'french': french,
+}
+
+
+def codes(algorithm: str, name: str) -> Set[str]:
+    """
+    All phonetic codes for the words of a name
+    """
+    encode = ALGORITHMS[algorithm]
+    return {c for w in words(name) for c in encode(w)}
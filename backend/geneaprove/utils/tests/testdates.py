@@ -275,3 +275,39 @@ class DateTestCase(unittest.TestCase):
             date.DateRange("2000-01-01").day_of_week(), "Saturday")
         self.assertEqual(  # in the future
             date.DateRange("2054-06-19").day_of_week(), "Friday")
+
+    def test_parse_date(self):
+        """Parsed dates are cached"""
+        date.parse_date.cache_clear()
+        d = date.parse_date("between 1700 and 1710")
+        self.assertIs(d, date.parse_date("between 1700 and 1710"))
+        self.assertEqual(d, date.DateRange("between 1700 and 1710"))
+        self.assertEqual(d.sort_date(),
+                         date.DateRange("between 1700 and 1710").sort_date())
+
+        info = date.parse_date.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_parse_dates(self):
+        """Parsing several dates at once gives the same result"""
+        texts = ["1655-11-27", "12 MAR 1765", "3 Jan 1500", "2000-02-30",
+                 "ABT 1800", "between 1700 and 1710", "to 1700", "1700",
+                 "12 vendemiaire an XII", "", None, "1655-11-27"]
+        result = date.parse_dates(texts)
+        for k, text in enumerate(texts):
+            d = date.DateRange(text or "")
+            valid = d.sort_date() is not None
+            self.assertEqual(
+                (result.sort_dates[k], result.earliest_julian_days[k],
+                 result.latest_julian_days[k], result.years[k]),
+                (d.sort_date(),
+                 d.earliest_julian_day if valid else None,
+                 d.latest_julian_day if valid else None,
+                 d.year()),
+                text)
+
+        # No julian days for dates that cannot be parsed
+        result = date.parse_dates([None, '', 'abc'])
+        self.assertEqual(result.sort_dates, [None, None, None])
+        self.assertEqual(result.earliest_julian_days, [None, None, None])
+        self.assertEqual(result.latest_julian_days, [None, None, None])
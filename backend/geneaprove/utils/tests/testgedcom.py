@@ -2,10 +2,14 @@
 unittest-based framework for testing units in GeneaProve.utils
 """
 
+import contextlib
+import io
 import unittest
 import os
 import os.path
-from ..gedcom import parse_gedcom
+from ..gedcom import parse_gedcom, iter_gedcom
+from ..gedcom import parallel
+from ..gedcom.generator import generate_gedcom, ENCODINGS
 from ..gedcom.exceptions import Invalid_Gedcom
 
 
@@ -50,3 +54,128 @@ class GedcomTestCase(unittest.TestCase):
         """Test gedcom validation errors"""
         self._process_dir(self.dir)
         self._process_dir(os.path.join(self.dir, "stress_tests"))
+
+    def test_gedcom_streaming(self):
+        """Streaming toplevel records gives the same result as parse_gedcom"""
+        filename = os.path.join(self.dir, "stress_tests", "TGC55C.ged")
+
+        def pw(filename: str, line: int, msg: str) -> None:
+            pass
+
+        full = parse_gedcom(filename, print_warning=pw)
+        assert full is not None
+        streamed = iter_gedcom(filename, print_warning=pw)
+        for expected in full.fields:
+            r = next(streamed)
+            self.assertEqual(
+                (expected.line, expected.tag, expected.id),
+                (r.line, r.tag, r.id))
+        self.assertRaises(StopIteration, next, streamed)
+
+        # Errors on the whole file are reported after the last record
+        streamed = iter_gedcom(
+            os.path.join(self.dir, "invalid4.ged"), print_warning=pw)
+        with self.assertRaises(Invalid_Gedcom):
+            for _ in streamed:
+                pass
+
+    def _check_same(self, expected, r):
+        self.assertEqual(
+            (expected.line, expected.tag, expected.id, expected.value),
+            (r.line, r.tag, r.id, r.value))
+        self.assertEqual(len(expected.fields), len(r.fields))
+        for e, f in zip(expected.fields, r.fields):
+            self._check_same(e, f)
+
+    def test_gedcom_default_warnings(self):
+        """Warnings are printed by default"""
+        filename = os.path.join(self.dir, "issue41.ged")
+        for parse in (parse_gedcom, lambda f: list(iter_gedcom(f))):
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                parse(filename)
+            self.assertEqual(
+                out.getvalue().splitlines()[0],
+                f"{filename}:14 Too many NICK in NAME (skipped)")
+
+    def test_gedcom_compact(self):
+        """The compact representation gives access to the same records"""
+        filename = os.path.join(self.dir, "stress_tests", "TGC55C.ged")
+
+        def pw(filename: str, line: int, msg: str) -> None:
+            pass
+
+        full = parse_gedcom(filename, print_warning=pw)
+        compact = parse_gedcom(filename, print_warning=pw, compact=True)
+        assert full is not None and compact is not None
+        self._check_same(full, compact)
+        self.assertEqual(list(full.report_not_imported()), [])
+        self.assertEqual(list(compact.report_not_imported()), [])
+
+        # Unimported values are reported with the full path
+        compact = parse_gedcom(filename, print_warning=pw, compact=True)
+        assert compact is not None
+        head = compact.fields[0]
+        not_imported = [msg for _, msg in head.report_not_imported()]
+        self.assertIn("HEAD.SOUR.NAME (GEDitCOM)", not_imported)
+
+    def test_gedcom_parallel(self):
+        """Parsing with several processes gives the same result"""
+        filename = os.path.join(self.dir, "stress_tests", "TGC55C.ged")
+        warnings = []
+
+        def pw(filename: str, line: int, msg: str) -> None:
+            warnings.append((line, msg))
+
+        full = parse_gedcom(filename, print_warning=pw)
+        expected_warnings = warnings[:]
+        del warnings[:]
+
+        with open(filename, 'rb') as f:
+            data = f.read()
+
+        saved = parallel.MIN_PARALLEL_SIZE
+        parallel.MIN_PARALLEL_SIZE = 0
+        try:
+            result = parse_gedcom(filename, print_warning=pw, processes=2)
+            file_warnings = warnings[:]
+            del warnings[:]
+            stream = parse_gedcom(
+                io.BytesIO(data), print_warning=pw, processes=2)
+        finally:
+            parallel.MIN_PARALLEL_SIZE = saved
+
+        assert full is not None and result is not None
+        self._check_same(full, result)
+        self.assertEqual(expected_warnings, file_warnings)
+
+        # Same when reading from a stream
+        assert stream is not None
+        self._check_same(full, stream)
+        self.assertEqual(expected_warnings, warnings)
+
+    def test_gedcom_generator(self):
+        """Synthetic files are valid and only depend on the parameters"""
+        for encoding in ENCODINGS:
+            out = io.BytesIO()
+            generate_gedcom(
+                out, individuals=200, cont_density=0.5, encoding=encoding,
+                seed=1)
+            data = out.getvalue()
+
+            again = io.BytesIO()
+            generate_gedcom(
+                again, individuals=200, cont_density=0.5, encoding=encoding,
+                seed=1)
+            self.assertEqual(data, again.getvalue())
+
+            warnings = []
+
+            def pw(filename: str, line: int, msg: str) -> None:
+                warnings.append(msg)
+
+            ged = parse_gedcom(io.BytesIO(data), print_warning=pw)
+            assert ged is not None
+            self.assertEqual([], warnings)
+            self.assertEqual(
+                200, len([f for f in ged.fields if f.tag == 'INDI']))
@@ -0,0 +1,116 @@
+"""
+unittest-based framework for testing units in GeneaProve.utils
+"""
+
+import io
+import unittest
+from ..gedcom import lexical
+from ..gedcom.file import File
+
+
+def lines(data: bytes):
+    """
+    The logical lines of a file, as (linenum, level, tag, xref, value)
+    """
+    lex = lexical.Lexical(File(io.BytesIO(data)), print_warning=None)
+    result = []
+    while True:
+        line = lex.consume()
+        if line.level == -1:
+            return result
+        result.append(
+            (line.linenum, line.level, line.tag, line.xref_id, line.value))
+
+
+class LexicalTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.block_size = lexical.BLOCK_SIZE
+
+    def tearDown(self):
+        lexical.BLOCK_SIZE = self.block_size
+
+    def test_char(self):
+        """The rest of the block is decoded again after a CHAR line"""
+        data = (
+            b"0 HEAD\n1 SOUR caf\xe9\n1 CHAR UTF-8\n"
+            + "0 @I1@ INDI\n1 NAME Émile\n0 TRLR\n".encode('utf-8'))
+        expected = [
+            (1, 0, 'HEAD', None, ''),
+            (2, 1, 'SOUR', None, 'café'),
+            (3, 1, 'CHAR', None, 'UTF-8'),
+            (4, 0, 'INDI', '@I1@', ''),
+            (5, 1, 'NAME', None, 'Émile'),
+            (6, 0, 'TRLR', None, ''),
+        ]
+        self.assertEqual(lines(data), expected)
+
+        # Same when the CHAR line ends a block, or is in a later block
+        for size in (1, 20, 30):
+            lexical.BLOCK_SIZE = size
+            self.assertEqual(lines(data), expected, msg=f"size={size}")
+
+    def test_other_terminators(self):
+        """\\x85 and \\u2028 are not line terminators"""
+        data = (
+            "0 HEAD\n1 CHAR UTF-8\n1 NOTE a\x85b\u2028c\u2029d\x0ce\n"
+            "0 TRLR\n").encode('utf-8')
+        self.assertEqual(
+            lines(data)[2],
+            (3, 1, 'NOTE', None, 'a\x85b\u2028c\u2029d\x0ce'))
+
+        # In latin-1, \x85 is a single byte
+        data = b"0 HEAD\n1 NOTE a\x85b\n0 TRLR\n"
+        self.assertEqual(lines(data)[1], (2, 1, 'NOTE', None, 'a\x85b'))
+
+    def test_line_terminators(self):
+        """\\n, \\r\\n and \\r give the same lines"""
+        text = "0 HEAD\n1 NOTE a\n2 CONT b\n2 CONC c\n0 TRLR\n"
+        expected = [
+            (1, 0, 'HEAD', None, ''),
+            (2, 1, 'NOTE', None, 'a\nbc'),
+            (5, 0, 'TRLR', None, ''),
+        ]
+        for eol in ("\n", "\r\n", "\r"):
+            data = text.replace("\n", eol).encode()
+            self.assertEqual(lines(data), expected, msg=repr(eol))
+            lexical.BLOCK_SIZE = 8
+            self.assertEqual(lines(data), expected, msg=repr(eol))
+            lexical.BLOCK_SIZE = self.block_size
+
+    def test_continuation(self):
+        """CONT and CONC lines can be in a different block"""
+        data = b"0 HEAD\n1 NOTE first\n" + b"".join(
+            b"2 CONT line %d\n2 CONC , more\n" % j for j in range(0, 20)
+        ) + b"0 TRLR\n"
+        expected = lines(data)
+        self.assertEqual(
+            expected[1][4],
+            'first' + ''.join(f'\nline {j}, more' for j in range(0, 20)))
+        self.assertEqual(expected[2], (43, 0, 'TRLR', None, ''))
+
+        for size in (1, 10, 16, 50):
+            lexical.BLOCK_SIZE = size
+            self.assertEqual(lines(data), expected, msg=f"size={size}")
+
+    def test_utf16(self):
+        """UTF-16 files, with or without byte order mark"""
+        text = (
+            "0 HEAD\r\n1 CHAR UNICODE\r\n0 @I1@ INDI\r\n1 NAME Émile\r\n"
+            "2 CONT 汉字\r\n0 TRLR\r\n")
+        expected = [
+            (1, 0, 'HEAD', None, ''),
+            (2, 1, 'CHAR', None, 'UNICODE'),
+            (3, 0, 'INDI', '@I1@', ''),
+            (4, 1, 'NAME', None, 'Émile\n汉字'),
+            (6, 0, 'TRLR', None, ''),
+        ]
+        for encoding in ('utf-16', 'utf-16-le', 'utf-16-be'):
+            self.assertEqual(
+                lines(text.encode(encoding)), expected, msg=encoding)
+
+        # UTF-8 byte order mark
+        self.assertEqual(
+            lines(b'\xef\xbb\xbf'
+                  + text.replace('UNICODE', 'UTF-8').encode('utf-8'))[3],
+            (4, 1, 'NAME', None, 'Émile\n汉字'))
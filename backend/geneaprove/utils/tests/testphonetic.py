@@ -0,0 +1,43 @@
+"""
+unittest-based framework for testing GeneaProve.utils.phonetic
+"""
+
+import unittest
+from .. import phonetic
+
+
+class PhoneticTestCase(unittest.TestCase):
+    """tests for phonetic.py"""
+
+    def test_soundex(self):
+        for name, code in (("Robert", "R163"), ("Rupert", "R163"),
+                           ("Ashcraft", "A261"), ("Tymczak", "T522"),
+                           ("Pfister", "P236"), ("Honeyman", "H555"),
+                           ("Lee", "L000")):
+            self.assertEqual(phonetic.soundex(name), {code}, name)
+
+    def test_daitch_mokotoff(self):
+        for name, codes in (
+                ("Meyer", {"619000"}),
+                ("Maier", {"619000"}),
+                ("Moskowitz", {"645740"}),
+                ("Moskovitz", {"645740"}),
+                ("Auerbach", {"097400", "097500"}),
+                ("Peters", {"734000", "739400"}),
+                ("Jackson", {"154600", "454600", "145460", "445460"}),
+                ("Schwarzenegger", {"474659", "479465"})):
+            self.assertEqual(phonetic.daitch_mokotoff(name), codes, name)
+
+    def test_french(self):
+        for name, code in (("Dupont", "DPN"), ("Dupond", "DPN"),
+                           ("Gauthier", "KTR"), ("Gautier", "KTR"),
+                           ("Philippe", "FLP"), ("Filipe", "FLP"),
+                           ("Mallet", "ML"), ("Müller", "MLR")):
+            self.assertEqual(phonetic.french(name), {code}, name)
+
+    def test_codes(self):
+        self.assertEqual(phonetic.words("Jean-Pierre /Dupont/"),
+                         ["Jean", "Pierre", "Dupont"])
+        self.assertEqual(phonetic.codes("french", "Jean-Pierre /Dupont/"),
+                         {"JN", "PR", "DPN"})
+        self.assertEqual(phonetic.codes("soundex", " / "), set())
@@ -0,0 +1,49 @@
+"""
+Disjoint sets (union-find), used to group personas that represent the same
+person.
+"""
+
+from typing import Dict
+
+
+class Union_Find:
+    """
+    Disjoint sets of integers (for instance persona ids). The representative
+    of each set is its smallest element, which is used as the main_id of
+    all the personas in the set.
+    Elements that were never passed to union() are in a set of their own.
+    """
+
+    def __init__(self):
+        self._parent: Dict[int, int] = {}
+
+    def find(self, x: int) -> int:
+        """
+        The representative of the set that contains x
+        """
+        parent = self._parent
+        root = x
+        p = parent.get(root, root)
+        while p != root:
+            root = p
+            p = parent.get(root, root)
+
+        # Path compression, so that later calls are faster
+        while x != root:
+            parent[x], x = root, parent[x]
+
+        return root
+
+    def union(self, a: int, b: int) -> int:
+        """
+        Merge the sets that contain a and b, and return the representative
+        of the merged set
+        """
+        ra = self.find(a)
+        rb = self.find(b)
+        if ra < rb:
+            self._parent[rb] = ra
+            return ra
+        elif rb < ra:
+            self._parent[ra] = rb
+        return rb
@@ -1,24 +1,30 @@
-from geneaprove.importers.gedcomimport import GedcomFileImporter
+from django.http import Http404
+from geneaprove.importers import jobs
 from .to_json import JSONView
-from ..sql.personas import PersonSet
 import logging
 
 logger = logging.getLogger('geneaprove.importers')
 
 
 class GedcomImport(JSONView):
+    """
+    Start importing the uploaded files in the background, and return the
+    job (see ImportJob)
+    """
 
     def post_json(self, params):
         files = params.files.getlist('file')
-        errors = []
-        success = True
+        job = jobs.submit([(f.name, f) for f in files])
+        return job.to_json()
 
-        for f in files:
-            suc, err = GedcomFileImporter().parse(f)
-            if err:
-                errors.append(err)
-            success = success and suc
 
-        PersonSet.recompute_main_ids()
+class ImportJob(JSONView):
+    """
+    The progress of an import
+    """
 
-        return {'error': "\n\n".join(errors), 'success': success}
+    def get_json(self, params, job):
+        j = jobs.get(job)
+        if j is None:
+            raise Http404(f'No such import job {job}')
+        return j.to_json()
@@ -21,7 +21,8 @@ class PedigreeData(JSONView):
         id = int(id)
         theme_id = int(params.get("theme", -1))
 
-        persons = PersonSet(styles=Styles(theme_id, decujus=id))
+        styles = Styles(theme_id, decujus=id)
+        persons = PersonSet(styles=styles)
         persons.add_folks(
             person_id=id,
             relationship=Relationship.ANCESTORS,
@@ -32,10 +33,12 @@ class PedigreeData(JSONView):
             relationship=Relationship.DESCENDANTS,
             max_depth=int(params.get("descendant_gens", 1)),
             skip=int(params.get("desc_known", 0)))
-        persons.fetch_p2e()
 
-        if theme_id >= 0:
-            persons.fetch_p2c()  # for custom styles
+        # Dates are already known, but custom styles need the assertions
+        if styles.need_p2e:
+            persons.fetch_p2e()
+        if styles.need_p2c:
+            persons.fetch_p2c()
 
         result = persons.to_json()
         result['decujus'] = persons.get_from_id(id).main_id
@@ -2,8 +2,9 @@
 Various views related to displaying the pedgree of a person graphically
 """
 
-from django.db.models import F, Count
+from django.db.models.expressions import RawSQL
 from .. import models
+from ..sql import phonetic, search
 from ..sql.personas import PersonSet
 from .to_json import JSONView
 from .styles import Styles
@@ -46,32 +47,44 @@ class PersonCount(JSONView):
 
     def get_json(self, params):
         namefilter = params.get('filter')
+        soundslike = params.get('phonetic')
 
-        r = models.Persona.objects \
-            .filter(id=F('main_id')) \
-
+        r = models.Person_Summary.objects.all()
         if namefilter:
-            r = r.filter(display_name__icontains=namefilter)
-
-        r = r.aggregate(count=Count('id'))
-        return int(r['count'])
+            r = search.filter_names(r, 'person', namefilter, 'sort_name')
+        if soundslike:
+            subquery = phonetic.match_subquery(
+                params.get('algorithm', 'soundex'), soundslike)
+            if subquery is not None:
+                r = r.filter(main_id__in=RawSQL(*subquery))
+        return r.count()
 
 
 class PersonaList(JSONView):
     """View the list of all personas"""
 
+    streaming = True
+
     def get_json(self, params, decujus=1):
         theme_id = int(params.get('theme', -1))
         ids = params.get('ids', None)
 
-        persons = PersonSet(styles=Styles(theme_id, decujus=decujus))
+        styles = Styles(theme_id, decujus=decujus)
+        persons = PersonSet(styles=styles)
         persons.add_ids(
             ids=[int(d) for d in ids.split(',')] if ids else None,
-            compute_sex=theme_id >= 0,
             namefilter=params.get('filter', None),
             offset=params.get('offset', None),
-            limit=params.get('limit', None))
-        persons.fetch_p2e()
+            limit=params.get('limit', None),
+            after=params.get('after', None),
+            soundslike=params.get('phonetic', None),
+            algorithm=params.get('algorithm', 'soundex'))
+
+        # Dates are already known, but custom styles need the assertions
+        if styles.need_p2e:
+            persons.fetch_p2e()
+        if styles.need_p2c:
+            persons.fetch_p2c()
         return persons
 
 
@@ -79,7 +92,9 @@ class PersonAssertsCount(JSONView):
     def get_json(self, params, id):
         p = PersonSet()
         p.add_ids([id])
-        return p.count_asserts()
+        return p.count_asserts(
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'))
 
 
 class PersonAsserts(JSONView):
@@ -88,4 +103,6 @@ class PersonAsserts(JSONView):
         p.add_ids([id])
         return p.fetch_asserts_subset(
             offset=params.get('offset', None),
-            limit=params.get('limit', None))
+            limit=params.get('limit', None),
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'))
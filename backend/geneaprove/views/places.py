@@ -5,6 +5,7 @@ Event-related views
 from django.db.models import Count
 from django.db.models.functions import Lower
 from .. import models
+from ..sql import search
 from ..sql.places import PlaceSet
 from .to_json import JSONView
 
@@ -12,18 +13,31 @@ from .to_json import JSONView
 class PlaceList(JSONView):
     """View the list of a all known places"""
 
+    streaming = True
+
     def get_json(self, params):
         offset = params.get('offset', None)
         limit = params.get('limit', None)
         namefilter = params.get('filter', None)
         ids = params.get('ids', None)
-        pm = models.Place.objects.order_by(Lower('name'))
+        pm = models.Place.objects.annotate(sort_name=Lower('name'))
 
         if namefilter:
-            pm = pm.filter(name__icontains=namefilter)
+            pm = search.filter_names(pm, 'place', namefilter, 'name')
         if ids:
             pm = pm.filter(id__in=ids.split(','))
-
+        pm = PlaceSet().date_range(
+            pm, params.get('date_from'), params.get('date_to'))
+
+        # Keyset pagination, when the client sends an "after" cursor (empty
+        # for the first page)
+        if 'after' in params:
+            places, after = PlaceSet().keyset(
+                pm, ('sort_name', 'id'),
+                after=params['after'], limit=limit)
+            return {"places": places, "after": after}
+
+        pm = pm.order_by('sort_name', 'id')
         if limit:
             li = int(limit)
             if offset:
@@ -32,7 +46,8 @@ class PlaceList(JSONView):
             else:
                 pm = pm[:li]
 
-        return pm.all()
+        # Run the query now, so that errors are reported before streaming
+        return list(pm)
 
 
 class PlaceCount(JSONView):
@@ -42,7 +57,9 @@ class PlaceCount(JSONView):
 
         pm = models.Place.objects.all()
         if namefilter:
-            pm = pm.filter(name__icontains=namefilter)
+            pm = search.filter_names(pm, 'place', namefilter, 'name')
+        pm = PlaceSet().date_range(
+            pm, params.get('date_from'), params.get('date_to'))
         pm = pm.aggregate(count=Count('id'))
         return int(pm['count'])
 
@@ -51,7 +68,9 @@ class PlaceAssertsCount(JSONView):
     def get_json(self, params, id):
         places = PlaceSet()
         places.add_ids([id])
-        return places.count_asserts()
+        return places.count_asserts(
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'))
 
 
 class PlaceAsserts(JSONView):
@@ -60,7 +79,9 @@ class PlaceAsserts(JSONView):
         places.add_ids([id])
         return places.fetch_asserts(
             offset=params.get('offset', None),
-            limit=params.get('limit', None)
+            limit=params.get('limit', None),
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'),
         )
 
 
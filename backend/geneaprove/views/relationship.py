@@ -0,0 +1,37 @@
+"""
+How two persons are related
+"""
+
+from django.http import Http404
+from ..models.persona import Persona
+from ..sql.personas import PersonSet
+from ..sql.relationship import find_relationship
+from .to_json import JSONView
+
+# Upper bound for the `max_depth` and `max_paths` parameters
+MAX_DEPTH = 100
+MAX_PATHS = 1000
+
+
+class RelationshipView(JSONView):
+    """
+    The most recent common ancestors of two persons, and the shortest
+    paths between them.
+    """
+
+    def get_json(self, params, id1, id2):
+        mains = dict(
+            Persona.objects
+            .filter(id__in=(id1, id2))
+            .values_list('id', 'main_id'))
+        for id in (id1, id2):
+            if id not in mains:
+                raise Http404(f'No such person {id}')
+
+        persons = PersonSet()
+        return find_relationship(
+            mains[id1],
+            mains[id2],
+            parents_of=persons.get_parents,
+            max_depth=min(int(params.get("max_depth", 20)), MAX_DEPTH),
+            max_paths=min(int(params.get("max_paths", 10)), MAX_PATHS))
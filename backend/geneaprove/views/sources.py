@@ -5,9 +5,10 @@ Source-related views
 import logging
 import os
 from django.db.models import Count
-from django.db.models.functions import Lower
+from django.db.models.expressions import RawSQL
 from django.conf import settings
 from .. import models
+from ..sql import search
 from ..sql.sources import SourceSet
 from ..utils.citations import Citations
 from ..utils.citations.style import Source_Citation
@@ -74,7 +75,9 @@ class SourceAsserts(JSONView):
         sources.add_ids(ids=[id])
         sources.fetch_asserts(
             offset=params.get('offset', None),
-            limit=params.get('limit', None)
+            limit=params.get('limit', None),
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'),
         )
         return sources.asserts.to_json()  # fetch related entities
 
@@ -87,7 +90,9 @@ class SourceAssertsCount(JSONView):
     def get_json(self, params, id):
         sources = SourceSet()
         sources.add_ids(ids=[id])
-        return sources.count_asserts()
+        return sources.count_asserts(
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'))
 
 
 class SourceView(JSONView):
@@ -179,6 +184,7 @@ class EditSourceCitation(JSONView):
                 src.parts.add(p)
 
         src.save()
+        search.update_sources([src.id])
 
         return SourceCitation().get_json(params, id=src.id)
 
@@ -190,7 +196,10 @@ class SourcesCount(JSONView):
 
         pm = models.Source.objects.all()
         if namefilter:
-            pm = pm.filter(abbrev__icontains=namefilter)
+            pm = search.filter_names(pm, 'source', namefilter, 'abbrev')
+        pm = SourceSet().date_range(
+            pm, params.get('date_from'), params.get('date_to'),
+            prefix='subject_')
         pm = pm.aggregate(count=Count('id'))
         return int(pm['count'])
 
@@ -200,23 +209,40 @@ class SourcesList(JSONView):
     View the list of all sources
     """
 
+    streaming = True
+
     def get_json(self, params):
         offset = params.get('offset', None)
         limit = params.get('limit', None)
         namefilter = params.get('filter', None)
         ids = params.get('ids', None)
 
+        # Must match the source_sort index
         pm = (
             models.Source.objects
-            .order_by(Lower('abbrev'), Lower('title'))
+            .annotate(
+                sort_abbrev=RawSQL("lower(coalesce(source.abbrev, ''))", []),
+                sort_title=RawSQL("lower(coalesce(source.title, ''))", []))
             .select_related('subject_place', 'jurisdiction_place')
         )
 
         if namefilter:
-            pm = pm.filter(abbrev__icontains=namefilter)
+            pm = search.filter_names(pm, 'source', namefilter, 'abbrev')
         if ids is not None:
             pm = pm.filter(id__in=ids.split(','))
-
+        pm = SourceSet().date_range(
+            pm, params.get('date_from'), params.get('date_to'),
+            prefix='subject_')
+
+        # Keyset pagination, when the client sends an "after" cursor (empty
+        # for the first page)
+        if 'after' in params:
+            sources, after = SourceSet().keyset(
+                pm, ('sort_abbrev', 'sort_title', 'id'),
+                after=params['after'], limit=limit)
+            return {"sources": sources, "after": after}
+
+        pm = pm.order_by('sort_abbrev', 'sort_title', 'id')
         if limit:
             li = int(limit)
             if offset:
@@ -225,7 +251,8 @@ class SourcesList(JSONView):
             else:
                 pm = pm[:li]
 
-        return pm.all()
+        # Run the query now, so that errors are reported before streaming
+        return list(pm)
 
 
 class SourceRepresentations(JSONView):
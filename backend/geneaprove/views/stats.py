@@ -4,10 +4,9 @@ Statistics
 
 import collections
 import datetime
-from django.db.models import Count, F
 import logging
 from .. import models
-from ..utils.date import DateRange
+from ..utils.date import parse_dates
 from ..sql.personas import PersonSet, Relationship
 from .to_json import JSONView
 
@@ -37,7 +36,6 @@ class StatsView(JSONView):
             person_id=int(id),
             relationship=Relationship.DESCENDANTS,
         )
-        persons.fetch_p2e()   # compute births and deaths
 
         logger.debug('count persons in tree')
         fathers = [p for p in persons.persons.values() if p.sex == 'M']
@@ -49,11 +47,10 @@ class StatsView(JSONView):
         logger.debug('parse dates')
         current_year = datetime.datetime.now().year
         dates = {}
-        for p in persons.persons.values():
-            b_year = DateRange(p.birthISODate).year() \
-                if p.birthISODate else None
-            d_year = DateRange(p.deathISODate).year() \
-                if p.deathISODate else None
+        all_persons = list(persons.persons.values())
+        births = parse_dates([p.birthISODate for p in all_persons]).years
+        deaths = parse_dates([p.deathISODate for p in all_persons]).years
+        for p, b_year, d_year in zip(all_persons, births, deaths):
             if not d_year and max_age > 0:
                 if b_year:
                     d_year = min(b_year + max_age, current_year)
@@ -149,15 +146,13 @@ class StatsView(JSONView):
                 else:
                     ages[age][3] += 1
 
-        total_in_db = models.Persona.objects \
-            .filter(id=F('main_id')).aggregate(count=Count('id'))
         decujus = persons.get_from_id(int(id))
 
         return {
             "total_ancestors": len(persons.persons),
             "total_father":    len(fathers),
             "total_mother":    len(mothers),
-            "total_persons":   int(total_in_db['count']),
+            "total_persons":   models.Person_Summary.objects.count(),
             "ranges":          ranges,
             "ages":            ages,
             "decujus":         decujus.main_id,
@@ -0,0 +1,126 @@
+"""
+The fast JSON encoding gives the same result as ModelEncoder
+"""
+
+import datetime
+import unittest
+from geneaprove.models.event import Event
+from geneaprove.utils.date import DateRange
+from .. import to_json
+
+
+class Item:
+    """An object converted via its own to_json method"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def to_json(self):
+        return {"value": self.value}
+
+
+class Point:
+    """An object converted via a registered encoder"""
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+to_json.register_encoder(Point, lambda p: [p.x, p.y])
+
+
+def sample():
+    """
+    Sample data. A new instance is needed for each encoding, since it
+    includes generators.
+    """
+    events = [
+        Event(id=j, name=f"event {j}", type_id=1, date=str(1900 + j))
+        for j in range(0, 3)
+    ]
+    return {
+        "events": events,
+        "date": DateRange("2 jan 1900"),
+        "range": DateRange("between 1800 and 1810"),
+        "set": {3, 1, 2},
+        "frozenset": frozenset(["a"]),
+        "tuple": (1, "b", None),
+        "generator": (e.id for e in events),
+        "keys": {1: "int", None: "none", True: "bool"},
+        "datetime": datetime.datetime(2020, 1, 2, 3, 4, 5),
+        "items": [Item(1), Item(DateRange("1750"))],
+        "points": {"a": Point(1, 2), "nested": {"b": [Point(3, 4)]}},
+        "empty": {"list": [], "dict": {}},
+        "text": "\u00e9\u2028\"",
+        "float": 1.5,
+    }
+
+
+def custom(obj):
+    if isinstance(obj, Event):
+        return {"custom": obj.id}
+    return None
+
+
+class JSONTestCase(unittest.TestCase):
+
+    def expected(self, obj, **kwargs) -> bytes:
+        # orjson does not escape non-ascii characters
+        return to_json.ModelEncoder(
+            ensure_ascii=False, **kwargs).encode(obj).encode()
+
+    def test_dumps(self):
+        self.assertEqual(to_json.dumps(sample()), self.expected(sample()))
+        self.assertEqual(
+            to_json.dumps(sample(), custom=custom, year_only=True),
+            self.expected(sample(), custom=custom, year_only=True))
+        self.assertEqual(
+            to_json.dumps(sample(), year_only=True),
+            self.expected(sample(), year_only=True))
+        self.assertEqual(
+            to_json.to_json(sample()), self.expected(sample()).decode())
+
+        # The json module gives the same result as orjson
+        previous = to_json.orjson
+        to_json.orjson = None
+        try:
+            self.assertEqual(
+                to_json.dumps(sample(), custom=custom),
+                self.expected(sample(), custom=custom))
+        finally:
+            to_json.orjson = previous
+
+    def test_iter_json(self):
+        self.assertEqual(
+            b''.join(to_json.iter_json(sample())), self.expected(sample()))
+        for value in ([], {}, [1, 2], "text", None, 3,
+                      {1, 2}, Item([1, {2: 3}])):
+            self.assertEqual(
+                b''.join(to_json.iter_json(value)), self.expected(value))
+        self.assertEqual(
+            b''.join(to_json.iter_json(e for e in [1, 2])), b'[1,2]')
+
+        # Chunks are grouped up to the chunk size
+        previous = to_json.STREAM_CHUNK_SIZE
+        to_json.STREAM_CHUNK_SIZE = 10
+        try:
+            chunks = list(to_json.iter_json(sample()))
+        finally:
+            to_json.STREAM_CHUNK_SIZE = previous
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), self.expected(sample()))
+
+    def test_encoder_for(self):
+        self.assertIsNone(to_json.encoder_for(object))
+        self.assertIsNotNone(to_json.encoder_for(Point))
+        self.assertIsNotNone(to_json.encoder_for(Item))
+
+        class Point3D(Point):
+            pass
+
+        self.assertIs(
+            to_json.encoder_for(Point3D), to_json.encoder_for(Point))
+        to_json.register_encoder(Point3D, lambda p: {"x": p.x})
+        self.assertEqual(to_json.dumps(Point3D(1, 2)), b'{"x":1}')
+        self.assertEqual(to_json.dumps(Point(1, 2)), b'[1,2]')
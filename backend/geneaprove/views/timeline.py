@@ -0,0 +1,40 @@
+"""
+The events of a family, in chronological order
+"""
+
+from ..sql.personas import PersonSet, Relationship
+from .to_json import JSONView
+
+# Default number of events per page
+DEFAULT_LIMIT = 100
+
+
+class TimelineView(JSONView):
+    """
+    All events of a person and their ancestors and descendants (up to the
+    given number of generations, or all of them for 0), sorted by date.
+    """
+
+    def get_json(self, params, id):
+        # pylint: disable=redefined-builtin
+        # pylint: disable=arguments-differ
+        persons = PersonSet()
+        persons.add_folks(
+            person_id=int(id),
+            relationship=Relationship.ANCESTORS,
+            max_depth=int(params.get("gens", 5)))
+        persons.add_folks(
+            person_id=int(id),
+            relationship=Relationship.DESCENDANTS,
+            max_depth=int(params.get("descendant_gens", 1)))
+
+        after = persons.fetch_timeline(
+            after=params.get('after', None),
+            limit=params.get('limit', DEFAULT_LIMIT),
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'))
+
+        result = persons.asserts.to_json()
+        result['decujus'] = persons.get_from_id(int(id)).main_id
+        result['after'] = after
+        return result
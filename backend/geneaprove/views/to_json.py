@@ -1,27 +1,132 @@
-"""Convert data to JSON"""
+"""
+Convert data to JSON
+
+The objects returned by views are encoded via functions registered for
+their type (see register_encoder), which return a simpler version of the
+object (for instance a dict) that is then encoded recursively. The encoder
+for each class is looked up once, so encoding large lists of model objects
+does not need to probe every object.
+
+If the orjson package is installed, it is used for the actual encoding,
+which is much faster than the json module.
+"""
 
 from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
-from django.http import HttpResponse, QueryDict
+from django.http import HttpResponse, QueryDict, StreamingHttpResponse
 from django.views.generic import View
+from geneaprove.models.base import GeneaProveModel
 from geneaprove.utils.date import DateRange
 import datetime
 import django.db.models.query
 import json
 import logging
 import time
+import types
+from typing import Any, Callable, Dict, Iterator, Optional, Type
+
+try:
+    import orjson
+except ImportError:
+    orjson = None    # type: ignore
 
 logger = logging.getLogger('geneaprove.JSON')
 
+Encoder = Callable[[Any], Any]
+
+# Maximum size of the chunks sent by streaming responses
+STREAM_CHUNK_SIZE = 65536
+
+# Dicts nested deeper than this are encoded in one go when streaming
+STREAM_DEPTH = 2
+
 
 ###########################################################################
 # Exporting to JSON
 ###########################################################################
 
+_encoders: Dict[type, Encoder] = {}
+_resolved: Dict[type, Optional[Encoder]] = {}   # cache for encoder_for
+
+
+def register_encoder(cls: Type, encoder: Encoder) -> None:
+    """
+    Register how to encode instances of cls (and its subclasses, unless
+    they have their own encoder): `encoder` returns a version of the
+    object that can be encoded to JSON, possibly after recursively
+    calling encoders.
+    """
+    _encoders[cls] = encoder
+    _resolved.clear()
+
+
+def _call_to_json(obj: Any) -> Any:
+    return obj.to_json()
+
+
+def encoder_for(cls: type) -> Optional[Encoder]:
+    """
+    The encoder to use for instances of cls: the one registered for the
+    closest parent class, or the object's own to_json() method.
+    """
+    try:
+        return _resolved[cls]
+    except KeyError:
+        pass
+
+    encoder: Optional[Encoder] = None
+    for c in cls.__mro__:
+        encoder = _encoders.get(c)
+        if encoder is not None:
+            break
+    else:
+        if hasattr(cls, 'to_json'):
+            encoder = _call_to_json
+
+    _resolved[cls] = encoder
+    return encoder
+
+
+register_encoder(GeneaProveModel, _call_to_json)
+register_encoder(DateRange, lambda d: d.display())
+register_encoder(datetime.datetime, lambda d: d.isoformat())
+register_encoder(django.db.models.query.QuerySet, list)
+register_encoder(types.GeneratorType, list)
+register_encoder(set, list)
+register_encoder(frozenset, list)
+register_encoder(tuple, list)   # orjson does not encode namedtuples
+
+
+def _make_default(custom=None, year_only=False) -> Encoder:
+    """
+    The function called for objects that cannot be encoded directly.
+    """
+    fallback = DjangoJSONEncoder().default   # Decimal, timedelta,...
+
+    def default(obj: Any) -> Any:
+        if custom:
+            from_custom = custom(obj)
+            if from_custom:
+                return from_custom
+
+        if year_only and isinstance(obj, DateRange):
+            return obj.display(year_only=True)
+
+        encoder = encoder_for(type(obj))
+        if encoder is not None:
+            return encoder(obj)
+        return fallback(obj)
+
+    return default
+
+
+_default = _make_default()
+
+
 class ModelEncoder(DjangoJSONEncoder):
     """
     Encode an object or a list extracted from our model to a JSON
-    representation.
+    representation, with the json module (see also dumps()).
     """
 
     def __init__(self, custom=None, year_only=False, **kwargs):
@@ -34,50 +139,100 @@ class ModelEncoder(DjangoJSONEncoder):
         if 'separators' not in kwargs:
             kwargs['separators'] = (',', ':')
         super().__init__(**kwargs)
-        self.year_only = year_only
-        self.custom = custom
+        self._default = _make_default(custom=custom, year_only=year_only)
 
     def default(self, obj):
         # pylint: disable=method-hidden
-        # pylint: disable=too-many-return-statements
         """See inherited documentation"""
+        return self._default(obj)
 
-        if self.custom:
-            from_custom = self.custom(obj)
-            if from_custom:
-                return from_custom
-
-        if isinstance(obj, DateRange):
-            return obj.display(year_only=self.year_only)
-
-        elif isinstance(obj, datetime.datetime):
-            return obj.isoformat()
-
-        elif isinstance(obj, django.db.models.query.QuerySet):
-            return list(obj)
 
-        elif isinstance(obj, set):
-            return list(obj)
-
-        # Must be last, since all model objects have a default to_json
-        elif hasattr(obj, 'to_json'):
-            # logger.debug(f'Converting {type(obj)}')
-            return obj.to_json()
-
-        else:
-            return super().default(obj)
-
-
-def to_json(obj, custom=None, year_only=False):
+def dumps(obj, custom=None, year_only=False, indent=None) -> bytes:
     """
-    Converts a type to json data, properly converting database instances.
+    Converts a type to compact json data (utf-8 encoded), properly
+    converting database instances.
     If year_only is true, then the dates will only include the year
     :param custom: a function that gets an object, and returns its JSON
        encoding as a string, or a simple version of the object that should
        be encoded recursively It should return None to fallback to the default
        encoding.
+    :param indent: if set, the output is pretty-printed, which is slower.
+    """
+    if orjson is not None and indent is None:
+        return orjson.dumps(
+            obj,
+            default=(
+                _make_default(custom=custom, year_only=year_only)
+                if custom or year_only
+                else _default),
+            option=orjson.OPT_NON_STR_KEYS)
+    return ModelEncoder(
+        year_only=year_only, custom=custom, indent=indent,
+        ensure_ascii=False,   # same output as orjson
+    ).encode(obj).encode()
+
+
+def to_json(obj, custom=None, year_only=False, indent=None) -> str:
     """
-    return ModelEncoder(year_only=year_only, custom=custom, indent=3).encode(obj)
+    Same as dumps(), but returns a string
+    """
+    return dumps(obj, custom=custom, year_only=year_only,
+                 indent=indent).decode()
+
+
+def iter_json(obj) -> Iterator[bytes]:
+    """
+    Same as dumps(), but generates the json data in chunks, so that it can
+    be sent while the rest of the data is being encoded. Lists are split
+    into their items, and dicts into their values (up to STREAM_DEPTH
+    levels). The resulting chunks are grouped up to STREAM_CHUNK_SIZE
+    bytes.
+    """
+    def encode(value: Any, depth: int) -> Iterator[bytes]:
+        if depth >= STREAM_DEPTH:
+            yield dumps(value)
+            return
+
+        # Objects that will be converted to a list or dict
+        while (
+                not isinstance(value, (dict, list, str, int, float))
+                and value is not None
+                and encoder_for(type(value)) is not None
+              ):
+            value = _default(value)
+
+        if isinstance(value, dict):
+            yield b'{'
+            for idx, (k, v) in enumerate(value.items()):
+                if idx:
+                    yield b','
+                # Keys are converted as in dumps(): '{"key":0}'
+                yield dumps({k: 0})[1:-2]
+                yield from encode(v, depth + 1)
+            yield b'}'
+        elif isinstance(value, list):
+            # Items are encoded in one go: splitting them further would
+            # result in lots of small chunks, which is much slower.
+            yield b'['
+            for idx, v in enumerate(value):
+                if idx:
+                    yield b','
+                yield dumps(v)
+            yield b']'
+        else:
+            yield dumps(value)
+
+    buffer = []
+    size = 0
+    for chunk in encode(obj, 0):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_CHUNK_SIZE:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
 
 
 class JSONViewParams(QueryDict):
@@ -141,12 +296,22 @@ class JSONView(View):
         """
         return {}
 
+    # Whether the response is sent while it is being encoded, rather than
+    # after. This is useful for large responses. The data is then encoded
+    # after get_json() has returned, outside of any transaction it opened,
+    # and errors can no longer change the status of the response: this
+    # should not be used with @transaction.atomic, nor when encoding still
+    # needs to run queries that might fail.
+    streaming = False
+
     def to_json(self, value):
         """
         Converts value to JSON.
         This can be overridden if necessary.
         """
-        return to_json(value)
+        if self.streaming:
+            return iter_json(value)
+        return dumps(value)
 
     def __internal(self, method, params, *args, **kwargs):
         """
@@ -162,8 +327,14 @@ class JSONView(View):
         # Can't use JsonResponse since we want our own converter
         logger.debug('convert to json')
         result = self.to_json(resp)
-        logger.debug(f'send response, total {time.perf_counter() - start}s')
-        return HttpResponse(result, content_type='application/json')
+        if isinstance(result, (str, bytes)):
+            logger.debug(
+                f'send response, total {time.perf_counter() - start}s')
+            return HttpResponse(result, content_type='application/json')
+
+        logger.debug('stream response')
+        return StreamingHttpResponse(
+            result, content_type='application/json')
 
     def get(self, request, *args, **kwargs):
         """
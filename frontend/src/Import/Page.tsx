@@ -1,29 +1,49 @@
 import * as React from "react";
 import Page from "../Page";
 import { UploadForm } from "./Upload";
-import { importGEDCOM } from "../Server/Import";
+import { importGEDCOM, ImportJob } from "../Server/Import";
 
 import "./Page.css";
 
 interface ImportPageState {
    success?: boolean;
    errorMsg?: string;
+   job?: ImportJob; // while the import is running
 }
 
 class ImportPage extends React.PureComponent<unknown, ImportPageState> {
    public state: ImportPageState = {};
 
    protected doUpload = (files: File[]) => {
-      return importGEDCOM(files).then(res => {
-         this.setState({ errorMsg: res.error, success: res.success });
+      this.setState({ success: undefined, errorMsg: undefined });
+      return importGEDCOM(files, job => this.setState({ job })).then(res => {
+         this.setState({
+            errorMsg: res.error,
+            success: res.success,
+            job: undefined
+         });
          return res;
       });
    };
 
    public render() {
       let error: undefined | JSX.Element | JSX.Element[] = undefined;
+      const job = this.state.job;
 
-      if (this.state.success === true) {
+      if (job) {
+         error = (
+            <div>
+               <p className="info">
+                  {job.file} ({job.phase}): {job.percent}%
+               </p>
+               <p className="output">
+                  {Object.entries(job.counts)
+                     .map(([tag, count]) => `${tag}: ${count}`)
+                     .join("\n")}
+               </p>
+            </div>
+         );
+      } else if (this.state.success === true) {
          if (this.state.errorMsg && this.state.errorMsg !== "") {
             error = (
                <div>
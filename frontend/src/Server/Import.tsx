@@ -9,21 +9,67 @@ interface ImportResponse {
 }
 
 /**
- * Import a GEDCOM file
+ * The progress of an import, which runs in the background on the server
  */
-export function importGEDCOM(files: File[]): Promise<ImportResponse> {
-   const data = new FormData();
-   files.forEach(f => data.append("file", f));
+export interface ImportJob {
+   id: string;
+   phase: string; // "queued", "parsing", "importing", "saving",...
+   percent: number;
+   file: string | null; // the file being imported
+   counts: { [tag: string]: number }; // records imported so far
+   success: boolean | null; // null until the import has finished
+   error: string;
+}
+
+// Delay between two queries for the progress of an import (in ms)
+const POLL_DELAY = 500;
 
-   return Server.post("/data/import", data).then((resp: Response) => {
+const fetchJob = (id: string): Promise<ImportJob> =>
+   window.fetch(`/data/import/${id}`).then((resp: Response) => {
       if (resp.status !== 200) {
-         window.console.log("Upload failed", resp);
-         return {
-            success: false,
-            error: `Upload failed with error ${resp.status}, ${resp.statusText}`
-         };
+         return Promise.reject(
+            `Import failed with error ${resp.status}, ${resp.statusText}`
+         );
       }
-      const result: Promise<ImportResponse> = resp.json();
-      return result;
+      return resp.json();
    });
+
+const waitForJob = (
+   job: ImportJob,
+   onProgress?: (job: ImportJob) => void
+): Promise<ImportResponse> => {
+   onProgress?.(job);
+   if (job.success !== null) {
+      return Promise.resolve({ success: job.success, error: job.error });
+   }
+   return new Promise(resolve => window.setTimeout(resolve, POLL_DELAY))
+      .then(() => fetchJob(job.id))
+      .then(j => waitForJob(j, onProgress));
+};
+
+/**
+ * Import a GEDCOM file.
+ * The promise is resolved once the import has finished.
+ */
+export function importGEDCOM(
+   files: File[],
+   onProgress?: (job: ImportJob) => void
+): Promise<ImportResponse> {
+   const data = new FormData();
+   files.forEach(f => data.append("file", f));
+
+   return Server.post("/data/import", data)
+      .then((resp: Response) => {
+         if (resp.status !== 200) {
+            window.console.log("Upload failed", resp);
+            return {
+               success: false,
+               error: `Upload failed with error ${resp.status}, ${resp.statusText}`
+            };
+         }
+         return resp
+            .json()
+            .then((job: ImportJob) => waitForJob(job, onProgress));
+      })
+      .catch((error: string) => ({ success: false, error }));
 }
@@ -32,6 +32,7 @@ ${VENV}/bin/pip install       \
    django_extensions==2.2.6   \
    django-cors-headers==3.2.1 \
    grandalf==0.6              \
+   orjson==3.8.3              \
    pillow==6.1                \
    psycopg2-binary==2.8       \
    django-stubs[compatible-mypy]